@@ -1,41 +1,168 @@
+import hashlib
+import threading
+
+import numpy as np
 import pandas as pd
-import geopandas as gpd
 import os
 
-def realizar_analise_seguranca_de_arquivos():
+from .indice_bairros import CAMINHO_BAIRROS, hash_arquivo, obter_indice_bairros
+
+
+CAMINHO_CRIMES = os.path.join("data", "policecalls.csv")
+CRS_CRIMES = "EPSG:4674"
+# Nomes aceitos para a coluna com o tipo da ocorrência, em ordem de preferência.
+COLUNAS_TIPO_CRIME = ("tipo_crime", "tipo", "natureza")
+# Linhas do CSV processadas por vez; limita o pico de memória da análise.
+TAMANHO_BLOCO_CSV = 200_000
+
+
+def detectar_coluna_tipo_crime(caminho: str):
+    """Descobre qual coluna do CSV traz o tipo da ocorrência (ou None)."""
+    colunas = pd.read_csv(caminho, nrows=0).columns
+    for candidata in COLUNAS_TIPO_CRIME:
+        if candidata in colunas:
+            return candidata
+    return None
+
+
+def contar_ocorrencias_em_blocos(indice, caminho=CAMINHO_CRIMES, coluna_tipo=None, tamanho_bloco=TAMANHO_BLOCO_CSV):
+    """
+    Lê o CSV de ocorrências em blocos e acumula as contagens por bairro.
+
+    Cada bloco de no máximo ``tamanho_bloco`` linhas passa pelo índice de
+    bairros de forma vetorizada e é descartado; só os acumuladores ficam em
+    memória, então o pico de memória não cresce com o tamanho do arquivo.
+
+    Retorna ``(totais, por_tipo)``: ``totais`` é um array com uma posição por
+    bairro (ordem de ``indice.bairros``) e ``por_tipo`` mapeia cada tipo de
+    ocorrência para um array no mesmo formato (vazio se ``coluna_tipo`` for None).
+    """
+    quantidade_bairros = len(indice.bairros)
+    totais = np.zeros(quantidade_bairros, dtype="int64")
+    por_tipo = {}
+
+    colunas = ["lat", "lng"] + ([coluna_tipo] if coluna_tipo else [])
+    blocos = pd.read_csv(
+        caminho,
+        usecols=colunas,
+        dtype={"lat": "float64", "lng": "float64"},
+        chunksize=tamanho_bloco,
+    )
+    for bloco in blocos:
+        posicoes = indice.localizar(bloco["lng"].to_numpy(), bloco["lat"].to_numpy(), crs=CRS_CRIMES)
+        dentro = posicoes >= 0
+        posicoes = posicoes[dentro]
+        totais += np.bincount(posicoes, minlength=quantidade_bairros)
+
+        if coluna_tipo:
+            tipos = bloco[coluna_tipo].to_numpy()[dentro]
+            codigos, nomes_tipos = pd.factorize(pd.Series(tipos).fillna("NAO INFORMADO").astype(str).str.strip())
+            # Um único bincount sobre (tipo, bairro) achatado conta todos os pares de uma vez.
+            matriz = np.bincount(
+                codigos * quantidade_bairros + posicoes,
+                minlength=len(nomes_tipos) * quantidade_bairros,
+            ).reshape(len(nomes_tipos), quantidade_bairros)
+            for nome_tipo, contagens in zip(nomes_tipos, matriz):
+                if nome_tipo in por_tipo:
+                    por_tipo[nome_tipo] += contagens
+                else:
+                    por_tipo[nome_tipo] = contagens
+
+    return totais, por_tipo
+
+
+def realizar_analise_seguranca_de_arquivos(tamanho_bloco=TAMANHO_BLOCO_CSV):
     """
     Função de emergência para rodar a análise diretamente dos arquivos,
     sem usar o banco de dados.
+
+    Os polígonos dos bairros vêm do índice em memória (app.indice_bairros),
+    carregado uma vez por processo; o CSV de ocorrências é lido em blocos de
+    ``tamanho_bloco`` linhas (ver ``contar_ocorrencias_em_blocos``).
     """
     print(">>> MODO DE EMERGÊNCIA: Lendo e analisando arquivos diretamente... <<<")
     try:
-        path_bairros = os.path.join("data", "Bairros final.geojson")
-        path_crimes = os.path.join("data", "policecalls.csv")
-
-        bairros_gdf = gpd.read_file(path_bairros)
-        
-       
-        # Simplesmente lemos o CSV. O Pandas vai usar a primeira linha como cabeçalho automaticamente.
-        crime_df = pd.read_csv(path_crimes)
-
-        crime_gdf = gpd.GeoDataFrame(
-            crime_df,
-            geometry=gpd.points_from_xy(crime_df['lng'], crime_df['lat']),
-            crs="EPSG:4674"
-        )
-        
-        if crime_gdf.crs != bairros_gdf.crs:
-            crime_gdf = crime_gdf.to_crs(bairros_gdf.crs)
+        indice = obter_indice_bairros()
 
-        crimes_por_bairro = gpd.sjoin(crime_gdf, bairros_gdf, how="inner", predicate="within")
-        contagem_crimes = crimes_por_bairro.groupby('nome').size().reset_index(name='contagem_de_crimes')
+        contagens, _ = contar_ocorrencias_em_blocos(indice, CAMINHO_CRIMES, tamanho_bloco=tamanho_bloco)
+
+        relatorio_final = indice.bairros.copy()
+        relatorio_final["contagem_de_crimes"] = contagens.astype(int)
 
-        relatorio_final = pd.merge(bairros_gdf, contagem_crimes, on='nome', how='left')
-        relatorio_final['contagem_de_crimes'] = relatorio_final['contagem_de_crimes'].fillna(0).astype(int)
-        
         print(">>> Análise de arquivos concluída com sucesso! <<<")
         return relatorio_final
 
     except Exception as e:
         print(f"!!! ERRO NA ANÁLISE DE ARQUIVOS: {e} !!!")
-        return {"error": f"Ocorreu um erro na análise de arquivos: {e}"}
\ No newline at end of file
+        return {"error": f"Ocorreu um erro na análise de arquivos: {e}"}
+
+
+def contar_crimes_por_tipo(tamanho_bloco=TAMANHO_BLOCO_CSV):
+    """
+    Conta as ocorrências de cada tipo por bairro.
+
+    Retorna um DataFrame com uma linha por bairro, na mesma ordem de
+    ``obter_indice_bairros().bairros``, e uma coluna por tipo de crime.
+    Se o CSV não tiver coluna de tipo, o DataFrame não terá colunas.
+    """
+    try:
+        indice = obter_indice_bairros()
+        coluna_tipo = detectar_coluna_tipo_crime(CAMINHO_CRIMES)
+        if coluna_tipo is None:
+            return pd.DataFrame(index=pd.RangeIndex(len(indice.bairros)))
+
+        _, por_tipo = contar_ocorrencias_em_blocos(
+            indice, CAMINHO_CRIMES, coluna_tipo=coluna_tipo, tamanho_bloco=tamanho_bloco
+        )
+        colunas = sorted(por_tipo)
+        return pd.DataFrame({tipo: por_tipo[tipo] for tipo in colunas}, index=pd.RangeIndex(len(indice.bairros)))
+
+    except Exception as e:
+        print(f"!!! ERRO NA CONTAGEM POR TIPO: {e} !!!")
+        return {"error": f"Ocorreu um erro na contagem por tipo: {e}"}
+
+
+# --- Cache de resultados por versão dos dados de entrada ---
+
+_resultados_em_cache = {}
+_trava_resultados = threading.Lock()
+
+
+def versao_dos_dados() -> str:
+    """
+    Identifica o conteúdo atual dos arquivos de entrada (bairros + ocorrências).
+
+    A versão é o SHA-256 dos hashes dos dois arquivos, então muda se e somente
+    se algum deles mudar de conteúdo.
+    """
+    digest = hashlib.sha256()
+    digest.update(f"bairros:{hash_arquivo(CAMINHO_BAIRROS)}\n".encode())
+    digest.update(f"crimes:{hash_arquivo(CAMINHO_CRIMES)}\n".encode())
+    return digest.hexdigest()
+
+
+def obter_resultado_em_cache(tipo: str, versao: str, gerar):
+    """
+    Devolve o resultado ``tipo`` já calculado para ``versao`` ou o gera com ``gerar()``.
+
+    Só a versão mais recente fica guardada: ao armazenar um resultado de uma
+    versão nova, os resultados das versões anteriores são descartados.
+    """
+    chave = (tipo, versao)
+    with _trava_resultados:
+        if chave in _resultados_em_cache:
+            return _resultados_em_cache[chave]
+
+    resultado = gerar()
+
+    with _trava_resultados:
+        for chave_antiga in [c for c in _resultados_em_cache if c[1] != versao]:
+            del _resultados_em_cache[chave_antiga]
+        _resultados_em_cache[chave] = resultado
+    return resultado
+
+
+def limpar_resultados_em_cache() -> None:
+    """Descarta todos os resultados guardados."""
+    with _trava_resultados:
+        _resultados_em_cache.clear()
@@ -0,0 +1,117 @@
+"""Motor de análise no PostGIS: contagens por bairro calculadas dentro do banco.
+
+Em vez de trazer os pontos para o Python, uma única consulta junta
+``eventos_seguranca`` e ``bairros`` com ``ST_Contains`` e agrupa por bairro e
+natureza; os índices GiST que o GeoAlchemy2 cria nas colunas de geometria
+atendem a junção. O resultado tem o mesmo formato do modo de arquivos
+(``analise.realizar_analise_seguranca_de_arquivos``), na ordem do índice de
+bairros, então os endpoints podem usar um ou outro.
+"""
+
+from __future__ import annotations
+
+import hashlib
+from typing import Dict, Tuple
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from .banco_de_dados.db_saida import Bairro, Evento, TipoEvento
+from .banco_de_dados.referencia_bairros import normalizar_nome_bairro
+from .indice_bairros import CAMINHO_BAIRROS, IndiceBairros, hash_arquivo, obter_indice_bairros
+from .mapa_calor import versao_eventos
+
+
+MOTOR_ARQUIVOS = "arquivos"
+MOTOR_POSTGIS = "postgis"
+
+# Só eventos criminais entram em "contagem_de_crimes", como no CSV de chamados.
+TIPOS_EVENTO_CRIME = (TipoEvento.CRIME_CONTRA_PESSOA, TipoEvento.CRIME_CONTRA_PATRIMONIO)
+NATUREZA_NAO_INFORMADA = "NAO INFORMADO"
+
+
+def contar_ocorrencias_no_banco(session: Session, indice: IndiceBairros) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+    """
+    Conta os eventos criminais por bairro e natureza com um GROUP BY no PostGIS.
+
+    Retorna ``(totais, por_tipo)`` no formato de
+    ``analise.contar_ocorrencias_em_blocos``. Os bairros do banco são casados
+    com os do índice pelo nome normalizado (acentos, caixa e apelidos).
+    """
+    consulta = (
+        select(Bairro.nome, Evento.natureza_crime, func.count(Evento.id))
+        .join(Evento, func.ST_Contains(Bairro.geometria_area, Evento.ponto_geografico))
+        .where(Evento.tipo_evento.in_(TIPOS_EVENTO_CRIME))
+        .group_by(Bairro.id, Bairro.nome, Evento.natureza_crime)
+    )
+
+    quantidade_bairros = len(indice.bairros)
+    posicao_por_nome = {normalizar_nome_bairro(nome): posicao for posicao, nome in enumerate(indice.nomes)}
+    totais = np.zeros(quantidade_bairros, dtype="int64")
+    por_tipo: Dict[str, np.ndarray] = {}
+    ignorados = set()
+
+    for nome, natureza, quantidade in session.execute(consulta):
+        posicao = posicao_por_nome.get(normalizar_nome_bairro(nome))
+        if posicao is None:
+            ignorados.add(nome)
+            continue
+        totais[posicao] += quantidade
+        tipo = natureza.strip() if natureza and natureza.strip() else NATUREZA_NAO_INFORMADA
+        por_tipo.setdefault(tipo, np.zeros(quantidade_bairros, dtype="int64"))[posicao] += quantidade
+
+    if ignorados:
+        print(f"Aviso: bairros do banco sem correspondência no mapa: {', '.join(sorted(ignorados))}")
+    return totais, por_tipo
+
+
+def realizar_analise_seguranca_do_banco(session: Session):
+    """
+    Mesma saída de ``realizar_analise_seguranca_de_arquivos``, com a contagem
+    feita no PostGIS.
+    """
+    print(">>> MODO POSTGIS: contando ocorrências por bairro no banco... <<<")
+    try:
+        indice = obter_indice_bairros()
+        contagens, _ = contar_ocorrencias_no_banco(session, indice)
+
+        relatorio_final = indice.bairros.copy()
+        relatorio_final["contagem_de_crimes"] = contagens.astype(int)
+
+        print(">>> Análise no banco concluída com sucesso! <<<")
+        return relatorio_final
+
+    except Exception as e:
+        print(f"!!! ERRO NA ANÁLISE NO BANCO: {e} !!!")
+        return {"error": f"Ocorreu um erro na análise no banco: {e}"}
+
+
+def contar_crimes_por_tipo_do_banco(session: Session):
+    """
+    Equivalente a ``analise.contar_crimes_por_tipo``, com a natureza do evento
+    como tipo de crime.
+    """
+    try:
+        indice = obter_indice_bairros()
+        _, por_tipo = contar_ocorrencias_no_banco(session, indice)
+        colunas = sorted(por_tipo)
+        return pd.DataFrame({tipo: por_tipo[tipo] for tipo in colunas}, index=pd.RangeIndex(len(indice.bairros)))
+
+    except Exception as e:
+        print(f"!!! ERRO NA CONTAGEM POR TIPO NO BANCO: {e} !!!")
+        return {"error": f"Ocorreu um erro na contagem por tipo no banco: {e}"}
+
+
+def versao_dos_dados_do_banco(session: Session) -> str:
+    """
+    Identifica o estado atual das entradas do modo PostGIS: o mapa de bairros
+    usado na ordenação, a tabela ``bairros`` e a tabela de eventos.
+    """
+    bairros = session.execute(select(func.count(Bairro.id), func.max(Bairro.id))).one()
+    digest = hashlib.sha256()
+    digest.update(f"bairros:{hash_arquivo(CAMINHO_BAIRROS)}\n".encode())
+    digest.update(f"tabela_bairros:{tuple(bairros)!r}\n".encode())
+    digest.update(f"eventos:{versao_eventos(session)!r}\n".encode())
+    return digest.hexdigest()
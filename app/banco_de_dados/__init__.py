@@ -1 +0,0 @@
-hgjgjjjj
\ No newline at end of file
@@ -0,0 +1,114 @@
+# app/banco_de_dados/bairro_backfill.py
+"""
+Preenchimento em massa de Evento.bairro_id
+
+Duas fontes, ambas aplicadas com UPDATEs em lotes por faixa de id (cada lote
+usa a chave primária e é confirmado separadamente, então a tabela nunca fica
+bloqueada por muito tempo):
+
+- pelo nome: o texto bruto da coluna "Bairro" das planilhas fica em
+  detalhes_adicionais['bairro_texto']; os textos distintos são resolvidos uma
+  vez no Python (IndiceNomesBairros) e enviados como uma tabela VALUES
+  para um UPDATE ... FROM;
+- pelo ponto: eventos com ponto_geografico ainda sem bairro recebem o
+  bairro cujo polígono os contém (ST_Contains, índice GiST).
+"""
+
+from typing import Dict, Iterator, Optional, Tuple
+
+from sqlalchemy import Integer, String, column, func, select, update, values
+from sqlalchemy.orm import Session
+
+from .db_saida import Bairro, Evento
+from .referencia_bairros import IndiceNomesBairros
+
+CHAVE_BAIRRO_TEXTO = 'bairro_texto'
+TAMANHO_LOTE = 50_000
+
+
+def carregar_indice_nomes(session: Session) -> IndiceNomesBairros:
+    """
+    Monta o índice de nomes a partir da tabela 'bairros'
+    """
+    return IndiceNomesBairros(session.execute(select(Bairro.id, Bairro.nome)).all())
+
+
+def _texto_bairro():
+    return Evento.detalhes_adicionais[CHAVE_BAIRRO_TEXTO].as_string()
+
+
+def _faixas_de_id(session: Session, tamanho_lote: int) -> Iterator[Tuple[int, int]]:
+    menor, maior = session.execute(
+        select(func.min(Evento.id), func.max(Evento.id)).where(Evento.bairro_id.is_(None))
+    ).one()
+    if menor is None:
+        return
+    for inicio in range(menor, maior + 1, tamanho_lote):
+        yield inicio, inicio + tamanho_lote
+
+
+def resolver_textos_distintos(session: Session, indice: IndiceNomesBairros) -> Dict[str, int]:
+    """
+    Resolve cada texto distinto de bairro dos eventos ainda sem bairro_id
+    """
+    consulta = (
+        select(_texto_bairro())
+        .where(Evento.bairro_id.is_(None))
+        .where(_texto_bairro().isnot(None))
+        .distinct()
+    )
+    mapa = {}
+    for (texto,) in session.execute(consulta):
+        bairro_id = indice.resolver(texto)
+        if bairro_id is not None:
+            mapa[texto] = bairro_id
+    return mapa
+
+
+def preencher_por_nome(session: Session, indice: Optional[IndiceNomesBairros] = None,
+                       tamanho_lote: int = TAMANHO_LOTE) -> int:
+    """
+    Preenche bairro_id pelo texto bruto do bairro; retorna quantos eventos foram atualizados
+    """
+    indice = indice or carregar_indice_nomes(session)
+    mapa = resolver_textos_distintos(session, indice)
+    if not mapa:
+        return 0
+
+    tabela = values(
+        column('texto', String), column('bairro_id', Integer), name='mapa_bairros'
+    ).data(list(mapa.items()))
+
+    atualizados = 0
+    for inicio, fim in list(_faixas_de_id(session, tamanho_lote)):
+        resultado = session.execute(
+            update(Evento)
+            .where(Evento.id >= inicio, Evento.id < fim)
+            .where(Evento.bairro_id.is_(None))
+            .where(_texto_bairro() == tabela.c.texto)
+            .values(bairro_id=tabela.c.bairro_id)
+            .execution_options(synchronize_session=False)
+        )
+        session.commit()
+        atualizados += resultado.rowcount
+    return atualizados
+
+
+def preencher_por_ponto(session: Session, tamanho_lote: int = TAMANHO_LOTE) -> int:
+    """
+    Preenche bairro_id pelo polígono que contém ponto_geografico; retorna quantos eventos foram atualizados
+    """
+    atualizados = 0
+    for inicio, fim in list(_faixas_de_id(session, tamanho_lote)):
+        resultado = session.execute(
+            update(Evento)
+            .where(Evento.id >= inicio, Evento.id < fim)
+            .where(Evento.bairro_id.is_(None))
+            .where(Evento.ponto_geografico.isnot(None))
+            .where(func.ST_Contains(Bairro.geometria_area, Evento.ponto_geografico))
+            .values(bairro_id=Bairro.id)
+            .execution_options(synchronize_session=False)
+        )
+        session.commit()
+        atualizados += resultado.rowcount
+    return atualizados
@@ -0,0 +1,220 @@
+# app/banco_de_dados/count_cube.py
+"""
+Cubo de Contagens - bairro × natureza × ano-mês × hora × dia da semana
+Guardado de forma esparsa (coordenadas + contagens) e consultado com NumPy
+"""
+
+import json
+import os
+import unicodedata
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from app.banco_de_dados.data_processor import PERIODO_NAO_INFORMADO, PERIODOS_DIA
+
+
+DIMENSOES = ('bairro', 'natureza', 'ano_mes', 'hora', 'dia_semana')
+NAO_INFORMADO = PERIODO_NAO_INFORMADO
+
+DIAS_SEMANA = ('Segunda', 'Terça', 'Quarta', 'Quinta', 'Sexta', 'Sábado', 'Domingo')
+HORAS = tuple(f"{hora:02d}" for hora in range(24))
+
+
+def _sem_acentos(texto: str) -> str:
+    return ''.join(c for c in unicodedata.normalize('NFKD', texto) if not unicodedata.combining(c))
+
+
+_DIA_POR_PREFIXO = {_sem_acentos(dia).lower()[:3]: dia for dia in DIAS_SEMANA}
+
+
+def horas_do_periodo(periodo: str) -> List[str]:
+    """
+    Converte um rótulo de DataProcessor.classify_time_period nas horas do cubo
+    """
+    indice = PERIODOS_DIA.index(periodo)
+    return list(HORAS[indice * 6:(indice + 1) * 6])
+
+
+class CountCube:
+    """
+    Cubo esparso de contagens de ocorrências
+
+    Cada dimensão tem uma lista de rótulos; as células não vazias são
+    guardadas como linhas de códigos (uma coluna por dimensão) com a
+    contagem correspondente. Fatias e agregações são máscaras booleanas e
+    um bincount sobre essas linhas.
+    """
+
+    def __init__(self):
+        self.labels: Dict[str, List[str]] = {dim: [] for dim in DIMENSOES}
+        self._codigos_por_rotulo: Dict[str, Dict[str, int]] = {dim: {} for dim in DIMENSOES}
+        self.coords = np.empty((0, len(DIMENSOES)), dtype=np.int32)
+        self.counts = np.empty(0, dtype=np.int64)
+
+    # --- Construção ---
+
+    def _encode(self, dim: str, valores: pd.Series) -> np.ndarray:
+        """
+        Converte os rótulos de uma coluna em códigos da dimensão
+        """
+        codigos_locais, unicos = pd.factorize(valores, sort=False)
+        mapa = self._codigos_por_rotulo[dim]
+        tradutor = np.empty(len(unicos), dtype=np.int32)
+        for posicao, rotulo in enumerate(unicos):
+            if rotulo not in mapa:
+                mapa[rotulo] = len(self.labels[dim])
+                self.labels[dim].append(rotulo)
+            tradutor[posicao] = mapa[rotulo]
+        return tradutor[codigos_locais]
+
+    @staticmethod
+    def _texto(df: pd.DataFrame, coluna: Optional[str], maiusculas: bool = False) -> pd.Series:
+        if not coluna or coluna not in df.columns:
+            return pd.Series(NAO_INFORMADO, index=df.index)
+        texto = df[coluna].astype(str).str.strip()
+        vazio = df[coluna].isna() | texto.isin(['', 'nan', 'NAN', 'None'])
+        if maiusculas:
+            texto = texto.str.upper()
+        return texto.mask(vazio, NAO_INFORMADO)
+
+    @staticmethod
+    def _horas(df: pd.DataFrame, coluna: Optional[str]) -> pd.Series:
+        if not coluna or coluna not in df.columns:
+            return pd.Series(NAO_INFORMADO, index=df.index)
+        valores = df[coluna]
+        horas = pd.to_numeric(valores, errors='coerce')
+        horas = horas.where((horas >= 0) & (horas < 24))
+        sem_numero = horas.isna() & valores.notna()
+        if sem_numero.any():
+            convertidas = pd.to_datetime(valores[sem_numero].astype(str), errors='coerce', format='mixed')
+            horas = horas.fillna(convertidas.dt.hour)
+        rotulos = horas.map(lambda h: NAO_INFORMADO if pd.isna(h) else HORAS[int(h)])
+        return rotulos
+
+    @staticmethod
+    def _datas(df: pd.DataFrame, coluna_data: Optional[str], coluna_dia: Optional[str]):
+        if coluna_data and coluna_data in df.columns:
+            # As planilhas misturam dd/mm/aaaa com datas ISO na mesma coluna; dayfirst
+            # trocaria dia e mês das ISO, então elas são lidas à parte.
+            texto = df[coluna_data].astype(str).str.strip()
+            iso = texto.str.match(r'^\d{4}-\d{2}-\d{2}')
+            datas = pd.to_datetime(texto.where(~iso), errors='coerce', dayfirst=True, format='mixed')
+            datas = datas.fillna(pd.to_datetime(texto.where(iso), errors='coerce', format='ISO8601'))
+        else:
+            datas = pd.Series(pd.NaT, index=df.index)
+
+        ano_mes = datas.dt.strftime('%Y-%m').fillna(NAO_INFORMADO)
+
+        dias = datas.dt.weekday.map(lambda d: NAO_INFORMADO if pd.isna(d) else DIAS_SEMANA[int(d)])
+        if coluna_dia and coluna_dia in df.columns:
+            # Sem data válida, aproveita o texto da coluna "Dia da Semana"
+            por_texto = df[coluna_dia].astype(str).map(
+                lambda t: _DIA_POR_PREFIXO.get(_sem_acentos(t.strip()).lower()[:3], NAO_INFORMADO)
+            )
+            dias = dias.where(dias != NAO_INFORMADO, por_texto)
+        return ano_mes, dias
+
+    def add_dataframe(self, df: pd.DataFrame, column_map: Dict[str, str]):
+        """
+        Acrescenta ao cubo os registros de um DataFrame (mesmo column_map do DataProcessor)
+        """
+        if len(df) == 0:
+            return
+
+        ano_mes, dias = self._datas(df, column_map.get('data'), column_map.get('dia_semana'))
+        colunas = {
+            'bairro': self._texto(df, column_map.get('bairro'), maiusculas=True),
+            # Mesma normalização dos filtros de natureza do mapa de calor (strip + maiúsculas)
+            'natureza': self._texto(df, column_map.get('natureza'), maiusculas=True),
+            'ano_mes': ano_mes,
+            'hora': self._horas(df, column_map.get('hora')),
+            'dia_semana': dias,
+        }
+        novas = np.column_stack([self._encode(dim, colunas[dim]) for dim in DIMENSOES])
+
+        todas = np.concatenate([self.coords, novas])
+        pesos = np.concatenate([self.counts, np.ones(len(novas), dtype=np.int64)])
+        self.coords, inverso = np.unique(todas, axis=0, return_inverse=True)
+        self.coords = self.coords.astype(np.int32)
+        self.counts = np.bincount(inverso.ravel(), weights=pesos, minlength=len(self.coords)).astype(np.int64)
+
+    # --- Consulta ---
+
+    def _mascara(self, filtros: Dict[str, Iterable[str]]) -> np.ndarray:
+        mascara = np.ones(len(self.counts), dtype=bool)
+        for dim, valores in filtros.items():
+            if dim not in DIMENSOES:
+                raise ValueError(f"Dimensão desconhecida: {dim}")
+            if isinstance(valores, str):
+                valores = [valores]
+            mapa = self._codigos_por_rotulo[dim]
+            codigos = [mapa[v] for v in valores if v in mapa]
+            mascara &= np.isin(self.coords[:, DIMENSOES.index(dim)], codigos)
+        return mascara
+
+    def total(self, **filtros) -> int:
+        """
+        Total de ocorrências que satisfazem os filtros (dimensão=rótulo ou lista de rótulos)
+        """
+        return int(self.counts[self._mascara(filtros)].sum())
+
+    def query(self, group_by: Iterable[str] = (), **filtros) -> pd.DataFrame:
+        """
+        Fatia o cubo pelos filtros e agrega pelas dimensões de group_by
+
+        Ex.: cube.query(['natureza'], bairro='ALDEOTA', ano_mes='2024-03',
+                        hora=horas_do_periodo('Noite (18h-00h)'))
+        """
+        group_by = list(group_by)
+        for dim in group_by:
+            if dim not in DIMENSOES:
+                raise ValueError(f"Dimensão desconhecida: {dim}")
+
+        mascara = self._mascara(filtros)
+        contagens = self.counts[mascara]
+        if not group_by:
+            return pd.DataFrame({'total': [int(contagens.sum())]})
+
+        eixos = [DIMENSOES.index(dim) for dim in group_by]
+        chaves, inverso = np.unique(self.coords[mascara][:, eixos], axis=0, return_inverse=True)
+        totais = np.bincount(inverso.ravel(), weights=contagens, minlength=len(chaves)).astype(np.int64)
+
+        resultado = pd.DataFrame({
+            dim: np.asarray(self.labels[dim], dtype=object)[chaves[:, i]] if len(chaves) else []
+            for i, dim in enumerate(group_by)
+        })
+        resultado['total'] = totais
+        return resultado.sort_values('total', ascending=False, ignore_index=True)
+
+    # --- Persistência ---
+
+    def save(self, caminho: str):
+        """
+        Salva o cubo em um .npz (códigos, contagens e rótulos)
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(caminho)), exist_ok=True)
+        np.savez_compressed(
+            caminho,
+            coords=self.coords,
+            counts=self.counts,
+            labels=np.array(json.dumps(self.labels, ensure_ascii=False)),
+        )
+        print(f"\n✅ Cubo de contagens salvo em: {caminho}")
+
+    @classmethod
+    def load(cls, caminho: str) -> 'CountCube':
+        """
+        Carrega um cubo salvo com save()
+        """
+        cubo = cls()
+        with np.load(caminho) as dados:
+            cubo.coords = dados['coords']
+            cubo.counts = dados['counts']
+            cubo.labels = json.loads(str(dados['labels']))
+        cubo._codigos_por_rotulo = {
+            dim: {rotulo: codigo for codigo, rotulo in enumerate(rotulos)}
+            for dim, rotulos in cubo.labels.items()
+        }
+        return cubo
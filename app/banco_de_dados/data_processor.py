@@ -11,6 +11,15 @@ from typing import Dict, List
 from collections import defaultdict
 
 
+PERIODOS_DIA = (
+    "Madrugada (00h-06h)",
+    "Manhã (06h-12h)",
+    "Tarde (12h-18h)",
+    "Noite (18h-00h)",
+)
+PERIODO_NAO_INFORMADO = "Não informado"
+
+
 class DataProcessor:
     """Processador que extrai estatísticas detalhadas dos dados"""
 
@@ -34,7 +43,7 @@ class DataProcessor:
         Classifica horário em período do dia
         """
         if pd.isna(hour_value):
-            return "Não informado"
+            return PERIODO_NAO_INFORMADO
 
         try:
             if isinstance(hour_value, time):
@@ -49,16 +58,16 @@ class DataProcessor:
                 hour = int(hour_value)
 
             if 0 <= hour < 6:
-                return "Madrugada (00h-06h)"
+                return PERIODOS_DIA[0]
             elif 6 <= hour < 12:
-                return "Manhã (06h-12h)"
+                return PERIODOS_DIA[1]
             elif 12 <= hour < 18:
-                return "Tarde (12h-18h)"
+                return PERIODOS_DIA[2]
             else:
-                return "Noite (18h-00h)"
+                return PERIODOS_DIA[3]
 
         except:
-            return "Não informado"
+            return PERIODO_NAO_INFORMADO
 
     def extract_month_year(self, date_value):
         """
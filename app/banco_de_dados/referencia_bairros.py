@@ -0,0 +1,141 @@
+# app/banco_de_dados/referencia_bairros.py
+"""
+Referência dos bairros de Fortaleza: AIS de cada bairro e normalização de nomes
+"""
+
+import re
+import unicodedata
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Nosso "dicionário de tradução" oficial de Bairros para AIS, extraído do site da SSPDS
+BAIRROS_POR_AIS = {
+    1: ["Aldeota", "Cais do Porto", "Meireles", "Mucuripe", "Praia de Iracema", "Varjota", "Vicente Pinzon"],
+    2: ["Bom Jardim", "Conjunto Ceará I", "Conjunto Ceará II", "Genibaú", "Granja Lisboa", "Granja Portugal", "Siqueira"],
+    3: ["Ancuri", "Barroso", "Coaçu", "Conjunto Palmeiras", "Curió", "Guajeru", "Jangurussu", "Lagoa Redonda", "Messejana", "Parque Santa Maria", "Paupina", "Pedras", "São Bento"],
+    4: ["Álvaro Weyne", "Carlito Pamplona", "Centro", "Farias Brito", "Jacarecanga", "Monte Castelo", "Moura Brasil", "São Gerardo", "Vila Ellery"],
+    5: ["Aeroporto", "Benfica", "Bom Futuro", "Couto Fernandes", "Damas", "Demócrito Rocha", "Dendê", "Fátima", "Itaoca", "Itaperi", "Jardim América", "José Bonifácio", "Montese", "Panamericano", "Parangaba", "Parreão", "Serrinha", "Vila Peri", "Vila União"],
+    6: ["Amadeu Furtado", "Antônio Bezerra", "Autran Nunes", "Bela Vista", "Bonsucesso", "Dom Lustosa", "Henrique Jorge", "João XXIII", "Jóquei Clube", "Olavo Oliveira", "Padre Andrade", "Parque Araxá", "Parquelândia", "Pici", "Presidente Kennedy", "Quintino Cunha", "Rodolfo Teófilo"],
+    7: ["Aerolândia", "Alto da Balança", "Boa Vista", "Cajazeiras", "Cambeba", "Cidade dos Funcionários", "Dias Macedo", "Edson Queiroz", "Jardim das Oliveiras", "José de Alencar", "Parque Dois Irmãos", "Parque Iracema", "Parque Manibura", "Passaré", "Sabiaguaba", "Sapiranga"],
+    8: ["Barra do Ceará", "Cristo Redentor", "Floresta", "Jardim Guanabara", "Jardim Iracema", "Pirambu", "Vila Velha"],
+    9: ["Aracapé", "Canindezinho", "Conjunto Esperança", "Jardim Cearense", "Maraponga", "Mondubim", "Novo Mondubim", "Parque Presidente Vargas", "Parque Santa Rosa", "Parque São José", "Planalto Ayrton Senna", "Prefeito José Walter", "Vila Manoel Sátiro"],
+    10: ["Cidade 2000", "Cocó", "Dionísio Torres", "Engenheiro Luciano Cavalcante", "Guararapes", "Joaquim Távora", "Lourdes", "Manuel Dias Branco", "Papicu", "Praia do Futuro I", "Praia do Futuro II", "Salinas", "São João do Tauape"]
+}
+
+# Abreviações comuns nas planilhas da SSPDS e em endereços, expandidas palavra a palavra
+ABREVIACOES = {
+    "AV": "AVENIDA",
+    "CJ": "CONJUNTO",
+    "CONJ": "CONJUNTO",
+    "CID": "CIDADE",
+    "ENG": "ENGENHEIRO",
+    "JD": "JARDIM",
+    "JARD": "JARDIM",
+    "PQ": "PARQUE",
+    "PRQ": "PARQUE",
+    "PRES": "PRESIDENTE",
+    "PREF": "PREFEITO",
+    "STA": "SANTA",
+    "STO": "SANTO",
+    "VL": "VILA",
+}
+
+# Numeração no fim do nome: "Conjunto Ceará 1" -> "CONJUNTO CEARA I"
+NUMERAIS_FINAIS = {"1": "I", "2": "II"}
+
+# Grafias alternativas (já normalizadas e com abreviações expandidas) -> nome
+# normalizado usado em BAIRROS_POR_AIS. Cobre o GeoJSON oficial e as formas
+# curtas mais frequentes nas planilhas.
+ALIASES_BAIRROS = {
+    "BOA VISTA CASTELAO": "BOA VISTA",
+    "CASTELAO": "BOA VISTA",
+    "DE LOURDES": "LOURDES",
+    "ELLERY": "VILA ELLERY",
+    "MANOEL SATIRO": "VILA MANOEL SATIRO",
+    "MANUEL SATIRO": "VILA MANOEL SATIRO",
+    "VILA MANUEL SATIRO": "VILA MANOEL SATIRO",
+    "PAN AMERICANO": "PANAMERICANO",
+    "SAPIRANGA COITE": "SAPIRANGA",
+    "COITE": "SAPIRANGA",
+    "TAUAPE": "SAO JOAO DO TAUAPE",
+    "JOSE WALTER": "PREFEITO JOSE WALTER",
+    "CONJUNTO JOSE WALTER": "PREFEITO JOSE WALTER",
+    "AYRTON SENNA": "PLANALTO AYRTON SENNA",
+    "LUCIANO CAVALCANTE": "ENGENHEIRO LUCIANO CAVALCANTE",
+    "JOAO 23": "JOAO XXIII",
+    "JOQUEI": "JOQUEI CLUBE",
+    "PRESIDENTE VARGAS": "PARQUE PRESIDENTE VARGAS",
+    "MANOEL DIAS BRANCO": "MANUEL DIAS BRANCO",
+    "DEMOCRITO": "DEMOCRITO ROCHA",
+    "PARQUE GENIBAU": "GENIBAU",
+}
+
+
+def _sem_acentos_maiusculo(nome) -> str:
+    texto = unicodedata.normalize("NFKD", str(nome))
+    texto = "".join(c for c in texto if not unicodedata.combining(c))
+    texto = re.sub(r"[^0-9A-Za-z]+", " ", texto)
+    return " ".join(texto.upper().split())
+
+
+def normalizar_nome_bairro(nome) -> str:
+    """
+    Remove acentos, pontuação e espaços extras, passa para maiúsculas, expande
+    abreviações e resolve apelidos conhecidos
+    (ex: "Vl. Manoel Sátiro" -> "VILA MANOEL SATIRO", "Pq. Genibaú" -> "PARQUE GENIBAU")
+    """
+    if nome is None:
+        return ""
+    palavras = [ABREVIACOES.get(palavra, palavra) for palavra in _sem_acentos_maiusculo(nome).split()]
+    if len(palavras) > 1 and palavras[-1] in NUMERAIS_FINAIS:
+        palavras[-1] = NUMERAIS_FINAIS[palavras[-1]]
+    texto = " ".join(palavras)
+    return ALIASES_BAIRROS.get(texto, texto)
+
+
+AIS_POR_BAIRRO: Dict[str, int] = {
+    normalizar_nome_bairro(bairro): ais
+    for ais, bairros in BAIRROS_POR_AIS.items()
+    for bairro in bairros
+}
+
+
+def ais_do_bairro(nome) -> Optional[int]:
+    """
+    Número da AIS do bairro, ou None se o nome não for reconhecido
+    """
+    return AIS_POR_BAIRRO.get(normalizar_nome_bairro(nome))
+
+
+class IndiceNomesBairros:
+    """
+    Resolve nomes de bairro escritos de qualquer jeito para o id da tabela 'bairros'
+
+    Cada texto distinto é normalizado uma única vez e guardado, então resolver
+    milhões de células com poucas grafias diferentes custa só consultas a dicionário.
+    """
+
+    def __init__(self, pares: Iterable[Tuple[int, str]]):
+        self.id_por_nome: Dict[str, int] = {}
+        for bairro_id, nome in pares:
+            self.id_por_nome.setdefault(normalizar_nome_bairro(nome), bairro_id)
+        self._resolvidos: Dict[str, Optional[int]] = {}
+
+    def resolver(self, nome) -> Optional[int]:
+        """
+        Id do bairro, ou None para textos vazios ou não reconhecidos
+        """
+        if nome is None:
+            return None
+        texto = str(nome)
+        if texto not in self._resolvidos:
+            self._resolvidos[texto] = self.id_por_nome.get(normalizar_nome_bairro(texto))
+        return self._resolvidos[texto]
+
+    def resolver_em_lote(self, nomes: Iterable) -> List[Optional[int]]:
+        return [self.resolver(nome) for nome in nomes]
+
+    def nao_reconhecidos(self) -> List[str]:
+        """
+        Textos já consultados que não casaram com nenhum bairro (para revisar apelidos)
+        """
+        return sorted(texto for texto, bairro_id in self._resolvidos.items() if bairro_id is None and texto.strip())
@@ -0,0 +1,38 @@
+"""Bounding-box query parameters shared by the listing endpoints."""
+
+from __future__ import annotations
+
+from typing import Tuple
+
+from fastapi import HTTPException, status
+from geoalchemy2 import Geography
+from sqlalchemy import cast, func
+
+BBOX_FORMAT = "min_lng,min_lat,max_lng,max_lat"
+
+Bounds = Tuple[float, float, float, float]
+
+
+def check_bounds(min_longitude: float, min_latitude: float, max_longitude: float, max_latitude: float) -> Bounds:
+    """Reject boxes outside WGS84 ranges or with a min above its max (400)."""
+
+    if not (-90 <= min_latitude <= max_latitude <= 90 and -180 <= min_longitude <= max_longitude <= 180):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Caixa delimitadora inválida")
+    return min_longitude, min_latitude, max_longitude, max_latitude
+
+
+def parse_bbox(bbox: str) -> Bounds:
+    """``(min_lng, min_lat, max_lng, max_lat)`` from a ``bbox`` query value, checked with :func:`check_bounds`."""
+
+    try:
+        min_longitude, min_latitude, max_longitude, max_latitude = (float(value) for value in bbox.split(","))
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"bbox deve ser {BBOX_FORMAT}")
+    return check_bounds(min_longitude, min_latitude, max_longitude, max_latitude)
+
+
+def intersects_bbox(location, bounds: Bounds):
+    """``ST_Intersects`` of a geography column with the box (uses its GiST index)."""
+
+    envelope = func.ST_MakeEnvelope(*bounds, 4326)
+    return func.ST_Intersects(location, cast(envelope, Geography(srid=4326)))
@@ -0,0 +1,139 @@
+"""Cache dos candidatos do corredor de ``/safety/route`` por origem e destino aproximados.
+
+A chave é o par de células de ``TAMANHO_CELULA_M`` que contêm a origem e o
+destino, junto com o raio e a versão do inventário (geração das camadas de
+câmeras e iluminação). O valor guardado não depende das coordenadas de quem
+pediu: são só as câmeras e os pontos de iluminação a até ``raio + meia
+diagonal da célula`` da reta entre os centros das duas células. Para qualquer
+origem e destino dentro dessas células, o corredor exato está contido nesse
+alcance, então cada pedido refaz os segmentos e a correspondência exata com as
+próprias coordenadas, só que contra um punhado de candidatos. Os valores ficam
+num LRU de até ``CAPACIDADE`` entradas, cada uma válida por ``VALIDADE_S``
+segundos.
+
+Cada entrada é indexada pelas células de ``TAMANHO_CELULA_INDICE_M`` que o
+seu alcance (retângulo envolvente mais a margem) toca. Um ponto novo invalida
+só as entradas indexadas na célula dele; o resto do cache continua valendo.
+"""
+
+from __future__ import annotations
+
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Hashable, Optional, Set, Tuple
+
+from .projecao import desprojetar, projetar
+
+TAMANHO_CELULA_M = 100.0
+TAMANHO_CELULA_INDICE_M = 1000.0
+CAPACIDADE = 2048
+VALIDADE_S = 600.0
+
+
+def celula(latitude: float, longitude: float, tamanho_m: float = TAMANHO_CELULA_M) -> Tuple[int, int]:
+    x, y = projetar(latitude, longitude)
+    return math.floor(x / tamanho_m), math.floor(y / tamanho_m)
+
+
+def centro_da_celula(celula_xy: Tuple[int, int], tamanho_m: float = TAMANHO_CELULA_M) -> Tuple[float, float]:
+    """``(latitude, longitude)`` do centro da célula."""
+
+    latitude, longitude = desprojetar((celula_xy[0] + 0.5) * tamanho_m, (celula_xy[1] + 0.5) * tamanho_m)
+    return float(latitude), float(longitude)
+
+
+def alcance_dos_candidatos(raio_m: float, tamanho_m: float = TAMANHO_CELULA_M) -> float:
+    """Raio em torno da reta entre os centros que cobre o corredor de qualquer par de pontos das células.
+
+    Cada ponto da reta entre origem e destino fica a no máximo meia diagonal
+    da célula do ponto correspondente da reta entre os centros; 1 m a mais
+    absorve o arredondamento da projeção.
+    """
+
+    return raio_m + tamanho_m * math.sqrt(2) / 2 + 1.0
+
+
+def celulas_do_corredor(latitudes, longitudes, raio_m: float) -> Set[Tuple[int, int]]:
+    """Células do índice que tocam o retângulo envolvente do caminho, ampliado em ``raio_m``."""
+
+    x, y = projetar(latitudes, longitudes)
+    colunas = range(math.floor((x.min() - raio_m) / TAMANHO_CELULA_INDICE_M),
+                    math.floor((x.max() + raio_m) / TAMANHO_CELULA_INDICE_M) + 1)
+    linhas = range(math.floor((y.min() - raio_m) / TAMANHO_CELULA_INDICE_M),
+                   math.floor((y.max() + raio_m) / TAMANHO_CELULA_INDICE_M) + 1)
+    return {(cx, cy) for cx in colunas for cy in linhas}
+
+
+class CacheDeRotas:
+    """LRU com validade, invalidável por célula."""
+
+    def __init__(self, capacidade: int = CAPACIDADE, validade_s: float = VALIDADE_S):
+        self.capacidade = capacidade
+        self.validade_s = validade_s
+        self._trava = threading.Lock()
+        # chave -> (valor, expira_em, células do índice)
+        self._entradas: "OrderedDict[Hashable, Tuple[object, float, Set[Tuple[int, int]]]]" = OrderedDict()
+        self._por_celula: Dict[Tuple[int, int], Set[Hashable]] = {}
+        # Conta as invalidações: uma rota calculada enquanto um ponto entrava não é guardada.
+        self._invalidacoes = 0
+
+    def __len__(self) -> int:
+        return len(self._entradas)
+
+    def _remover(self, chave: Hashable) -> None:
+        _, _, celulas = self._entradas.pop(chave)
+        for celula_xy in celulas:
+            chaves = self._por_celula.get(celula_xy)
+            if chaves is not None:
+                chaves.discard(chave)
+                if not chaves:
+                    del self._por_celula[celula_xy]
+
+    def obter(self, chave: Hashable) -> Optional[object]:
+        with self._trava:
+            entrada = self._entradas.get(chave)
+            if entrada is None:
+                return None
+            if entrada[1] <= time.monotonic():
+                self._remover(chave)
+                return None
+            self._entradas.move_to_end(chave)
+            return entrada[0]
+
+    def marca(self) -> int:
+        """Marca a tomar antes de calcular o valor e passar a :meth:`guardar`."""
+
+        return self._invalidacoes
+
+    def guardar(self, chave: Hashable, valor: object, celulas: Set[Tuple[int, int]], marca: int) -> None:
+        with self._trava:
+            if marca != self._invalidacoes:
+                return
+            if chave in self._entradas:
+                self._remover(chave)
+            self._entradas[chave] = (valor, time.monotonic() + self.validade_s, celulas)
+            for celula_xy in celulas:
+                self._por_celula.setdefault(celula_xy, set()).add(chave)
+            while len(self._entradas) > self.capacidade:
+                self._remover(next(iter(self._entradas)))
+
+    def invalidar_ponto(self, latitude: float, longitude: float) -> int:
+        """Descarta as entradas cujo corredor pode conter o ponto; devolve quantas saíram."""
+
+        with self._trava:
+            self._invalidacoes += 1
+            chaves = list(self._por_celula.get(celula(latitude, longitude, TAMANHO_CELULA_INDICE_M), ()))
+            for chave in chaves:
+                self._remover(chave)
+            return len(chaves)
+
+    def limpar(self) -> None:
+        with self._trava:
+            self._invalidacoes += 1
+            self._entradas.clear()
+            self._por_celula.clear()
+
+
+cache_de_rotas = CacheDeRotas()
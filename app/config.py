@@ -24,6 +24,28 @@ class Settings(BaseSettings):
         description="Maximum number of hours allowed between confirmations.",
         ge=1,
     )
+    tiles_cache_dir: str = Field(
+        default="data/cache/tiles",
+        description="Directory where generated vector tiles are cached, one subfolder per data version.",
+    )
+    risk_surface_dir: str = Field(
+        default="data/cache/risco",
+        description="Directory where precomputed KDE risk surfaces are stored, one file per events version.",
+    )
+
+    analysis_engine: str = Field(
+        default="arquivos",
+        description="Engine for the per-bairro reports: 'arquivos' joins the flat files in memory, "
+        "'postgis' counts eventos_seguranca inside the database.",
+        regex="^(arquivos|postgis)$",
+    )
+
+    safety_engine: str = Field(
+        default="memoria",
+        description="Backend for /safety/route: 'memoria' uses the in-process point store, "
+        "'postgis' filters cameras and lighting with ST_DWithin in the database.",
+        regex="^(memoria|postgis)$",
+    )
 
     @root_validator
     def _validate_guardian_intervals(cls, values: dict) -> dict:
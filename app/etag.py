@@ -0,0 +1,21 @@
+"""Conditional GET helpers shared by ``main`` and the routers."""
+
+from __future__ import annotations
+
+from typing import Optional
+
+
+def etag_confere(if_none_match: Optional[str], etag: str) -> bool:
+    """Apply the (weak) If-None-Match comparison from RFC 9110."""
+
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    for candidato in if_none_match.split(","):
+        candidato = candidato.strip()
+        if candidato.startswith("W/"):
+            candidato = candidato[2:]
+        if candidato == etag:
+            return True
+    return False
@@ -0,0 +1,166 @@
+"""Grade de cobertura de câmeras e iluminação sobre Fortaleza.
+
+Cada célula de ``TAMANHO_CELULA_M`` guarda quantas câmeras e quantos pontos
+de iluminação estão a até ``raio_m`` do seu centro. Pontos novos são
+carimbados com um disco pré-calculado, então acrescentar um ponto custa só o
+disco; a carga inicial (muitos pontos) vira histograma mais convolução FFT.
+A cobertura num lugar qualquer é uma leitura de célula, independente do
+tamanho do inventário.
+
+As grades são derivadas das camadas em memória de ``pontos_seguranca``: a
+cada acesso, os pontos que entraram na camada desde o último carimbo são
+carimbados; se a camada foi recarregada do banco, a grade é refeita. Há uma
+grade por raio (arredondado para múltiplos da célula).
+"""
+
+from __future__ import annotations
+
+import math
+import threading
+from collections import OrderedDict
+from typing import Dict, Tuple
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from .models import Camera, LightingSpot
+from .pontos_seguranca import CamadaDePontos, Segmentos, obter_camada, segmentar_pernas
+from .projecao import projetar
+from .superficie_risco import convolver, limites_de_fortaleza
+
+TAMANHO_CELULA_M = 50.0
+MARGEM_M = 2000.0
+MAXIMO_GRADES = 8
+# Acima de tantos (pontos x células do disco), carimbar vira histograma + convolução FFT.
+LIMITE_CARIMBO_DIRETO = 1_000_000
+
+
+def _disco(raio_m: float, tamanho_m: float) -> np.ndarray:
+    """Máscara quadrada das células cujo centro fica a até ``raio_m`` do centro da célula do meio."""
+
+    alcance = int(math.ceil(raio_m / tamanho_m))
+    passos = np.arange(-alcance, alcance + 1)
+    return np.hypot(passos[:, None], passos[None, :]) * tamanho_m <= raio_m
+
+
+class GradeCobertura:
+    """Contagens de câmeras e de iluminação ao alcance de ``raio_m`` de cada célula."""
+
+    def __init__(self, raio_m: float, limites: Tuple[float, float, float, float], tamanho_m: float = TAMANHO_CELULA_M):
+        oeste, sul, leste, norte = limites
+        self.raio_m = raio_m
+        self.tamanho_m = tamanho_m
+        (self.x0, self.x1), (self.y0, self.y1) = projetar([sul, norte], [oeste, leste])
+        self.linhas = int(math.ceil((self.y1 - self.y0) / tamanho_m))
+        self.colunas = int(math.ceil((self.x1 - self.x0) / tamanho_m))
+        self.contagens: Dict[type, np.ndarray] = {}
+        # Por modelo: a camada de origem e quantos dos seus pontos já foram carimbados.
+        self.origens: Dict[type, Tuple[CamadaDePontos, int]] = {}
+        self._disco = _disco(raio_m, tamanho_m)
+
+    def _indices(self, latitudes, longitudes) -> Tuple[np.ndarray, np.ndarray]:
+        x, y = projetar(latitudes, longitudes)
+        return (
+            np.floor((y - self.y0) / self.tamanho_m).astype("int64"),
+            np.floor((x - self.x0) / self.tamanho_m).astype("int64"),
+        )
+
+    def carimbar(self, modelo, latitudes, longitudes) -> None:
+        """Soma o disco de cada ponto à grade de ``modelo``; pontos fora da grade são ignorados."""
+
+        grade = self.contagens.setdefault(modelo, np.zeros((self.linhas, self.colunas), dtype="int32"))
+        i, j = self._indices(latitudes, longitudes)
+        dentro = (i >= 0) & (i < self.linhas) & (j >= 0) & (j < self.colunas)
+        i, j = i[dentro], j[dentro]
+        if len(i) == 0:
+            return
+
+        if len(i) * self._disco.sum() > LIMITE_CARIMBO_DIRETO:
+            pontos_por_celula = np.zeros(grade.shape)
+            np.add.at(pontos_por_celula, (i, j), 1)
+            grade += np.rint(convolver(pontos_por_celula, self._disco.astype("float64"))).astype("int32")
+            return
+
+        alcance = self._disco.shape[0] // 2
+        di, dj = np.nonzero(self._disco)
+        linhas = (i[:, None] + (di - alcance)[None, :]).ravel()
+        colunas = (j[:, None] + (dj - alcance)[None, :]).ravel()
+        na_grade = (linhas >= 0) & (linhas < self.linhas) & (colunas >= 0) & (colunas < self.colunas)
+        np.add.at(grade, (linhas[na_grade], colunas[na_grade]), 1)
+
+    def sincronizar(self, modelo, camada: CamadaDePontos) -> None:
+        """Carimba os pontos novos de ``camada``; refaz a grade do modelo se a camada for outra."""
+
+        latitudes, longitudes = camada.coordenadas()
+        origem, carimbados = self.origens.get(modelo, (None, 0))
+        if origem is not camada or carimbados > len(latitudes):
+            self.contagens.pop(modelo, None)
+            carimbados = 0
+        self.carimbar(modelo, latitudes[carimbados:], longitudes[carimbados:])
+        self.origens[modelo] = (camada, len(latitudes))
+
+    def amostrar(self, modelo, latitudes, longitudes) -> np.ndarray:
+        """Contagem de ``modelo`` ao alcance de cada ponto (0 fora da grade)."""
+
+        grade = self.contagens.get(modelo)
+        i, j = self._indices(latitudes, longitudes)
+        if grade is None:
+            return np.zeros(len(i), dtype="int32")
+        dentro = (i >= 0) & (i < self.linhas) & (j >= 0) & (j < self.colunas)
+        return np.where(dentro, grade[np.where(dentro, i, 0), np.where(dentro, j, 0)], 0)
+
+    def contagens_nos_segmentos(self, segmentos: Segmentos) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Amostra a grade a cada célula ao longo dos segmentos.
+
+        Devolve ``(segmento, comprimento, câmeras, iluminação)`` por amostra,
+        para a média ponderada por comprimento de cada segmento.
+        """
+
+        pedacos, segmento = segmentar_pernas(
+            segmentos.latitudes_inicio,
+            segmentos.longitudes_inicio,
+            segmentos.latitudes_fim,
+            segmentos.longitudes_fim,
+            self.tamanho_m,
+        )
+        latitudes = (pedacos.latitudes_inicio + pedacos.latitudes_fim) / 2
+        longitudes = (pedacos.longitudes_inicio + pedacos.longitudes_fim) / 2
+        return (
+            segmento,
+            pedacos.comprimentos_m,
+            self.amostrar(Camera, latitudes, longitudes),
+            self.amostrar(LightingSpot, latitudes, longitudes),
+        )
+
+
+# --- Grades compartilhadas do processo ---
+
+_grades: "OrderedDict[float, GradeCobertura]" = OrderedDict()
+_trava_grades = threading.Lock()
+
+
+def raio_da_grade(raio_m: float) -> float:
+    return max(TAMANHO_CELULA_M, round(raio_m / TAMANHO_CELULA_M) * TAMANHO_CELULA_M)
+
+
+def obter_grade(session: Session, raio_m: float) -> GradeCobertura:
+    """Grade para ``raio_m`` (arredondado à célula), em dia com as camadas de câmeras e iluminação."""
+
+    raio = raio_da_grade(raio_m)
+    camadas = {modelo: obter_camada(session, modelo) for modelo in (Camera, LightingSpot)}
+    with _trava_grades:
+        grade = _grades.get(raio)
+        if grade is None:
+            grade = GradeCobertura(raio, limites_de_fortaleza(MARGEM_M))
+            _grades[raio] = grade
+            while len(_grades) > MAXIMO_GRADES:
+                _grades.popitem(last=False)
+        _grades.move_to_end(raio)
+        for modelo, camada in camadas.items():
+            grade.sincronizar(modelo, camada)
+        return grade
+
+
+def limpar_grades() -> None:
+    with _trava_grades:
+        _grades.clear()
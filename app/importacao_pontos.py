@@ -0,0 +1,185 @@
+"""Importação em lote de câmeras e pontos de iluminação a partir de CSV ou GeoJSON.
+
+O arquivo é lido em lotes de ``TAMANHO_LOTE`` registros. Cada lote é validado
+de uma vez com pandas (nome, faixas de latitude/longitude), e os registros
+válidos entram com um único INSERT de várias linhas por lote. Os inválidos
+não interrompem a importação: voltam no resultado com o número do registro e
+o motivo.
+
+CSV: colunas ``name``, ``description``, ``latitude``, ``longitude`` (aceita
+também ``nome``, ``descricao``, ``lat``, ``lng``/``lon``). GeoJSON: uma
+FeatureCollection de pontos com ``name``/``description`` nas propriedades.
+"""
+
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass, field
+from typing import IO, Dict, Iterator, List, Tuple
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+FORMATO_CSV = "csv"
+FORMATO_GEOJSON = "geojson"
+FORMATOS = (FORMATO_CSV, FORMATO_GEOJSON)
+
+TAMANHO_LOTE = 5000
+MAXIMO_ERROS_LISTADOS = 1000
+COMPRIMENTO_MAXIMO_NOME = 255
+
+COLUNAS = ("name", "description", "latitude", "longitude")
+ALIASES_COLUNAS = {
+    "nome": "name",
+    "descricao": "description",
+    "descrição": "description",
+    "lat": "latitude",
+    "lng": "longitude",
+    "lon": "longitude",
+}
+
+
+@dataclass
+class ResultadoImportacao:
+    inseridos: int = 0
+    rejeitados: int = 0
+    erros: List[Dict[str, object]] = field(default_factory=list)
+    erros_truncados: bool = False
+
+    def registrar_erros(self, erros: List[Dict[str, object]]) -> None:
+        self.rejeitados += len(erros)
+        vagas = MAXIMO_ERROS_LISTADOS - len(self.erros)
+        self.erros.extend(erros[:vagas])
+        self.erros_truncados = self.erros_truncados or len(erros) > vagas
+
+
+def _padronizar_colunas(lote: pd.DataFrame) -> pd.DataFrame:
+    nomes = {coluna: ALIASES_COLUNAS.get(coluna.strip().lower(), coluna.strip().lower()) for coluna in lote.columns}
+    lote = lote.rename(columns=nomes)
+    for coluna in COLUNAS:
+        if coluna not in lote.columns:
+            lote[coluna] = None
+    return lote[list(COLUNAS)]
+
+
+def ler_lotes_csv(arquivo: IO, tamanho_lote: int = TAMANHO_LOTE) -> Iterator[pd.DataFrame]:
+    for lote in pd.read_csv(arquivo, chunksize=tamanho_lote, dtype=str, keep_default_na=False):
+        yield _padronizar_colunas(lote)
+
+
+def ler_lotes_geojson(arquivo: IO, tamanho_lote: int = TAMANHO_LOTE) -> Iterator[pd.DataFrame]:
+    """Lotes de uma FeatureCollection; feições que não são ``Point`` ficam sem coordenadas (e são rejeitadas)."""
+
+    try:
+        dados = json.load(arquivo)
+    except json.JSONDecodeError as exc:
+        raise ValueError(f"GeoJSON inválido: {exc}") from exc
+    if not isinstance(dados, dict) or dados.get("type") != "FeatureCollection":
+        raise ValueError("O GeoJSON deve ser uma FeatureCollection")
+
+    feicoes = dados.get("features") or []
+    for inicio in range(0, len(feicoes), tamanho_lote):
+        linhas = []
+        for feicao in feicoes[inicio: inicio + tamanho_lote]:
+            feicao = feicao if isinstance(feicao, dict) else {}
+            propriedades = feicao.get("properties") or {}
+            geometria = feicao.get("geometry") or {}
+            coordenadas = geometria.get("coordinates") if geometria.get("type") == "Point" else None
+            longitude, latitude = (coordenadas[:2] if isinstance(coordenadas, list) and len(coordenadas) >= 2
+                                   else (None, None))
+            linhas.append({**propriedades, "latitude": latitude, "longitude": longitude})
+        yield _padronizar_colunas(pd.DataFrame(linhas, columns=None if linhas else list(COLUNAS)))
+
+
+def ler_lotes(arquivo: IO, formato: str, tamanho_lote: int = TAMANHO_LOTE) -> Iterator[pd.DataFrame]:
+    if formato == FORMATO_GEOJSON:
+        return ler_lotes_geojson(arquivo, tamanho_lote)
+    return ler_lotes_csv(arquivo, tamanho_lote)
+
+
+def validar_lote(lote: pd.DataFrame, primeiro_registro: int) -> Tuple[pd.DataFrame, List[Dict[str, object]]]:
+    """Separa os registros válidos dos inválidos; só o primeiro problema de cada registro é relatado.
+
+    ``primeiro_registro`` é o número (a partir de 1) do primeiro registro do
+    lote no arquivo, usado nas mensagens de erro.
+    """
+
+    nomes = lote["name"].fillna("").astype(str).str.strip()
+    descricoes = lote["description"].fillna("").astype(str).str.strip()
+    latitudes = pd.to_numeric(lote["latitude"], errors="coerce")
+    longitudes = pd.to_numeric(lote["longitude"], errors="coerce")
+
+    motivos = np.full(len(lote), "", dtype=object)
+    for invalido, motivo in (
+        (nomes == "", "nome ausente"),
+        (nomes.str.len() > COMPRIMENTO_MAXIMO_NOME, f"nome com mais de {COMPRIMENTO_MAXIMO_NOME} caracteres"),
+        (latitudes.isna(), "latitude ausente ou não numérica"),
+        (longitudes.isna(), "longitude ausente ou não numérica"),
+        (~latitudes.between(-90, 90) & latitudes.notna(), "latitude fora do intervalo -90..90"),
+        (~longitudes.between(-180, 180) & longitudes.notna(), "longitude fora do intervalo -180..180"),
+    ):
+        motivos = np.where(invalido.to_numpy() & (motivos == ""), motivo, motivos)
+
+    rejeitados = np.flatnonzero(motivos != "")
+    erros = [{"row": primeiro_registro + int(posicao), "error": motivos[posicao]} for posicao in rejeitados]
+    validos = motivos == ""
+    return (
+        pd.DataFrame(
+            {
+                "name": nomes[validos].to_numpy(),
+                "description": descricoes[validos].to_numpy(),
+                "latitude": latitudes[validos].to_numpy(),
+                "longitude": longitudes[validos].to_numpy(),
+            }
+        ),
+        erros,
+    )
+
+
+def inserir_lote(session: Session, modelo, validos: pd.DataFrame) -> int:
+    """Um INSERT de várias linhas para o lote; ``location`` vai como EWKT."""
+
+    if validos.empty:
+        return 0
+    linhas = [
+        {
+            "name": nome,
+            "description": descricao or None,
+            "latitude": float(latitude),
+            "longitude": float(longitude),
+            "location": f"SRID=4326;POINT({longitude} {latitude})",
+        }
+        for nome, descricao, latitude, longitude in validos.itertuples(index=False, name=None)
+    ]
+    session.execute(insert(modelo), linhas)
+    return len(linhas)
+
+
+def importar_pontos(
+    session: Session,
+    modelo,
+    arquivo: IO,
+    formato: str = FORMATO_CSV,
+    tamanho_lote: int = TAMANHO_LOTE,
+) -> ResultadoImportacao:
+    """Importa ``arquivo`` na tabela de ``modelo`` (``Camera`` ou ``LightingSpot``) numa única transação.
+
+    Erros de validação só descartam o registro; erros do banco desfazem tudo
+    e são propagados.
+    """
+
+    resultado = ResultadoImportacao()
+    proximo_registro = 1
+    try:
+        for lote in ler_lotes(arquivo, formato, tamanho_lote):
+            validos, erros = validar_lote(lote, proximo_registro)
+            proximo_registro += len(lote)
+            resultado.registrar_erros(erros)
+            resultado.inseridos += inserir_lote(session, modelo, validos)
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+    return resultado
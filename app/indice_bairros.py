@@ -0,0 +1,459 @@
+"""Índice espacial dos bairros de Fortaleza mantido em memória no processo.
+
+O GeoJSON oficial dos bairros é lido uma única vez, convertido para 2D e
+guardado junto de uma STRtree com as geometrias preparadas. O índice só é
+reconstruído quando o hash do arquivo de origem muda.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Tuple
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import shapely
+from pyproj import Transformer
+from shapely import STRtree
+
+from .banco_de_dados.referencia_bairros import ais_do_bairro
+
+
+CAMINHO_BAIRROS = os.path.join("data", "Bairros final.geojson")
+
+# O GeoJSON vem em EPSG:4979 (WGS 84 3D); sem a coordenada Z ele é EPSG:4326.
+CRS_INDICE = "EPSG:4326"
+
+
+@dataclass(frozen=True)
+class NivelSimplificacao:
+    """Nível de detalhe pré-calculado das geometrias dos bairros."""
+
+    nome: str
+    tolerancia: float  # em graus
+    casas_decimais: int
+    zoom_maximo: int
+
+
+# Do mais grosseiro para o mais fino. 0.0001° ~ 11 m no equador; as casas
+# decimais acompanham a tolerância para não enviar precisão que não existe.
+NIVEIS_SIMPLIFICACAO = (
+    NivelSimplificacao("cidade", tolerancia=0.0005, casas_decimais=4, zoom_maximo=11),
+    NivelSimplificacao("regiao", tolerancia=0.0001, casas_decimais=5, zoom_maximo=13),
+    NivelSimplificacao("bairro", tolerancia=0.00002, casas_decimais=6, zoom_maximo=15),
+)
+NIVEL_ORIGINAL = "original"
+
+# Lado das células da grade de aceleração de ``localizar`` (~110 m).
+PASSO_GRADE_GRAUS = 0.001
+_CELULA_MISTA = -2
+
+
+def nivel_para_zoom(zoom: int) -> str:
+    """Escolhe o nível de simplificação adequado a um zoom de mapa web."""
+
+    for nivel in NIVEIS_SIMPLIFICACAO:
+        if zoom <= nivel.zoom_maximo:
+            return nivel.nome
+    return NIVEL_ORIGINAL
+
+
+def nivel_para_tolerancia(tolerancia: float) -> str:
+    """Escolhe o nível mais simplificado cuja tolerância não excede a pedida."""
+
+    for nivel in NIVEIS_SIMPLIFICACAO:
+        if nivel.tolerancia <= tolerancia:
+            return nivel.nome
+    return NIVEL_ORIGINAL
+
+
+def simplificar_geometrias(geometrias: np.ndarray, nivel: NivelSimplificacao) -> np.ndarray:
+    """Simplifica os polígonos preservando as fronteiras compartilhadas.
+
+    ``coverage_simplify`` trata o conjunto como uma cobertura, então bairros
+    vizinhos continuam encaixados sem frestas nem sobreposições. Depois as
+    coordenadas são ajustadas à grade do nível e arredondadas para que o JSON
+    não carregue casas decimais espúrias.
+    """
+
+    if hasattr(shapely, "coverage_simplify"):
+        simplificadas = shapely.coverage_simplify(geometrias, nivel.tolerancia)
+    else:  # GEOS < 3.12
+        simplificadas = shapely.simplify(geometrias, nivel.tolerancia, preserve_topology=True)
+
+    simplificadas = shapely.set_precision(simplificadas, 10.0 ** -nivel.casas_decimais)
+    return shapely.transform(simplificadas, lambda coords: np.round(coords, nivel.casas_decimais))
+
+
+def calcular_hash_arquivo(caminho: str, tamanho_bloco: int = 1 << 20) -> str:
+    """Calcula o SHA-256 do conteúdo de um arquivo lendo em blocos."""
+
+    digest = hashlib.sha256()
+    with open(caminho, "rb") as arquivo:
+        for bloco in iter(lambda: arquivo.read(tamanho_bloco), b""):
+            digest.update(bloco)
+    return digest.hexdigest()
+
+
+_hashes_por_arquivo: Dict[str, Tuple[Tuple[int, int], str]] = {}
+_trava_hashes = threading.Lock()
+
+
+def hash_arquivo(caminho: str) -> str:
+    """Retorna o SHA-256 de um arquivo, recalculando só se tamanho ou mtime mudarem."""
+
+    estado = os.stat(caminho)
+    assinatura = (estado.st_size, estado.st_mtime_ns)
+    chave = os.path.abspath(caminho)
+    memorizado = _hashes_por_arquivo.get(chave)
+    if memorizado is not None and memorizado[0] == assinatura:
+        return memorizado[1]
+
+    valor = calcular_hash_arquivo(caminho)
+    with _trava_hashes:
+        _hashes_por_arquivo[chave] = (assinatura, valor)
+    return valor
+
+
+@dataclass
+class IndiceBairros:
+    """Polígonos dos bairros em 2D com STRtree para consultas ponto-em-polígono."""
+
+    caminho: str
+    hash_origem: str
+    bairros: gpd.GeoDataFrame
+    arvore: STRtree = field(repr=False)
+    geometrias_por_nivel: Dict[str, np.ndarray] = field(default_factory=dict, repr=False)
+    # AIS de cada bairro na ordem de ``bairros``; 0 quando o nome não é reconhecido.
+    ais: np.ndarray = field(default_factory=lambda: np.empty(0, dtype="int64"), repr=False)
+    # Grade regular sobre os bairros: cada célula guarda o bairro que a contém
+    # por inteiro, -1 se não toca nenhum, ou -2 se cruza alguma fronteira.
+    grade: Optional[np.ndarray] = field(default=None, repr=False)
+    origem_grade: Tuple[float, float] = (0.0, 0.0)
+    # Envelope (oeste, sul, leste, norte) de cada bairro, na ordem de ``bairros``.
+    caixas: np.ndarray = field(default_factory=lambda: np.empty((0, 4)), repr=False)
+    _transformadores: dict = field(default_factory=dict, repr=False)
+
+    @property
+    def nomes(self) -> np.ndarray:
+        return self.bairros["nome"].to_numpy()
+
+    @property
+    def geometrias(self) -> np.ndarray:
+        return np.asarray(self.bairros.geometry.values)
+
+    @property
+    def limites(self) -> Tuple[float, float, float, float]:
+        caixas = self.caixas
+        return (
+            float(caixas[:, 0].min()),
+            float(caixas[:, 1].min()),
+            float(caixas[:, 2].max()),
+            float(caixas[:, 3].max()),
+        )
+
+    def geometrias_no_nivel(self, nivel: str = NIVEL_ORIGINAL) -> np.ndarray:
+        """Geometrias dos bairros no nível de simplificação pedido."""
+
+        if nivel == NIVEL_ORIGINAL:
+            return self.geometrias
+        try:
+            return self.geometrias_por_nivel[nivel]
+        except KeyError:
+            raise ValueError(f"Nível de simplificação desconhecido: {nivel}") from None
+
+    def _transformador(self, crs_origem: str) -> Optional[Transformer]:
+        if crs_origem == CRS_INDICE:
+            return None
+        if crs_origem not in self._transformadores:
+            self._transformadores[crs_origem] = Transformer.from_crs(crs_origem, CRS_INDICE, always_xy=True)
+        return self._transformadores[crs_origem]
+
+    def localizar(self, longitudes, latitudes, crs: str = CRS_INDICE) -> np.ndarray:
+        """Retorna, para cada ponto, a posição do bairro que o contém (-1 se nenhum).
+
+        A consulta é vetorizada: a STRtree filtra os candidatos pelo envelope e
+        ``contains_xy`` confirma cada par usando os polígonos preparados.
+        """
+
+        longitudes = np.asarray(longitudes, dtype="float64")
+        latitudes = np.asarray(latitudes, dtype="float64")
+        transformador = self._transformador(crs)
+        if transformador is not None:
+            longitudes, latitudes = transformador.transform(longitudes, latitudes)
+
+        resultado = np.full(len(longitudes), -1, dtype="int64")
+        pendentes = np.isfinite(longitudes) & np.isfinite(latitudes)
+        if self.grade is not None:
+            # Pontos em células sem fronteira se resolvem por indexação; só os
+            # de células mistas vão para a STRtree.
+            linhas, colunas = self.grade.shape
+            oeste, sul = self.origem_grade
+            with np.errstate(invalid="ignore"):
+                i = np.floor((latitudes - sul) / PASSO_GRADE_GRAUS)
+                j = np.floor((longitudes - oeste) / PASSO_GRADE_GRAUS)
+            na_grade = pendentes & (i >= 0) & (i < linhas) & (j >= 0) & (j < colunas)
+            celulas = np.full(len(longitudes), -1, dtype="int64")
+            celulas[na_grade] = self.grade[i[na_grade].astype("int64"), j[na_grade].astype("int64")]
+            resultado = np.where(celulas >= 0, celulas, -1)
+            pendentes = na_grade & (celulas == _CELULA_MISTA)
+
+        if not pendentes.any():
+            return resultado
+
+        longitudes = longitudes[pendentes]
+        latitudes = latitudes[pendentes]
+        indices_pontos, indices_bairros = self.arvore.query(shapely.points(longitudes, latitudes))
+        dentro = shapely.contains_xy(
+            self.geometrias[indices_bairros],
+            longitudes[indices_pontos],
+            latitudes[indices_pontos],
+        )
+        indices_pontos = indices_pontos[dentro]
+        indices_bairros = indices_bairros[dentro]
+        posicoes_pendentes = np.flatnonzero(pendentes)
+        # Em fronteiras compartilhadas um ponto pode cair em dois polígonos;
+        # mantém o primeiro, como um sjoin seguido de contagem única faria.
+        _, primeiros = np.unique(indices_pontos, return_index=True)
+        resultado[posicoes_pendentes[indices_pontos[primeiros]]] = indices_bairros[primeiros]
+        return resultado
+
+    def contar(self, longitudes, latitudes, crs: str = CRS_INDICE) -> np.ndarray:
+        """Conta quantos pontos caem em cada bairro, na ordem de ``bairros``."""
+
+        posicoes = self.localizar(longitudes, latitudes, crs=crs)
+        return np.bincount(posicoes[posicoes >= 0], minlength=len(self.bairros))
+
+
+def construir_grade_de_aceleracao(geometrias: np.ndarray, arvore: STRtree) -> Tuple[np.ndarray, Tuple[float, float]]:
+    """Classifica as células da grade de ``localizar`` contra os polígonos.
+
+    Uma célula recebe a posição do bairro que a contém propriamente (sem tocar
+    a fronteira), -1 se não intersecta nenhum bairro e ``_CELULA_MISTA`` nos
+    demais casos.
+    """
+
+    oeste, sul, leste, norte = shapely.total_bounds(geometrias)
+    colunas = max(1, int(np.ceil((leste - oeste) / PASSO_GRADE_GRAUS)))
+    linhas = max(1, int(np.ceil((norte - sul) / PASSO_GRADE_GRAUS)))
+    i, j = np.divmod(np.arange(linhas * colunas), colunas)
+    caixas = shapely.box(
+        oeste + j * PASSO_GRADE_GRAUS,
+        sul + i * PASSO_GRADE_GRAUS,
+        oeste + (j + 1) * PASSO_GRADE_GRAUS,
+        sul + (i + 1) * PASSO_GRADE_GRAUS,
+    )
+
+    grade = np.full(linhas * colunas, -1, dtype="int64")
+    indices_caixas, indices_bairros = arvore.query(caixas, predicate="intersects")
+    grade[indices_caixas] = _CELULA_MISTA
+    inteiras = shapely.contains_properly(geometrias[indices_bairros], caixas[indices_caixas])
+    grade[indices_caixas[inteiras]] = indices_bairros[inteiras]
+    return grade.reshape(linhas, colunas), (float(oeste), float(sul))
+
+
+def _montar_indice(
+    caminho: str,
+    hash_origem: str,
+    atributos: pd.DataFrame,
+    geometrias: np.ndarray,
+    geometrias_por_nivel: Dict[str, np.ndarray],
+    grade: np.ndarray,
+    origem_grade: Tuple[float, float],
+    caixas: Optional[np.ndarray] = None,
+) -> IndiceBairros:
+    shapely.prepare(geometrias)
+    return IndiceBairros(
+        caminho=caminho,
+        hash_origem=hash_origem,
+        bairros=gpd.GeoDataFrame(atributos, geometry=geometrias, crs=CRS_INDICE),
+        arvore=STRtree(geometrias),
+        geometrias_por_nivel=geometrias_por_nivel,
+        ais=np.array([ais_do_bairro(nome) or 0 for nome in atributos["nome"]], dtype="int64"),
+        grade=grade,
+        origem_grade=origem_grade,
+        caixas=shapely.bounds(geometrias) if caixas is None else caixas,
+    )
+
+
+def construir_indice_bairros(caminho: str = CAMINHO_BAIRROS, hash_origem: Optional[str] = None) -> IndiceBairros:
+    """Lê o GeoJSON de bairros e monta o índice espacial."""
+
+    bairros_gdf = gpd.read_file(caminho)
+    # O arquivo mistura os polígonos com pontos de rótulo; só os polígonos
+    # delimitam bairros.
+    bairros_gdf = bairros_gdf[bairros_gdf.geom_type.isin(["Polygon", "MultiPolygon"])]
+    bairros_gdf = bairros_gdf.dropna(subset=["nome"]).reset_index(drop=True)
+
+    geometrias = shapely.force_2d(np.asarray(bairros_gdf.geometry.values))
+    geometrias = shapely.make_valid(geometrias)
+    grade, origem_grade = construir_grade_de_aceleracao(geometrias, STRtree(geometrias))
+
+    return _montar_indice(
+        caminho,
+        hash_origem or calcular_hash_arquivo(caminho),
+        pd.DataFrame(bairros_gdf.drop(columns="geometry")),
+        geometrias,
+        {nivel.nome: simplificar_geometrias(geometrias, nivel) for nivel in NIVEIS_SIMPLIFICACAO},
+        grade,
+        origem_grade,
+    )
+
+
+# --- Artefato binário do índice (partida a frio sem ler o GeoJSON) ---
+
+DIRETORIO_CACHE_BAIRROS = os.path.join("data", "cache", "bairros")
+# Aumente ao mudar o conteúdo do artefato; os parâmetros de simplificação e da
+# grade já entram na assinatura do nome do arquivo.
+VERSAO_FORMATO_CACHE = 1
+
+
+def _assinatura_parametros() -> str:
+    parametros = (VERSAO_FORMATO_CACHE, NIVEIS_SIMPLIFICACAO, PASSO_GRADE_GRAUS)
+    return hashlib.sha256(repr(parametros).encode("utf-8")).hexdigest()[:12]
+
+
+def caminho_cache_bairros(hash_origem: str, diretorio: str = DIRETORIO_CACHE_BAIRROS) -> str:
+    return os.path.join(diretorio, f"bairros_{hash_origem[:16]}_{_assinatura_parametros()}.npz")
+
+
+def _empacotar_wkb(geometrias: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    blobs = shapely.to_wkb(geometrias)
+    deslocamentos = np.cumsum([0] + [len(blob) for blob in blobs]).astype("int64")
+    return np.frombuffer(b"".join(blobs), dtype="uint8"), deslocamentos
+
+
+def _desempacotar_wkb(dados: np.ndarray, deslocamentos: np.ndarray) -> np.ndarray:
+    bruto = dados.tobytes()
+    return shapely.from_wkb([bruto[inicio:fim] for inicio, fim in zip(deslocamentos[:-1], deslocamentos[1:])])
+
+
+def salvar_indice_bairros(indice: IndiceBairros, caminho_cache: str) -> None:
+    """Grava o índice num ``.npz``: geometrias em WKB, caixas, grade e atributos.
+
+    Colunas numéricas vão como arrays; as de texto, num JSON com ``null`` para
+    valores ausentes. A escrita é atômica (arquivo temporário + ``os.replace``).
+    """
+
+    atributos = pd.DataFrame(indice.bairros.drop(columns="geometry"))
+    numericas = [c for c in atributos.columns if pd.api.types.is_numeric_dtype(atributos[c])]
+    textos = {
+        c: {"tipo": str(atributos[c].dtype), "valores": [None if pd.isna(v) else str(v) for v in atributos[c]]}
+        for c in atributos.columns
+        if c not in numericas
+    }
+
+    arrays = {
+        "colunas": np.array(json.dumps(list(atributos.columns))),
+        "textos": np.array(json.dumps(textos, ensure_ascii=False)),
+        "caixas": indice.caixas,
+        "grade": indice.grade,
+        "origem_grade": np.array(indice.origem_grade),
+    }
+    for posicao, coluna in enumerate(numericas):
+        arrays[f"numerica_{posicao}"] = atributos[coluna].to_numpy()
+    arrays["numericas"] = np.array(json.dumps(numericas))
+    for nome, geometrias in [(NIVEL_ORIGINAL, indice.geometrias)] + list(indice.geometrias_por_nivel.items()):
+        arrays[f"wkb_{nome}"], arrays[f"deslocamentos_{nome}"] = _empacotar_wkb(geometrias)
+
+    os.makedirs(os.path.dirname(caminho_cache) or ".", exist_ok=True)
+    temporario = f"{caminho_cache}.{os.getpid()}.tmp.npz"
+    np.savez(temporario, **arrays)
+    os.replace(temporario, caminho_cache)
+
+
+def carregar_indice_bairros(caminho_cache: str, caminho: str, hash_origem: str) -> IndiceBairros:
+    """Reconstrói o índice a partir do artefato gravado por ``salvar_indice_bairros``."""
+
+    with np.load(caminho_cache) as dados:
+        colunas = json.loads(str(dados["colunas"]))
+        numericas = json.loads(str(dados["numericas"]))
+        valores = {
+            coluna: pd.Series(texto["valores"], dtype=texto["tipo"])
+            for coluna, texto in json.loads(str(dados["textos"])).items()
+        }
+        valores.update({coluna: dados[f"numerica_{posicao}"] for posicao, coluna in enumerate(numericas)})
+        geometrias = _desempacotar_wkb(dados[f"wkb_{NIVEL_ORIGINAL}"], dados[f"deslocamentos_{NIVEL_ORIGINAL}"])
+        geometrias_por_nivel = {
+            nivel.nome: _desempacotar_wkb(dados[f"wkb_{nivel.nome}"], dados[f"deslocamentos_{nivel.nome}"])
+            for nivel in NIVEIS_SIMPLIFICACAO
+        }
+        grade = dados["grade"]
+        origem_grade = tuple(dados["origem_grade"].tolist())
+        caixas = dados["caixas"]
+
+    return _montar_indice(
+        caminho,
+        hash_origem,
+        pd.DataFrame({coluna: valores[coluna] for coluna in colunas}),
+        geometrias,
+        geometrias_por_nivel,
+        grade,
+        origem_grade,
+        caixas,
+    )
+
+
+def _carregar_ou_construir(caminho: str, hash_origem: str, diretorio_cache: Optional[str]) -> IndiceBairros:
+    if diretorio_cache is None:
+        return construir_indice_bairros(caminho, hash_origem=hash_origem)
+
+    caminho_cache = caminho_cache_bairros(hash_origem, diretorio_cache)
+    if os.path.exists(caminho_cache):
+        try:
+            return carregar_indice_bairros(caminho_cache, caminho, hash_origem)
+        except (OSError, ValueError, KeyError) as e:
+            print(f"!!! Cache de bairros ilegível ({caminho_cache}): {e}; reconstruindo !!!")
+
+    indice = construir_indice_bairros(caminho, hash_origem=hash_origem)
+    try:
+        salvar_indice_bairros(indice, caminho_cache)
+        for antigo in os.listdir(diretorio_cache):
+            if antigo.startswith("bairros_") and antigo.endswith(".npz") and antigo != os.path.basename(caminho_cache):
+                os.remove(os.path.join(diretorio_cache, antigo))
+    except OSError as e:
+        print(f"!!! Não foi possível gravar o cache de bairros: {e} !!!")
+    return indice
+
+
+_indice_atual: Optional[IndiceBairros] = None
+_trava = threading.Lock()
+
+
+def obter_indice_bairros(
+    caminho: str = CAMINHO_BAIRROS, diretorio_cache: Optional[str] = DIRETORIO_CACHE_BAIRROS
+) -> IndiceBairros:
+    """Retorna o índice compartilhado, reconstruindo-o só se o arquivo mudou.
+
+    O hash do arquivo só é recalculado quando tamanho ou data de modificação
+    mudam (ver ``hash_arquivo``), e o índice só é refeito se o hash mudou.
+    Nesse caso ele vem do artefato binário da versão em ``diretorio_cache``,
+    gerado na primeira vez a partir do GeoJSON (``None`` desliga o artefato).
+    """
+
+    global _indice_atual
+
+    hash_origem = hash_arquivo(caminho)
+    indice = _indice_atual
+    if indice is not None and indice.hash_origem == hash_origem and indice.caminho == caminho:
+        return indice
+
+    with _trava:
+        indice = _indice_atual
+        if indice is None or indice.hash_origem != hash_origem or indice.caminho != caminho:
+            _indice_atual = _carregar_ou_construir(caminho, hash_origem, diretorio_cache)
+        return _indice_atual
+
+
+def limpar_indice_bairros() -> None:
+    """Descarta o índice em memória; a próxima consulta o reconstrói."""
+
+    global _indice_atual
+
+    with _trava:
+        _indice_atual = None
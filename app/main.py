@@ -1,50 +1,100 @@
 import json
+from typing import Dict, List, Optional
 
-from fastapi import FastAPI, HTTPException, Response
+import pandas as pd
+from fastapi import FastAPI, HTTPException, Query, Request, Response
+from sqlalchemy.exc import SQLAlchemyError
 
 import app.analise as analise
-from .database import engine
+import app.analise_banco as analise_banco
+import app.tiles_vetoriais as tiles_vetoriais
+from .config import get_settings
+from .database import SessionLocal, engine
+from .etag import etag_confere
+from .indice_bairros import NIVEL_ORIGINAL, nivel_para_tolerancia, nivel_para_zoom, obter_indice_bairros
 from .models import Base
-from .routers import community, guardian, safety, users
+from .routers import bairros, community, guardian, heatmap, risk, safety, users
 
 
 app = FastAPI(title="Fortaleza Segura - Plataforma Integrada")
+settings = get_settings()
 
 
 @app.on_event("startup")
 def startup_event() -> None:
-    """Create database tables on startup."""
+    """Create database tables and warm the bairros spatial index on startup."""
 
     try:
         Base.metadata.create_all(bind=engine)
     except Exception as exc:  # pragma: no cover - startup guard
         print(f"Não foi possível criar as tabelas automaticamente: {exc}")
 
+    try:
+        obter_indice_bairros()
+    except Exception as exc:  # pragma: no cover - startup guard
+        print(f"Não foi possível carregar o índice de bairros: {exc}")
+
 
 @app.get("/")
 def read_root():
     return {"status": "API de emergência funcionando!"}
 
 
-@app.get("/analise_seguranca")
-def get_analise_seguranca():
-    """Retorna o GeoJSON completo com a contagem de ocorrências."""
+def _usa_postgis() -> bool:
+    return settings.analysis_engine == analise_banco.MOTOR_POSTGIS
 
-    resultado_analise = analise.realizar_analise_seguranca_de_arquivos()
-    if isinstance(resultado_analise, dict) and "error" in resultado_analise:
-        raise HTTPException(status_code=500, detail=resultado_analise["error"])
 
-    geojson_result = resultado_analise.to_json()
-    return Response(content=geojson_result, media_type="application/json")
+def _analise_atual(versao: str):
+    """Return the crime-per-bairro GeoDataFrame for ``versao``, computing it once."""
 
+    def gerar():
+        if _usa_postgis():
+            with SessionLocal() as session:
+                resultado_analise = analise_banco.realizar_analise_seguranca_do_banco(session)
+        else:
+            resultado_analise = analise.realizar_analise_seguranca_de_arquivos()
+        if isinstance(resultado_analise, dict) and "error" in resultado_analise:
+            raise HTTPException(status_code=500, detail=resultado_analise["error"])
+        return resultado_analise
+
+    return analise.obter_resultado_em_cache("analise", versao, gerar)
+
+
+def _versao_atual() -> str:
+    try:
+        if _usa_postgis():
+            with SessionLocal() as session:
+                return f"{analise_banco.MOTOR_POSTGIS}-{analise_banco.versao_dos_dados_do_banco(session)}"
+        return analise.versao_dos_dados()
+    except OSError as exc:
+        raise HTTPException(status_code=500, detail=f"Ocorreu um erro na análise de arquivos: {exc}")
+    except SQLAlchemyError as exc:
+        raise HTTPException(status_code=503, detail=f"Banco de dados indisponível: {exc}")
 
-@app.get("/relatorio/bairros-mais-seguros")
-def get_relatorio_seguranca():
-    """Retorna um relatório resumido com a segurança dos bairros."""
 
-    resultado_analise = analise.realizar_analise_seguranca_de_arquivos()
-    if isinstance(resultado_analise, dict) and "error" in resultado_analise:
-        raise HTTPException(status_code=500, detail=resultado_analise["error"])
+def _resposta_versionada(request: Request, tipo: str, media_type: str, gerar) -> Response:
+    """Serve ``tipo`` from the result cache with a strong ETag, answering 304 when unchanged."""
+
+    versao = _versao_atual()
+    etag = f'"{tipo}-{versao}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag_confere(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    conteudo = analise.obter_resultado_em_cache(tipo, versao, lambda: gerar(versao))
+    return Response(content=conteudo, media_type=media_type, headers=headers)
+
+
+def _gerar_geojson(versao: str, nivel: str = NIVEL_ORIGINAL) -> bytes:
+    resultado_analise = _analise_atual(versao)
+    if nivel != NIVEL_ORIGINAL:
+        geometrias = obter_indice_bairros().geometrias_no_nivel(nivel)
+        resultado_analise = resultado_analise.set_geometry(geometrias, crs=resultado_analise.crs)
+    return resultado_analise.to_json().encode("utf-8")
+
+
+def _gerar_relatorio(versao: str) -> bytes:
+    resultado_analise = _analise_atual(versao)
 
     resultado_analise = resultado_analise.dropna(subset=["nome"])
     relatorio_df = resultado_analise[["nome", "contagem_de_crimes"]]
@@ -66,7 +116,7 @@ def get_relatorio_seguranca():
             {
                 "posicao": index + 1,
                 "bairro": row["nome"].title(),
-                "ocorrencias": row["contagem_de_crimes"],
+                "ocorrencias": int(row["contagem_de_crimes"]),
             }
         )
 
@@ -88,11 +138,109 @@ def get_relatorio_seguranca():
         "ranking_seguranca": ranking_final,
     }
 
-    json_formatado = json.dumps(relatorio_final, indent=2, ensure_ascii=False)
-    return Response(content=json_formatado, media_type="application/json; charset=utf-8")
+    return json.dumps(relatorio_final, indent=2, ensure_ascii=False).encode("utf-8")
+
+
+@app.get("/analise_seguranca")
+def get_analise_seguranca(
+    request: Request,
+    zoom: Optional[int] = Query(None, ge=0, le=24, description="Zoom do mapa; escolhe o nível de simplificação."),
+    tolerance: Optional[float] = Query(None, gt=0, description="Tolerância máxima de simplificação, em graus."),
+):
+    """Retorna o GeoJSON completo com a contagem de ocorrências.
+
+    Sem parâmetros, devolve os polígonos em resolução original. ``zoom`` ou
+    ``tolerance`` selecionam um dos níveis simplificados pré-calculados.
+    """
+
+    if zoom is not None and tolerance is not None:
+        raise HTTPException(status_code=400, detail="Informe apenas um entre zoom e tolerance")
+
+    nivel = NIVEL_ORIGINAL
+    if zoom is not None:
+        nivel = nivel_para_zoom(zoom)
+    elif tolerance is not None:
+        nivel = nivel_para_tolerancia(tolerance)
+
+    return _resposta_versionada(
+        request,
+        f"analise-geojson-{nivel}",
+        "application/json",
+        lambda versao: _gerar_geojson(versao, nivel),
+    )
+
+
+@app.get("/relatorio/bairros-mais-seguros")
+def get_relatorio_seguranca(request: Request):
+    """Retorna um relatório resumido com a segurança dos bairros."""
+
+    return _resposta_versionada(
+        request,
+        "relatorio-bairros",
+        "application/json; charset=utf-8",
+        _gerar_relatorio,
+    )
+
+
+def _propriedades_dos_tiles(versao: str) -> List[Dict[str, object]]:
+    """Per-bairro attributes carried by every vector tile, in index order."""
+
+    def gerar():
+        resultado_analise = _analise_atual(versao)
+        if _usa_postgis():
+            with SessionLocal() as session:
+                por_tipo = analise_banco.contar_crimes_por_tipo_do_banco(session)
+        else:
+            por_tipo = analise.contar_crimes_por_tipo()
+        if isinstance(por_tipo, dict) and "error" in por_tipo:
+            raise HTTPException(status_code=500, detail=por_tipo["error"])
+
+        propriedades = []
+        for posicao, (identificador, nome, contagem) in enumerate(
+            zip(resultado_analise["id"], resultado_analise["nome"], resultado_analise["contagem_de_crimes"])
+        ):
+            atributos: Dict[str, object] = {
+                "id": None if pd.isna(identificador) else int(identificador),
+                "nome": nome,
+                "contagem_de_crimes": int(contagem),
+            }
+            for tipo, quantidade in por_tipo.iloc[posicao].items():
+                atributos[f"contagem_{tipo}"] = int(quantidade)
+            propriedades.append(atributos)
+        return propriedades
+
+    return analise.obter_resultado_em_cache("propriedades-tiles", versao, gerar)
+
+
+@app.get("/tiles/{z}/{x}/{y}.mvt")
+def get_tile_bairros(z: int, x: int, y: int, request: Request):
+    """Retorna um tile vetorial (MVT) com os bairros e suas contagens de ocorrências."""
+
+    if not tiles_vetoriais.tile_valido(z, x, y):
+        raise HTTPException(status_code=400, detail="Coordenadas de tile inválidas")
+
+    versao = _versao_atual()
+    etag = f'"tile-{versao}-{z}-{x}-{y}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag_confere(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    tiles_vetoriais.descartar_versoes_antigas(settings.tiles_cache_dir, versao)
+    caminho = tiles_vetoriais.caminho_tile_em_cache(settings.tiles_cache_dir, versao, z, x, y)
+    conteudo = tiles_vetoriais.ler_tile_em_cache(caminho)
+    if conteudo is None:
+        conteudo = tiles_vetoriais.gerar_tile_bairros(
+            obter_indice_bairros(), _propriedades_dos_tiles(versao), z, x, y
+        )
+        tiles_vetoriais.gravar_tile_em_cache(caminho, conteudo)
+
+    return Response(content=conteudo, media_type="application/vnd.mapbox-vector-tile", headers=headers)
 
 
 app.include_router(users.router)
 app.include_router(guardian.router)
 app.include_router(safety.router)
 app.include_router(community.router)
+app.include_router(heatmap.router)
+app.include_router(risk.router)
+app.include_router(bairros.router)
@@ -0,0 +1,252 @@
+"""Agregação de pontos de ocorrência em células hexagonais para o mapa de calor.
+
+Os pontos são projetados num plano local (equiretangular centrado em
+Fortaleza) e atribuídos a hexágonos de forma totalmente vetorizada com NumPy.
+Só as contagens por célula saem do servidor, nunca os pontos brutos.
+"""
+
+from __future__ import annotations
+
+import math
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Hashable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from . import analise
+from .banco_de_dados.db_saida import Evento
+from .projecao import desprojetar, projetar
+
+
+RAIZ_3 = math.sqrt(3.0)
+
+
+@dataclass(frozen=True)
+class GradeHexagonal:
+    """Células hexagonais agregadas: centros em graus e contagem por célula."""
+
+    latitudes: np.ndarray
+    longitudes: np.ndarray
+    contagens: np.ndarray
+    raio_m: float
+
+    @property
+    def total(self) -> int:
+        return int(self.contagens.sum())
+
+
+def celulas_hexagonais(latitudes, longitudes, raio_m: float) -> Tuple[np.ndarray, np.ndarray]:
+    """Retorna as coordenadas axiais (q, r) do hexágono de cada ponto.
+
+    Hexágonos "pointy-top" com raio circunscrito ``raio_m``; o arredondamento
+    cúbico é feito em lote para todos os pontos.
+    """
+
+    x, y = projetar(latitudes, longitudes)
+    q = (RAIZ_3 / 3.0 * x - y / 3.0) / raio_m
+    r = (2.0 / 3.0 * y) / raio_m
+    s = -q - r
+
+    q_arred, r_arred, s_arred = np.round(q), np.round(r), np.round(s)
+    dq, dr, ds = np.abs(q_arred - q), np.abs(r_arred - r), np.abs(s_arred - s)
+    corrige_q = (dq > dr) & (dq > ds)
+    corrige_r = ~corrige_q & (dr > ds)
+    q_arred = np.where(corrige_q, -r_arred - s_arred, q_arred)
+    r_arred = np.where(corrige_r, -q_arred - s_arred, r_arred)
+    return q_arred.astype("int64"), r_arred.astype("int64")
+
+
+def centros_hexagonais(q: np.ndarray, r: np.ndarray, raio_m: float) -> Tuple[np.ndarray, np.ndarray]:
+    """Converte coordenadas axiais de volta para (latitudes, longitudes) dos centros."""
+
+    x = raio_m * RAIZ_3 * (q + r / 2.0)
+    y = raio_m * 1.5 * r
+    return desprojetar(x, y)
+
+
+class AcumuladorHexagonal:
+    """Soma contagens por célula ao longo de vários blocos de pontos."""
+
+    def __init__(self, raio_m: float):
+        self.raio_m = raio_m
+        self._chaves = np.empty((0, 2), dtype="int64")
+        self._contagens = np.empty(0, dtype="int64")
+
+    def adicionar(self, latitudes, longitudes) -> None:
+        latitudes = np.asarray(latitudes, dtype="float64")
+        longitudes = np.asarray(longitudes, dtype="float64")
+        validos = np.isfinite(latitudes) & np.isfinite(longitudes)
+        if not validos.any():
+            return
+
+        q, r = celulas_hexagonais(latitudes[validos], longitudes[validos], self.raio_m)
+        chaves, contagens = np.unique(np.column_stack([q, r]), axis=0, return_counts=True)
+        todas = np.concatenate([self._chaves, chaves])
+        pesos = np.concatenate([self._contagens, contagens])
+        self._chaves, inverso = np.unique(todas, axis=0, return_inverse=True)
+        self._contagens = np.bincount(inverso.ravel(), weights=pesos, minlength=len(self._chaves)).astype("int64")
+
+    def resultado(self) -> GradeHexagonal:
+        latitudes, longitudes = centros_hexagonais(self._chaves[:, 0], self._chaves[:, 1], self.raio_m)
+        return GradeHexagonal(
+            latitudes=latitudes,
+            longitudes=longitudes,
+            contagens=self._contagens.copy(),
+            raio_m=self.raio_m,
+        )
+
+
+def agregar_chamados(
+    raio_m: float,
+    inicio: Optional[datetime] = None,
+    fim: Optional[datetime] = None,
+    natureza: Optional[str] = None,
+    tamanho_bloco: int = analise.TAMANHO_BLOCO_CSV,
+) -> GradeHexagonal:
+    """Agrega os chamados de ``policecalls.csv`` em hexágonos, lendo o CSV em blocos.
+
+    Os filtros de data usam a coluna ``data`` e o de natureza a coluna de tipo
+    detectada por ``analise``; se a coluna não existir, o filtro não tem como
+    ser aplicado e nenhum ponto é contado.
+    """
+
+    colunas_csv = pd.read_csv(analise.CAMINHO_CRIMES, nrows=0).columns
+    coluna_tipo = analise.detectar_coluna_tipo_crime(analise.CAMINHO_CRIMES)
+    filtra_data = inicio is not None or fim is not None
+    colunas = ["lat", "lng"]
+    if filtra_data and "data" in colunas_csv:
+        colunas.append("data")
+    if natureza and coluna_tipo:
+        colunas.append(coluna_tipo)
+
+    acumulador = AcumuladorHexagonal(raio_m)
+    if (filtra_data and "data" not in colunas_csv) or (natureza and not coluna_tipo):
+        return acumulador.resultado()
+
+    natureza_normalizada = natureza.strip().upper() if natureza else None
+    blocos = pd.read_csv(
+        analise.CAMINHO_CRIMES,
+        usecols=colunas,
+        dtype={"lat": "float64", "lng": "float64"},
+        chunksize=tamanho_bloco,
+    )
+    for bloco in blocos:
+        mascara = np.ones(len(bloco), dtype=bool)
+        if filtra_data:
+            datas = pd.to_datetime(bloco["data"], errors="coerce", dayfirst=True)
+            if inicio is not None:
+                mascara &= (datas >= inicio).to_numpy()
+            if fim is not None:
+                mascara &= (datas <= fim).to_numpy()
+        if natureza_normalizada:
+            mascara &= (bloco[coluna_tipo].astype(str).str.strip().str.upper() == natureza_normalizada).to_numpy()
+        acumulador.adicionar(bloco["lat"].to_numpy()[mascara], bloco["lng"].to_numpy()[mascara])
+
+    return acumulador.resultado()
+
+
+def versao_chamados() -> str:
+    return analise.hash_arquivo(analise.CAMINHO_CRIMES)
+
+
+def _filtrar_eventos(consulta, inicio: Optional[datetime], fim: Optional[datetime], natureza: Optional[str]):
+    if inicio is not None:
+        consulta = consulta.where(Evento.data_evento >= inicio)
+    if fim is not None:
+        consulta = consulta.where(Evento.data_evento <= fim)
+    if natureza:
+        consulta = consulta.where(func.upper(func.trim(Evento.natureza_crime)) == natureza.strip().upper())
+    return consulta
+
+
+def agregar_eventos(
+    session: Session,
+    raio_m: float,
+    inicio: Optional[datetime] = None,
+    fim: Optional[datetime] = None,
+    natureza: Optional[str] = None,
+    tamanho_bloco: int = analise.TAMANHO_BLOCO_CSV,
+) -> GradeHexagonal:
+    """Agrega os pontos de ``eventos_seguranca`` em hexágonos.
+
+    Os filtros vão para o SQL e só latitude/longitude são trazidas, em
+    partições de ``tamanho_bloco`` linhas via cursor do servidor.
+    """
+
+    consulta = select(func.ST_Y(Evento.ponto_geografico), func.ST_X(Evento.ponto_geografico)).where(
+        Evento.ponto_geografico.isnot(None)
+    )
+    consulta = _filtrar_eventos(consulta, inicio, fim, natureza)
+
+    acumulador = AcumuladorHexagonal(raio_m)
+    resultado = session.execute(consulta.execution_options(yield_per=tamanho_bloco))
+    for particao in resultado.partitions():
+        coordenadas = np.asarray(particao, dtype="float64").reshape(-1, 2)
+        acumulador.adicionar(coordenadas[:, 0], coordenadas[:, 1])
+    return acumulador.resultado()
+
+
+# A assinatura varre a tabela inteira; é conferida no máximo uma vez a cada
+# INTERVALO_REVALIDACAO_S por processo, como as camadas de pontos_seguranca.
+INTERVALO_REVALIDACAO_S = 30.0
+
+_versao_eventos: Optional[Tuple[Tuple, float]] = None
+_trava_versao = threading.Lock()
+
+
+def versao_eventos(session: Session) -> Tuple:
+    """Assinatura da tabela de eventos; muda quando chegam ou mudam eventos.
+
+    O valor lido fica valendo por ``INTERVALO_REVALIDACAO_S`` segundos, então
+    eventos novos aparecem nos caches com até esse atraso.
+    """
+
+    global _versao_eventos
+
+    agora = time.monotonic()
+    guardada = _versao_eventos
+    if guardada is not None and agora - guardada[1] < INTERVALO_REVALIDACAO_S:
+        return guardada[0]
+
+    with _trava_versao:
+        guardada = _versao_eventos
+        if guardada is not None and agora - guardada[1] < INTERVALO_REVALIDACAO_S:
+            return guardada[0]
+        quantidade, maior_id, ultima_atualizacao = session.execute(
+            select(func.count(Evento.id), func.max(Evento.id), func.max(Evento.data_atualizacao))
+        ).one()
+        _versao_eventos = ((quantidade, maior_id, ultima_atualizacao), agora)
+        return _versao_eventos[0]
+
+
+# --- Cache LRU por conjunto de parâmetros ---
+
+CAPACIDADE_CACHE = 64
+
+_grades_em_cache: "OrderedDict[Hashable, GradeHexagonal]" = OrderedDict()
+_trava_cache = threading.Lock()
+
+
+def obter_grade_em_cache(chave: Hashable, gerar) -> GradeHexagonal:
+    """Devolve a grade guardada para ``chave`` ou a gera, mantendo no máximo ``CAPACIDADE_CACHE`` itens."""
+
+    with _trava_cache:
+        if chave in _grades_em_cache:
+            _grades_em_cache.move_to_end(chave)
+            return _grades_em_cache[chave]
+
+    grade = gerar()
+
+    with _trava_cache:
+        _grades_em_cache[chave] = grade
+        _grades_em_cache.move_to_end(chave)
+        while len(_grades_em_cache) > CAPACIDADE_CACHE:
+            _grades_em_cache.popitem(last=False)
+    return grade
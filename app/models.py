@@ -13,6 +13,7 @@ from sqlalchemy import (
     String,
     Text,
     CheckConstraint,
+    Index,
     UniqueConstraint,
 )
 from sqlalchemy.dialects.postgresql import UUID
@@ -38,6 +39,7 @@ class User(Base):
 
     __table_args__ = (
         CheckConstraint("points >= 0", name="ck_users_points_non_negative"),
+        Index("ix_users_points_id", "points", "id"),
     )
 
     guardian_mode = relationship("GuardianMode", back_populates="user", uselist=False)
@@ -112,6 +114,7 @@ class Camera(Base):
     __table_args__ = (
         CheckConstraint("latitude BETWEEN -90 AND 90", name="ck_cameras_latitude_range"),
         CheckConstraint("longitude BETWEEN -180 AND 180", name="ck_cameras_longitude_range"),
+        Index("ix_cameras_created_at_id", "created_at", "id"),
     )
 
 
@@ -129,6 +132,7 @@ class LightingSpot(Base):
     __table_args__ = (
         CheckConstraint("latitude BETWEEN -90 AND 90", name="ck_lighting_latitude_range"),
         CheckConstraint("longitude BETWEEN -180 AND 180", name="ck_lighting_longitude_range"),
+        Index("ix_lighting_spots_created_at_id", "created_at", "id"),
     )
 
 
@@ -152,6 +156,9 @@ class Report(Base):
         CheckConstraint("latitude BETWEEN -90 AND 90", name="ck_reports_latitude_range"),
         CheckConstraint("longitude BETWEEN -180 AND 180", name="ck_reports_longitude_range"),
         CheckConstraint("points_awarded >= 0", name="ck_reports_points_awarded_non_negative"),
+        Index("ix_reports_created_at_id", "created_at", "id"),
+        Index("ix_reports_is_valid_created_at_id", "is_valid", "created_at", "id"),
+        Index("ix_reports_user_id_created_at_id", "user_id", "created_at", "id"),
     )
 
 
@@ -0,0 +1,86 @@
+"""Keyset (cursor) pagination over ``(created_at, id)``, newest first."""
+
+from __future__ import annotations
+
+import base64
+import json
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional, Sequence, Tuple
+from uuid import UUID
+
+from fastapi import HTTPException, Query, status
+from sqlalchemy import or_, tuple_
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+
+def encode_cursor(created_at: Optional[datetime], identifier: UUID) -> str:
+    """Opaque cursor pointing just after the row ``(created_at, identifier)``."""
+
+    payload = json.dumps([created_at.isoformat() if created_at else None, str(identifier)])
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[Optional[datetime], UUID]:
+    """Inverse of :func:`encode_cursor`; raises ``ValueError`` for anything malformed."""
+
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, identifier = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return (datetime.fromisoformat(created_at) if created_at else None), UUID(identifier)
+    except (TypeError, ValueError, json.JSONDecodeError) as exc:
+        raise ValueError("Cursor inválido") from exc
+
+
+@dataclass
+class Page:
+    limit: int
+    after: Optional[Tuple[Optional[datetime], UUID]] = None
+
+
+def page_params(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None, description=f"Value of the previous page's {NEXT_CURSOR_HEADER} header."),
+) -> Page:
+    if cursor is None:
+        return Page(limit)
+    try:
+        return Page(limit, decode_cursor(cursor))
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
+
+
+def order_newest_first(model) -> tuple:
+    # Plain DESC (NULLs first) is a backward scan of the ascending (created_at, id) index.
+    return model.created_at.desc(), model.id.desc()
+
+
+def after_cursor(model, page: Page) -> list:
+    """Conditions selecting the rows strictly after ``page.after`` in :func:`order_newest_first` order."""
+
+    if page.after is None:
+        return []
+    created_at, identifier = page.after
+    if created_at is None:
+        return [or_(model.created_at.isnot(None), model.id < identifier)]
+    # Row comparison so PostgreSQL can seek the (created_at, id) index directly.
+    return [tuple_(model.created_at, model.id) < tuple_(created_at, identifier)]
+
+
+def paginate(statement, model, page: Page):
+    """Apply the keyset order, the cursor and ``limit + 1`` (to detect a next page)."""
+
+    return statement.where(*after_cursor(model, page)).order_by(*order_newest_first(model)).limit(page.limit + 1)
+
+
+def trim_page(rows: Sequence, page: Page) -> Tuple[Sequence, Optional[str]]:
+    """Drop the look-ahead row; returns the page and the cursor of the next one (``None`` on the last)."""
+
+    if len(rows) <= page.limit:
+        return rows, None
+    rows = rows[: page.limit]
+    last = rows[-1]
+    return rows, encode_cursor(last.created_at, last.id)
@@ -0,0 +1,402 @@
+"""Câmeras e pontos de iluminação mantidos em memória, em colunas NumPy.
+
+Cada tabela vira uma ``CamadaDePontos``: arrays de latitude/longitude mais as
+colunas devolvidas pela API, com um índice em grade regular (células de
+``TAMANHO_CELULA_M`` no plano local) guardado como chaves ordenadas. Uma
+consulta por raio visita só as células que tocam o círculo, com
+``searchsorted``, e confirma a distância em lote.
+
+As camadas são carregadas do banco uma vez por processo, recebem os pontos
+novos diretamente dos POSTs e conferem a cada ``INTERVALO_REVALIDACAO_S`` uma
+assinatura barata da tabela, para enxergar inserções feitas por outros
+processos.
+"""
+
+from __future__ import annotations
+
+import itertools
+import math
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from .projecao import ESCALA_X, RAIO_TERRA_M, projetar
+
+
+# Valores de ``settings.safety_engine``: esta camada em memória ou consultas ST_DWithin no banco.
+MOTOR_MEMORIA = "memoria"
+MOTOR_POSTGIS = "postgis"
+
+TAMANHO_CELULA_M = 250.0
+INTERVALO_REVALIDACAO_S = 30.0
+
+_DESLOCAMENTO_CELULA = 1 << 24
+
+
+def distancias_m(lat_a, lon_a, lat_b, lon_b) -> np.ndarray:
+    """Distância equirretangular em metros (latitude média do par), calculada em lote."""
+
+    lat_a = np.asarray(lat_a, dtype="float64")
+    lat_b = np.asarray(lat_b, dtype="float64")
+    latitude_media = np.radians((lat_a + lat_b) / 2.0)
+    x = np.radians(np.asarray(lon_b, dtype="float64") - np.asarray(lon_a, dtype="float64")) * np.cos(latitude_media)
+    y = np.radians(lat_b - lat_a)
+    return np.sqrt(x * x + y * y) * RAIO_TERRA_M
+
+
+def _celulas(latitudes: np.ndarray, longitudes: np.ndarray, tamanho_m: float) -> Tuple[np.ndarray, np.ndarray]:
+    cx = np.floor(np.radians(longitudes) * ESCALA_X / tamanho_m).astype("int64")
+    cy = np.floor(np.radians(latitudes) * RAIO_TERRA_M / tamanho_m).astype("int64")
+    return cx, cy
+
+
+def _chave(cx: np.ndarray, cy: np.ndarray) -> np.ndarray:
+    return ((cx + _DESLOCAMENTO_CELULA) << 25) | (cy + _DESLOCAMENTO_CELULA)
+
+
+def _expandir_faixas(inicios: np.ndarray, fins: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Concatena ``range(inicio, fim)`` de cada faixa; devolve (posições, faixa de origem)."""
+
+    tamanhos = fins - inicios
+    total = int(tamanhos.sum())
+    origem = np.repeat(np.arange(len(inicios)), tamanhos)
+    deslocamento = np.repeat(inicios - np.concatenate([[0], np.cumsum(tamanhos)[:-1]]), tamanhos)
+    return deslocamento + np.arange(total), origem
+
+
+class CamadaDePontos:
+    """Pontos de uma tabela (câmeras ou iluminação) em colunas, com índice em grade."""
+
+    def __init__(self, linhas=(), assinatura=None, tamanho_celula_m: float = TAMANHO_CELULA_M):
+        self.tamanho_celula_m = tamanho_celula_m
+        self.assinatura = assinatura
+        # Muda a cada carga do banco; pontos acrescentados pelos POSTs não a alteram.
+        self.geracao = 0
+        self.verificada_em = time.monotonic()
+        self._trava = threading.Lock()
+        self._pendentes: List[tuple] = list(linhas)
+        self._ids_presentes = {linha[0] for linha in self._pendentes}
+        self.ids = np.empty(0, dtype=object)
+        self.nomes = np.empty(0, dtype=object)
+        self.descricoes = np.empty(0, dtype=object)
+        self.latitudes = np.empty(0, dtype="float64")
+        self.longitudes = np.empty(0, dtype="float64")
+        self._ordem = np.empty(0, dtype="int64")
+        self._chaves_ordenadas = np.empty(0, dtype="int64")
+        self._consolidar()
+
+    def __len__(self) -> int:
+        return len(self.latitudes) + len(self._pendentes)
+
+    def adicionar(self, identificador, nome, descricao, latitude: float, longitude: float) -> bool:
+        """Acrescenta um ponto; o índice é refeito na próxima consulta.
+
+        Devolve ``False`` sem mexer na camada se o id já estiver nela (por
+        exemplo, uma recarga do banco entre o commit e o registro do POST).
+        """
+
+        with self._trava:
+            if identificador in self._ids_presentes:
+                return False
+            self._ids_presentes.add(identificador)
+            self._pendentes.append((identificador, nome, descricao, latitude, longitude))
+            return True
+
+    def _consolidar(self) -> None:
+        if not self._pendentes:
+            return
+        colunas = (np.array(coluna, dtype=object) for coluna in zip(*self._pendentes))
+        ids, nomes, descricoes, latitudes, longitudes = colunas
+        self._pendentes = []
+        self.ids = np.concatenate([self.ids, ids])
+        self.nomes = np.concatenate([self.nomes, nomes])
+        self.descricoes = np.concatenate([self.descricoes, descricoes])
+        self.latitudes = np.concatenate([self.latitudes, latitudes.astype("float64")])
+        self.longitudes = np.concatenate([self.longitudes, longitudes.astype("float64")])
+
+        chaves = _chave(*_celulas(self.latitudes, self.longitudes, self.tamanho_celula_m))
+        self._ordem = np.argsort(chaves, kind="stable")
+        self._chaves_ordenadas = chaves[self._ordem]
+
+    def coordenadas(self) -> Tuple[np.ndarray, np.ndarray]:
+        """(latitudes, longitudes) de todos os pontos; pontos novos sempre entram no fim."""
+
+        with self._trava:
+            self._consolidar()
+            return self.latitudes, self.longitudes
+
+    def subconjunto(self, posicoes) -> "CamadaDePontos":
+        """Nova camada só com os pontos em ``posicoes`` (por exemplo, os candidatos de um corredor)."""
+
+        with self._trava:
+            self._consolidar()
+            colunas = (self.ids, self.nomes, self.descricoes, self.latitudes, self.longitudes)
+            linhas = list(zip(*(coluna[posicoes] for coluna in colunas)))
+        return CamadaDePontos(linhas, tamanho_celula_m=self.tamanho_celula_m)
+
+    def consultar_raio(self, latitudes, longitudes, raio_m: float) -> Tuple[np.ndarray, np.ndarray]:
+        """Pares (consulta, ponto) a no máximo ``raio_m`` metros, para várias consultas de uma vez.
+
+        As posições de ponto indexam as colunas (``ids``, ``latitudes``...);
+        os pares saem ordenados por consulta e depois por ponto.
+        """
+
+        with self._trava:
+            self._consolidar()
+            latitudes_pontos, longitudes_pontos = self.latitudes, self.longitudes
+            ordem, chaves_ordenadas = self._ordem, self._chaves_ordenadas
+
+        latitudes = np.atleast_1d(np.asarray(latitudes, dtype="float64"))
+        longitudes = np.atleast_1d(np.asarray(longitudes, dtype="float64"))
+        vazio = np.empty(0, dtype="int64")
+        if len(chaves_ordenadas) == 0 or len(latitudes) == 0:
+            return vazio, vazio
+
+        # Margem de 1% cobre a diferença entre o plano da grade (latitude fixa)
+        # e a latitude média usada na distância exata.
+        alcance = int(math.ceil(raio_m * 1.01 / self.tamanho_celula_m))
+        passos = np.arange(-alcance, alcance + 1)
+        dx, dy = (d.ravel() for d in np.meshgrid(passos, passos, indexing="ij"))
+        cx, cy = _celulas(latitudes, longitudes, self.tamanho_celula_m)
+        chaves = _chave(cx[:, None] + dx[None, :], cy[:, None] + dy[None, :]).ravel()
+
+        inicios = np.searchsorted(chaves_ordenadas, chaves, side="left")
+        fins = np.searchsorted(chaves_ordenadas, chaves, side="right")
+        posicoes, faixa = _expandir_faixas(inicios, fins)
+        consultas = faixa // len(dx)
+        pontos = ordem[posicoes]
+
+        distancias = distancias_m(
+            latitudes[consultas], longitudes[consultas], latitudes_pontos[pontos], longitudes_pontos[pontos]
+        )
+        dentro = distancias <= raio_m
+        consultas, pontos = consultas[dentro], pontos[dentro]
+        ordenacao = np.lexsort((pontos, consultas))
+        return consultas[ordenacao], pontos[ordenacao]
+
+    def pontos_no_raio(self, latitudes, longitudes, raio_m: float) -> np.ndarray:
+        """Posições distintas dos pontos a até ``raio_m`` de qualquer uma das consultas."""
+
+        _, pontos = self.consultar_raio(latitudes, longitudes, raio_m)
+        return np.unique(pontos)
+
+
+# --- Corredor ao longo de um caminho ---
+
+TAMANHO_SEGMENTO_M = 200.0
+
+
+@dataclass(frozen=True)
+class Segmentos:
+    """Trechos consecutivos de um caminho, com início/fim em graus e comprimento em metros."""
+
+    latitudes_inicio: np.ndarray
+    longitudes_inicio: np.ndarray
+    latitudes_fim: np.ndarray
+    longitudes_fim: np.ndarray
+    comprimentos_m: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.comprimentos_m)
+
+
+def segmentar_pernas(lat_ini, lon_ini, lat_fim, lon_fim, tamanho_segmento_m: float) -> Tuple[Segmentos, np.ndarray]:
+    """Divide pernas soltas (início/fim em arrays) em segmentos; devolve também a perna de cada segmento."""
+
+    comprimentos = distancias_m(lat_ini, lon_ini, lat_fim, lon_fim)
+    partes = np.maximum(1, np.ceil(comprimentos / tamanho_segmento_m)).astype("int64")
+
+    perna = np.repeat(np.arange(len(partes)), partes)
+    passo = np.arange(int(partes.sum())) - np.repeat(np.cumsum(partes) - partes, partes)
+    inicio = passo / partes[perna]
+    fim = (passo + 1) / partes[perna]
+    delta_lat = lat_fim - lat_ini
+    delta_lon = lon_fim - lon_ini
+    segmentos = Segmentos(
+        latitudes_inicio=lat_ini[perna] + delta_lat[perna] * inicio,
+        longitudes_inicio=lon_ini[perna] + delta_lon[perna] * inicio,
+        latitudes_fim=lat_ini[perna] + delta_lat[perna] * fim,
+        longitudes_fim=lon_ini[perna] + delta_lon[perna] * fim,
+        comprimentos_m=comprimentos[perna] / partes[perna],
+    )
+    return segmentos, perna
+
+
+def segmentar_caminho(latitudes, longitudes, tamanho_segmento_m: float = TAMANHO_SEGMENTO_M) -> Segmentos:
+    """Divide cada perna do caminho em partes iguais de no máximo ``tamanho_segmento_m``."""
+
+    latitudes = np.asarray(latitudes, dtype="float64")
+    longitudes = np.asarray(longitudes, dtype="float64")
+    segmentos, _ = segmentar_pernas(
+        latitudes[:-1], longitudes[:-1], latitudes[1:], longitudes[1:], tamanho_segmento_m
+    )
+    return segmentos
+
+
+def segmentar_caminhos(caminhos, tamanho_segmento_m: float = TAMANHO_SEGMENTO_M) -> Tuple[Segmentos, np.ndarray]:
+    """Segmenta vários caminhos ``(latitudes, longitudes)`` de uma vez.
+
+    Devolve os segmentos de todos, concatenados, e o caminho de origem de cada
+    segmento. Não há perna ligando o fim de um caminho ao início do seguinte.
+    """
+
+    latitudes = np.concatenate([np.asarray(lats, dtype="float64") for lats, _ in caminhos])
+    longitudes = np.concatenate([np.asarray(lons, dtype="float64") for _, lons in caminhos])
+    caminho_do_ponto = np.repeat(np.arange(len(caminhos)), [len(lats) for lats, _ in caminhos])
+    pernas = np.flatnonzero(caminho_do_ponto[:-1] == caminho_do_ponto[1:])
+    segmentos, perna = segmentar_pernas(
+        latitudes[pernas], longitudes[pernas], latitudes[pernas + 1], longitudes[pernas + 1], tamanho_segmento_m
+    )
+    return segmentos, caminho_do_ponto[pernas][perna]
+
+
+def pontos_no_corredor(camada: CamadaDePontos, segmentos: Segmentos, raio_m: float) -> Tuple[np.ndarray, np.ndarray]:
+    """Pares distintos (segmento, ponto) com o ponto a até ``raio_m`` do segmento.
+
+    Cada segmento é amostrado a cada ``raio_m``; círculos de raio
+    ``raio_m * sqrt(1.25)`` nessas amostras cobrem toda a faixa do segmento, e
+    os candidatos que a grade devolve são confirmados pela distância
+    ponto-segmento no plano local.
+    """
+
+    vazio = np.empty(0, dtype="int64")
+    if len(segmentos) == 0:
+        return vazio, vazio
+
+    amostras_por_segmento = np.ceil(segmentos.comprimentos_m / raio_m).astype("int64") + 1
+    segmento_da_amostra = np.repeat(np.arange(len(segmentos)), amostras_por_segmento)
+    passo = np.arange(int(amostras_por_segmento.sum())) - np.repeat(
+        np.cumsum(amostras_por_segmento) - amostras_por_segmento, amostras_por_segmento
+    )
+    # Segmento de comprimento zero tem uma amostra só (o ponto inicial); evita 0/0.
+    fracao = passo / np.maximum(amostras_por_segmento[segmento_da_amostra] - 1, 1)
+    lat_ini, lon_ini = segmentos.latitudes_inicio, segmentos.longitudes_inicio
+    lat_fim, lon_fim = segmentos.latitudes_fim, segmentos.longitudes_fim
+    amostras_lat = lat_ini[segmento_da_amostra] + (lat_fim - lat_ini)[segmento_da_amostra] * fracao
+    amostras_lon = lon_ini[segmento_da_amostra] + (lon_fim - lon_ini)[segmento_da_amostra] * fracao
+
+    amostras, pontos = camada.consultar_raio(amostras_lat, amostras_lon, raio_m * math.sqrt(1.25))
+    if len(pontos) == 0:
+        return vazio, vazio
+    # Pares distintos via chave inteira única (np.unique com axis=0 ordena registros, bem mais lento).
+    base = int(pontos.max()) + 1
+    pares = np.unique(segmento_da_amostra[amostras] * base + pontos)
+    indices_segmento, pontos = np.divmod(pares, base)
+
+    ax, ay = projetar(lat_ini[indices_segmento], lon_ini[indices_segmento])
+    bx, by = projetar(lat_fim[indices_segmento], lon_fim[indices_segmento])
+    px, py = projetar(camada.latitudes[pontos], camada.longitudes[pontos])
+    dx, dy = bx - ax, by - ay
+    comprimento2 = dx * dx + dy * dy
+    with np.errstate(invalid="ignore", divide="ignore"):
+        t = np.where(comprimento2 > 0, ((px - ax) * dx + (py - ay) * dy) / comprimento2, 0.0)
+    t = np.clip(t, 0.0, 1.0)
+    distancia = np.hypot(px - (ax + t * dx), py - (ay + t * dy))
+    dentro = distancia <= raio_m
+    return indices_segmento[dentro], pontos[dentro]
+
+
+def decodificar_polyline(texto: str, precisao: int = 5) -> Tuple[np.ndarray, np.ndarray]:
+    """Decodifica uma "encoded polyline" (formato do Google/OSRM) em (latitudes, longitudes)."""
+
+    valores = []
+    atual = deslocamento = 0
+    for caractere in texto:
+        byte = ord(caractere) - 63
+        if not 0 <= byte < 64:
+            raise ValueError(f"Caractere inválido na polyline: {caractere!r}")
+        atual |= (byte & 0x1F) << deslocamento
+        deslocamento += 5
+        if byte < 0x20:
+            valores.append(~(atual >> 1) if atual & 1 else atual >> 1)
+            atual = deslocamento = 0
+    if deslocamento or len(valores) % 2:
+        raise ValueError("Polyline truncada")
+
+    coordenadas = np.cumsum(np.array(valores, dtype="int64").reshape(-1, 2), axis=0) / 10.0 ** precisao
+    return coordenadas[:, 0], coordenadas[:, 1]
+
+
+# --- Camadas compartilhadas do processo ---
+
+_camadas: Dict[type, CamadaDePontos] = {}
+_trava_camadas = threading.Lock()
+_geracoes = itertools.count(1)
+
+
+def _assinatura(session: Session, modelo) -> tuple:
+    quantidade, ultima_criacao = session.execute(select(func.count(modelo.id), func.max(modelo.created_at))).one()
+    return quantidade, ultima_criacao
+
+
+def _carregar(session: Session, modelo) -> CamadaDePontos:
+    assinatura = _assinatura(session, modelo)
+    linhas = session.execute(
+        select(modelo.id, modelo.name, modelo.description, modelo.latitude, modelo.longitude)
+    ).all()
+    camada = CamadaDePontos([tuple(linha) for linha in linhas], assinatura=assinatura)
+    camada.geracao = next(_geracoes)
+    return camada
+
+
+def obter_camada(session: Session, modelo) -> CamadaDePontos:
+    """Camada em memória da tabela de ``modelo`` (``Camera`` ou ``LightingSpot``).
+
+    Carrega na primeira chamada; depois só recarrega se a assinatura da tabela
+    (contagem e última criação) mudar, conferida no máximo a cada
+    ``INTERVALO_REVALIDACAO_S`` segundos.
+    """
+
+    camada = _camadas.get(modelo)
+    agora = time.monotonic()
+    if camada is not None and agora - camada.verificada_em < INTERVALO_REVALIDACAO_S:
+        return camada
+
+    with _trava_camadas:
+        camada = _camadas.get(modelo)
+        if camada is not None and agora - camada.verificada_em < INTERVALO_REVALIDACAO_S:
+            return camada
+        if camada is None or _assinatura(session, modelo) != camada.assinatura:
+            camada = _carregar(session, modelo)
+            _camadas[modelo] = camada
+        camada.verificada_em = agora
+        return camada
+
+
+def registrar_ponto(instancia) -> None:
+    """Acrescenta à camada em memória um registro recém-gravado (chamado pelos POSTs).
+
+    Se a camada já tem o id (foi recarregada depois do commit), não faz nada.
+    """
+
+    with _trava_camadas:
+        camada: Optional[CamadaDePontos] = _camadas.get(type(instancia))
+        if camada is None:
+            return
+        if not camada.adicionar(
+            instancia.id, instancia.name, instancia.description, instancia.latitude, instancia.longitude
+        ):
+            return
+        if camada.assinatura is not None:
+            quantidade, ultima_criacao = camada.assinatura
+            criada_em = instancia.created_at
+            if ultima_criacao is not None and criada_em is not None:
+                criada_em = max(ultima_criacao, criada_em)
+            camada.assinatura = (quantidade + 1, criada_em or ultima_criacao)
+
+
+def descartar_camada(modelo) -> None:
+    """Esquece a camada de ``modelo``; a próxima consulta recarrega do banco (usado após importações)."""
+
+    with _trava_camadas:
+        _camadas.pop(modelo, None)
+
+
+def limpar_camadas() -> None:
+    with _trava_camadas:
+        _camadas.clear()
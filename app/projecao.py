@@ -0,0 +1,36 @@
+"""Projeção equirretangular local centrada em Fortaleza.
+
+Plano em metros usado pelo mapa de calor, pelas camadas de câmeras e
+iluminação, pela grade de cobertura e pelo cache de rotas. Na escala da
+cidade o erro da aproximação é desprezível.
+"""
+
+from __future__ import annotations
+
+import math
+from typing import Tuple
+
+import numpy as np
+
+RAIO_TERRA_M = 6371000.0
+# Latitude de referência da projeção local (centro aproximado de Fortaleza).
+LATITUDE_REFERENCIA = -3.78
+ESCALA_X = RAIO_TERRA_M * math.cos(math.radians(LATITUDE_REFERENCIA))
+
+
+def projetar(latitudes, longitudes) -> Tuple[np.ndarray, np.ndarray]:
+    """``(x, y)`` em metros; aceita escalares ou arrays."""
+
+    return (
+        np.radians(np.asarray(longitudes, dtype="float64")) * ESCALA_X,
+        np.radians(np.asarray(latitudes, dtype="float64")) * RAIO_TERRA_M,
+    )
+
+
+def desprojetar(x, y) -> Tuple[np.ndarray, np.ndarray]:
+    """Inverso de :func:`projetar`: devolve ``(latitudes, longitudes)`` em graus."""
+
+    return (
+        np.degrees(np.asarray(y, dtype="float64") / RAIO_TERRA_M),
+        np.degrees(np.asarray(x, dtype="float64") / ESCALA_X),
+    )
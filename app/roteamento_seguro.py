@@ -0,0 +1,442 @@
+"""Roteamento a pé ponderado por risco sobre ``segmentos_de_via``.
+
+A malha é montada uma vez por processo como um grafo em CSR (arrays
+``inicio_arestas``/``destinos``/``segmento_da_aresta``): os nós são as pontas
+dos segmentos (arredondadas a ~10 cm para casar cruzamentos) e cada segmento
+vira duas arestas, uma por sentido. O custo de uma aresta é o comprimento
+multiplicado por ``1 + PESO_RISCO * risco``, onde o risco combina
+``risco_pedestre_calculado`` com a iluminação percebida e o fluxo de pedestres
+do período.
+
+As consultas usam A* com marcos (ALT): as distâncias de ``NUMERO_MARCOS`` nós
+até todos os outros são pré-calculadas sobre o *comprimento* das vias. Como o
+custo nunca é menor que o comprimento, a heurística continua admissível quando
+os riscos mudam; por isso uma mudança só de atributos recalcula os custos das
+arestas sem refazer o grafo nem os marcos. Mudanças de topologia (segmentos
+novos ou removidos) recarregam tudo.
+"""
+
+from __future__ import annotations
+
+import heapq
+import math
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import shapely
+from sqlalchemy import func, literal, select
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+from sqlalchemy.orm import Session
+
+from .banco_de_dados.db_saida import NivelFluxo, SegmentoDeVia
+from .pontos_seguranca import INTERVALO_REVALIDACAO_S, distancias_m
+
+
+PERIODO_DIA = "dia"
+PERIODO_NOITE = "noite"
+PERIODOS = (PERIODO_DIA, PERIODO_NOITE)
+
+PESO_RISCO = 4.0
+RISCO_PADRAO = 0.5
+PENALIDADE_ILUMINACAO = {"BOA": 0.0, "MEDIA": 0.1, "RUIM": 0.3}
+PENALIDADE_FLUXO = {
+    NivelFluxo.ALTO: 0.0,
+    NivelFluxo.MEDIO: 0.05,
+    NivelFluxo.BAIXO: 0.15,
+    NivelFluxo.INEXISTENTE: 0.3,
+}
+
+NUMERO_MARCOS = 8
+CASAS_DECIMAIS_NO = 6
+DISTANCIA_MAXIMA_ENCAIXE_M = 500.0
+
+
+class RotaIndisponivel(Exception):
+    """Origem/destino fora da malha ou sem caminho entre eles."""
+
+
+@dataclass
+class AtributosSegmentos:
+    """Colunas de ``segmentos_de_via`` que entram no custo, na ordem do grafo."""
+
+    riscos: np.ndarray
+    iluminacao: np.ndarray
+    fluxo_diurno: np.ndarray
+    fluxo_noturno: np.ndarray
+
+    def fatores(self, periodo: str) -> np.ndarray:
+        """Multiplicador do comprimento de cada segmento no ``periodo``."""
+
+        fluxo = self.fluxo_noturno if periodo == PERIODO_NOITE else self.fluxo_diurno
+        risco = np.clip(self.riscos, 0.0, 1.0) + np.array(
+            [PENALIDADE_FLUXO.get(nivel, PENALIDADE_FLUXO[NivelFluxo.MEDIO]) for nivel in fluxo]
+        )
+        if periodo == PERIODO_NOITE:
+            risco = risco + np.array(
+                [PENALIDADE_ILUMINACAO.get(nivel, PENALIDADE_ILUMINACAO["MEDIA"]) for nivel in self.iluminacao]
+            )
+        return 1.0 + PESO_RISCO * risco
+
+
+def _atributos_de_linhas(linhas, posicao_por_id: Dict[int, int]) -> AtributosSegmentos:
+    quantidade = len(posicao_por_id)
+    riscos = np.full(quantidade, RISCO_PADRAO)
+    iluminacao = np.full(quantidade, "MEDIA", dtype=object)
+    fluxo_diurno = np.full(quantidade, NivelFluxo.MEDIO, dtype=object)
+    fluxo_noturno = np.full(quantidade, NivelFluxo.MEDIO, dtype=object)
+    for identificador, risco, percepcao, diurno, noturno in linhas:
+        posicao = posicao_por_id.get(identificador)
+        if posicao is None:
+            continue
+        if risco is not None:
+            riscos[posicao] = risco
+        iluminacao[posicao] = percepcao or "MEDIA"
+        fluxo_diurno[posicao] = diurno or NivelFluxo.MEDIO
+        fluxo_noturno[posicao] = noturno or NivelFluxo.MEDIO
+    return AtributosSegmentos(riscos, iluminacao, fluxo_diurno, fluxo_noturno)
+
+
+def _dijkstra(inicio_arestas: List[int], destinos: List[int], custos: List[float], origem: int) -> List[float]:
+    distancias = [math.inf] * (len(inicio_arestas) - 1)
+    distancias[origem] = 0.0
+    fila = [(0.0, origem)]
+    while fila:
+        distancia, no = heapq.heappop(fila)
+        if distancia > distancias[no]:
+            continue
+        for aresta in range(inicio_arestas[no], inicio_arestas[no + 1]):
+            vizinho = destinos[aresta]
+            candidata = distancia + custos[aresta]
+            if candidata < distancias[vizinho]:
+                distancias[vizinho] = candidata
+                heapq.heappush(fila, (candidata, vizinho))
+    return distancias
+
+
+@dataclass
+class Trecho:
+    """Segmento percorrido pela rota, no sentido da caminhada."""
+
+    segmento_id: int
+    nome_rua: Optional[str]
+    comprimento_m: float
+    risco: float
+    iluminacao: str
+
+
+@dataclass
+class Rota:
+    coordenadas: List[Tuple[float, float]]
+    trechos: List[Trecho]
+    comprimento_m: float
+    custo: float
+    encaixe_origem_m: float
+    encaixe_destino_m: float
+
+
+class GrafoDeVias:
+    """Malha de ``segmentos_de_via`` em CSR, com custos por período e marcos para o A*."""
+
+    def __init__(
+        self,
+        ids: np.ndarray,
+        nomes: np.ndarray,
+        coordenadas: np.ndarray,
+        deslocamentos: np.ndarray,
+        atributos: AtributosSegmentos,
+        numero_marcos: int = NUMERO_MARCOS,
+    ):
+        self.ids = ids
+        self.nomes = nomes
+        self.coordenadas = coordenadas
+        self.deslocamentos = deslocamentos
+        self.posicao_por_id = {int(identificador): posicao for posicao, identificador in enumerate(ids)}
+        self.assinatura_topologia = None
+        self.assinatura_atributos = None
+        self.verificado_em = time.monotonic()
+
+        # Cada coordenada que não é a última do seu segmento abre um trecho reto.
+        segmento_da_coordenada = np.repeat(np.arange(len(ids)), np.diff(deslocamentos))
+        abre_trecho = np.ones(len(coordenadas), dtype=bool)
+        abre_trecho[deslocamentos[1:] - 1] = False
+        inicio_trecho = np.flatnonzero(abre_trecho)
+        trecho = segmento_da_coordenada[inicio_trecho]
+        passos = distancias_m(
+            coordenadas[inicio_trecho, 1],
+            coordenadas[inicio_trecho, 0],
+            coordenadas[inicio_trecho + 1, 1],
+            coordenadas[inicio_trecho + 1, 0],
+        )
+        self.comprimentos_m = np.bincount(trecho, weights=passos, minlength=len(ids))
+
+        pontas = np.concatenate([coordenadas[deslocamentos[:-1]], coordenadas[deslocamentos[1:] - 1]])
+        chaves = np.round(pontas * 10 ** CASAS_DECIMAIS_NO).astype("int64")
+        unicas, no_da_ponta = np.unique(chaves, axis=0, return_inverse=True)
+        no_da_ponta = no_da_ponta.ravel()
+        self.longitudes_nos = unicas[:, 0] / 10 ** CASAS_DECIMAIS_NO
+        self.latitudes_nos = unicas[:, 1] / 10 ** CASAS_DECIMAIS_NO
+        quantidade_nos = len(unicas)
+
+        inicio, fim = no_da_ponta[: len(ids)], no_da_ponta[len(ids):]
+        segmentos = np.flatnonzero(inicio != fim)
+        origens = np.concatenate([inicio[segmentos], fim[segmentos]])
+        destinos = np.concatenate([fim[segmentos], inicio[segmentos]])
+        segmento_da_aresta = np.concatenate([segmentos, segmentos])
+        invertida = np.concatenate([np.zeros(len(segmentos), bool), np.ones(len(segmentos), bool)])
+
+        ordem = np.argsort(origens, kind="stable")
+        self.destinos = destinos[ordem]
+        self.segmento_da_aresta = segmento_da_aresta[ordem]
+        self.invertida = invertida[ordem]
+        self.inicio_arestas = np.concatenate([[0], np.cumsum(np.bincount(origens, minlength=quantidade_nos))])
+
+        # Listas Python: o laço do A* indexa elemento a elemento.
+        self._inicio_arestas = self.inicio_arestas.tolist()
+        self._destinos = self.destinos.tolist()
+        # periodo -> (custo de cada aresta, menor fator de custo), trocados juntos.
+        self._custos: Dict[str, Tuple[List[float], float]] = {}
+        self.atributos = atributos
+        self.atualizar_atributos(atributos)
+        self.marcos, self.distancias_marcos = self._calcular_marcos(numero_marcos)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def atualizar_atributos(self, atributos: AtributosSegmentos) -> None:
+        """Troca riscos/iluminação/fluxo e recalcula só os custos das arestas."""
+
+        custos = {}
+        for periodo in PERIODOS:
+            fatores = atributos.fatores(periodo)
+            custos[periodo] = (
+                (self.comprimentos_m * fatores)[self.segmento_da_aresta].tolist(),
+                float(fatores.min(initial=1.0)),
+            )
+        self.atributos = atributos
+        self._custos = custos
+
+    def _calcular_marcos(self, numero_marcos: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Marcos escolhidos pelo mais distante dos já escolhidos, com distâncias em comprimento."""
+
+        quantidade_nos = len(self.latitudes_nos)
+        if quantidade_nos == 0:
+            return np.empty(0, dtype="int64"), np.empty((0, 0))
+        comprimentos = self.comprimentos_m[self.segmento_da_aresta].tolist()
+
+        marcos: List[int] = []
+        distancias: List[np.ndarray] = []
+        minimo = np.full(quantidade_nos, math.inf)
+        candidato = 0
+        for _ in range(min(numero_marcos, quantidade_nos)):
+            atual = np.array(_dijkstra(self._inicio_arestas, self._destinos, comprimentos, candidato))
+            marcos.append(candidato)
+            distancias.append(atual)
+            minimo = np.minimum(minimo, atual)
+            # Nós fora dos componentes já cobertos (inf) têm prioridade.
+            candidato = int(np.argmax(np.where(np.isfinite(minimo), minimo, np.finfo("float64").max)))
+            if minimo[candidato] == 0:
+                break
+        return np.array(marcos), np.vstack(distancias)
+
+    def _heuristica(self, destino: int, fator_minimo: float = 1.0) -> List[float]:
+        """Cota inferior do custo até ``destino`` para todos os nós.
+
+        O maior entre a linha reta e as diferenças de distância aos marcos é
+        uma cota do comprimento; multiplicado pelo menor fator de custo da
+        malha, continua sendo cota do custo.
+        """
+
+        linha_reta = distancias_m(self.latitudes_nos, self.longitudes_nos, self.latitudes_nos[destino],
+                                  self.longitudes_nos[destino])
+        ate_destino = self.distancias_marcos[:, destino][:, None]
+        with np.errstate(invalid="ignore"):
+            diferencas = np.abs(ate_destino - self.distancias_marcos)
+        diferencas[~np.isfinite(diferencas)] = 0.0
+        return (np.maximum(linha_reta, diferencas.max(axis=0, initial=0.0)) * fator_minimo).tolist()
+
+    def no_mais_proximo(self, latitude: float, longitude: float) -> Tuple[int, float]:
+        if len(self.latitudes_nos) == 0:
+            raise RotaIndisponivel("Nenhum segmento de via carregado")
+        distancias = distancias_m(latitude, longitude, self.latitudes_nos, self.longitudes_nos)
+        no = int(np.argmin(distancias))
+        return no, float(distancias[no])
+
+    def caminho(self, origem: int, destino: int, periodo: str) -> Tuple[List[int], float]:
+        """Arestas do caminho de menor custo (A*) e o custo total."""
+
+        if origem == destino:
+            return [], 0.0
+        custos, fator_minimo = self._custos[periodo]
+        inicio_arestas, destinos = self._inicio_arestas, self._destinos
+        heuristica = self._heuristica(destino, fator_minimo)
+
+        custo_ate = [math.inf] * len(heuristica)
+        custo_ate[origem] = 0.0
+        aresta_anterior: Dict[int, int] = {}
+        fechados = bytearray(len(heuristica))
+        fila = [(heuristica[origem], origem)]
+        while fila:
+            _, no = heapq.heappop(fila)
+            if no == destino:
+                break
+            if fechados[no]:
+                continue
+            fechados[no] = 1
+            base = custo_ate[no]
+            for aresta in range(inicio_arestas[no], inicio_arestas[no + 1]):
+                vizinho = destinos[aresta]
+                candidato = base + custos[aresta]
+                if candidato < custo_ate[vizinho]:
+                    custo_ate[vizinho] = candidato
+                    aresta_anterior[vizinho] = aresta
+                    heapq.heappush(fila, (candidato + heuristica[vizinho], vizinho))
+        else:
+            raise RotaIndisponivel("Sem caminho entre origem e destino pela malha viária")
+
+        arestas = []
+        no = destino
+        while no != origem:
+            aresta = aresta_anterior[no]
+            arestas.append(aresta)
+            no = int(np.searchsorted(self.inicio_arestas, aresta, side="right") - 1)
+        arestas.reverse()
+        return arestas, custo_ate[destino]
+
+    def rota(
+        self,
+        latitude_origem: float,
+        longitude_origem: float,
+        latitude_destino: float,
+        longitude_destino: float,
+        periodo: str = PERIODO_NOITE,
+        distancia_maxima_encaixe_m: float = DISTANCIA_MAXIMA_ENCAIXE_M,
+    ) -> Rota:
+        origem, encaixe_origem = self.no_mais_proximo(latitude_origem, longitude_origem)
+        destino, encaixe_destino = self.no_mais_proximo(latitude_destino, longitude_destino)
+        if encaixe_origem > distancia_maxima_encaixe_m:
+            raise RotaIndisponivel("Origem fora da malha viária")
+        if encaixe_destino > distancia_maxima_encaixe_m:
+            raise RotaIndisponivel("Destino fora da malha viária")
+
+        arestas, custo = self.caminho(origem, destino, periodo)
+
+        coordenadas = [(float(self.latitudes_nos[origem]), float(self.longitudes_nos[origem]))]
+        trechos = []
+        for aresta in arestas:
+            segmento = int(self.segmento_da_aresta[aresta])
+            pontos = self.coordenadas[self.deslocamentos[segmento]: self.deslocamentos[segmento + 1]]
+            if self.invertida[aresta]:
+                pontos = pontos[::-1]
+            coordenadas.extend((float(lat), float(lon)) for lon, lat in pontos[1:])
+            trechos.append(
+                Trecho(
+                    segmento_id=int(self.ids[segmento]),
+                    nome_rua=self.nomes[segmento],
+                    comprimento_m=float(self.comprimentos_m[segmento]),
+                    risco=float(self.atributos.riscos[segmento]),
+                    iluminacao=str(self.atributos.iluminacao[segmento]),
+                )
+            )
+        return Rota(
+            coordenadas=coordenadas,
+            trechos=trechos,
+            comprimento_m=float(sum(trecho.comprimento_m for trecho in trechos)),
+            custo=float(custo),
+            encaixe_origem_m=encaixe_origem,
+            encaixe_destino_m=encaixe_destino,
+        )
+
+
+# --- Grafo compartilhado do processo ---
+
+_grafo: Optional[GrafoDeVias] = None
+_trava_grafo = threading.Lock()
+
+_COLUNAS_ATRIBUTOS = (
+    SegmentoDeVia.id,
+    SegmentoDeVia.risco_pedestre_calculado,
+    SegmentoDeVia.percepcao_iluminacao,
+    SegmentoDeVia.fluxo_pedestres_diurno,
+    SegmentoDeVia.fluxo_pedestres_noturno,
+)
+
+
+def _assinaturas(session: Session) -> Tuple[tuple, Optional[str]]:
+    """(contagem e maior id, hash dos atributos de custo) de ``segmentos_de_via``."""
+
+    atributos = func.concat_ws(":", *_COLUNAS_ATRIBUTOS)
+    quantidade, maior_id, hash_atributos = session.execute(
+        select(
+            func.count(SegmentoDeVia.id),
+            func.max(SegmentoDeVia.id),
+            func.md5(func.string_agg(atributos, aggregate_order_by(literal(","), SegmentoDeVia.id))),
+        ).where(SegmentoDeVia.geometria_linha.isnot(None))
+    ).one()
+    return (quantidade, maior_id), hash_atributos
+
+
+def carregar_grafo(session: Session) -> GrafoDeVias:
+    """Lê geometrias e atributos de ``segmentos_de_via`` e monta o grafo."""
+
+    topologia, hash_atributos = _assinaturas(session)
+    linhas = session.execute(
+        select(SegmentoDeVia.id, SegmentoDeVia.nome_rua, func.ST_AsBinary(SegmentoDeVia.geometria_linha))
+        .where(SegmentoDeVia.geometria_linha.isnot(None))
+        .order_by(SegmentoDeVia.id)
+    ).all()
+
+    geometrias = shapely.from_wkb([bytes(linha[2]) for linha in linhas]) if linhas else np.empty(0, dtype=object)
+    validas = shapely.get_num_coordinates(geometrias) >= 2
+    ids = np.array([linha[0] for linha in linhas], dtype="int64")[validas]
+    nomes = np.array([linha[1] for linha in linhas], dtype=object)[validas]
+    coordenadas, indice = shapely.get_coordinates(geometrias[validas], return_index=True)
+    deslocamentos = np.searchsorted(indice, np.arange(len(ids) + 1))
+
+    posicao_por_id = {int(identificador): posicao for posicao, identificador in enumerate(ids)}
+    atributos = _atributos_de_linhas(session.execute(select(*_COLUNAS_ATRIBUTOS)), posicao_por_id)
+    grafo = GrafoDeVias(ids, nomes, coordenadas, deslocamentos, atributos)
+    grafo.assinatura_topologia = topologia
+    grafo.assinatura_atributos = hash_atributos
+    return grafo
+
+
+def obter_grafo(session: Session) -> GrafoDeVias:
+    """Grafo da malha viária do processo, revalidado a cada ``INTERVALO_REVALIDACAO_S``.
+
+    Se só os atributos de custo mudaram (mesma contagem e maior id), relê
+    essas colunas e atualiza os custos no lugar; senão remonta o grafo.
+    """
+
+    global _grafo
+    grafo = _grafo
+    agora = time.monotonic()
+    if grafo is not None and agora - grafo.verificado_em < INTERVALO_REVALIDACAO_S:
+        return grafo
+
+    with _trava_grafo:
+        grafo = _grafo
+        if grafo is not None and agora - grafo.verificado_em < INTERVALO_REVALIDACAO_S:
+            return grafo
+        if grafo is None:
+            grafo = carregar_grafo(session)
+        else:
+            topologia, hash_atributos = _assinaturas(session)
+            if topologia != grafo.assinatura_topologia:
+                grafo = carregar_grafo(session)
+            elif hash_atributos != grafo.assinatura_atributos:
+                grafo.atualizar_atributos(
+                    _atributos_de_linhas(session.execute(select(*_COLUNAS_ATRIBUTOS)), grafo.posicao_por_id)
+                )
+                grafo.assinatura_atributos = hash_atributos
+        grafo.verificado_em = agora
+        _grafo = grafo
+        return grafo
+
+
+def limpar_grafo() -> None:
+    global _grafo
+    with _trava_grafo:
+        _grafo = None
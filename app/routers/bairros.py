@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+import json
+
+import numpy as np
+from fastapi import APIRouter, HTTPException, Request, Response, status
+
+from ..indice_bairros import obter_indice_bairros
+from ..schemas import BAIRRO_LOOKUP_MAX_POINTS, BairroLookupRequest, BairroLookupResponse
+
+router = APIRouter(prefix="/bairros", tags=["Bairros"])
+
+
+def _coordinate_arrays(raw: bytes):
+    """Parse the lookup body straight into float arrays.
+
+    Validating tens of thousands of floats one by one through pydantic costs
+    more than the lookup itself, so the body is checked in bulk with NumPy
+    against the same rules as ``BairroLookupRequest``.
+    """
+
+    try:
+        body = json.loads(raw)
+        latitudes = np.asarray(body["latitudes"], dtype="float64")
+        longitudes = np.asarray(body["longitudes"], dtype="float64")
+    except (ValueError, TypeError, KeyError) as exc:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=f"Corpo inválido: {exc}")
+
+    if latitudes.ndim != 1 or latitudes.shape != longitudes.shape:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="latitudes e longitudes devem ser listas do mesmo tamanho",
+        )
+    if not 1 <= len(latitudes) <= BAIRRO_LOOKUP_MAX_POINTS:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Envie entre 1 e {BAIRRO_LOOKUP_MAX_POINTS} pontos",
+        )
+    return latitudes, longitudes
+
+
+@router.post(
+    "/lookup",
+    response_model=BairroLookupResponse,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {"application/json": {"schema": BairroLookupRequest.schema()}},
+        }
+    },
+)
+async def lookup_bairros(request: Request) -> Response:
+    """Point-in-polygon lookup of many (lat, lng) pairs against the in-memory bairro index."""
+
+    latitudes, longitudes = _coordinate_arrays(await request.body())
+    index = obter_indice_bairros()
+    positions = index.localizar(longitudes, latitudes).tolist()
+
+    # Per-bairro lookup tables, plus a trailing None that position -1 picks up.
+    id_table = index.bairros["id"].astype(int).tolist() + [None]
+    name_table = index.nomes.tolist() + [None]
+    ais_table = [value or None for value in index.ais.tolist()] + [None]
+
+    body = {
+        "count": len(positions),
+        "matched": sum(position >= 0 for position in positions),
+        "ids": [id_table[position] for position in positions],
+        "names": [name_table[position] for position in positions],
+        "ais": [ais_table[position] for position in positions],
+    }
+    return Response(content=json.dumps(body, ensure_ascii=False), media_type="application/json")
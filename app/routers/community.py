@@ -1,12 +1,20 @@
-from datetime import datetime
-from typing import List
+import threading
+import time
+from bisect import bisect_right
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from geoalchemy2.elements import WKTElement
+from sqlalchemy import Integer, column, func, select, update, values
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID, aggregate_order_by, insert
 from sqlalchemy.orm import Session
 
+from ..bbox import BBOX_FORMAT, intersects_bbox, parse_bbox
 from ..database import get_db
+from ..pagination import NEXT_CURSOR_HEADER, Page, page_params, paginate, trim_page
 from ..models import Badge, Report, User, UserBadge
 from ..schemas import (
     BadgeCreate,
@@ -14,7 +22,10 @@ from ..schemas import (
     LeaderboardEntry,
     ReportCreate,
     ReportRead,
+    ReportValidateBatchRequest,
+    ReportValidateBatchResponse,
     ReportValidateRequest,
+    ReportValidationError,
 )
 
 router = APIRouter(prefix="/community", tags=["Community"])
@@ -27,14 +38,71 @@ def _point_from_latlon(latitude: float, longitude: float) -> WKTElement:
     return WKTElement(f"POINT({longitude} {latitude})", srid=4326)
 
 
-def _award_badges(session: Session, user: User) -> None:
-    badges = session.query(Badge).order_by(Badge.points_threshold).all()
-    owned_badge_ids = {badge.badge_id for badge in user.badges}
-    for badge in badges:
-        if badge.id in owned_badge_ids:
-            continue
-        if user.points >= badge.points_threshold:
-            session.add(UserBadge(user_id=user.id, badge_id=badge.id))
+BADGE_CATALOGUE_TTL_SECONDS = 60.0
+
+
+@dataclass
+class _BadgeCatalogue:
+    """Badge ids sorted by ``points_threshold``, with the thresholds alongside for bisecting."""
+
+    thresholds: List[int]
+    badge_ids: List[UUID]
+    loaded_at: float
+
+    def crossed(self, old_points: int, new_points: int) -> List[UUID]:
+        """Badges whose threshold lies in ``(old_points, new_points]``."""
+
+        start = bisect_right(self.thresholds, old_points)
+        return self.badge_ids[start: bisect_right(self.thresholds, new_points, lo=start)]
+
+
+_badge_catalogue: Optional[_BadgeCatalogue] = None
+_badge_catalogue_lock = threading.Lock()
+
+
+def _get_badge_catalogue(session: Session) -> _BadgeCatalogue:
+    """Cached catalogue; reloaded after ``create_badge`` or every ``BADGE_CATALOGUE_TTL_SECONDS``.
+
+    The periodic reload picks up badges created by other worker processes.
+    """
+
+    global _badge_catalogue
+    catalogue = _badge_catalogue
+    if catalogue is not None and time.monotonic() - catalogue.loaded_at < BADGE_CATALOGUE_TTL_SECONDS:
+        return catalogue
+    with _badge_catalogue_lock:
+        catalogue = _badge_catalogue
+        if catalogue is not None and time.monotonic() - catalogue.loaded_at < BADGE_CATALOGUE_TTL_SECONDS:
+            return catalogue
+        rows = session.execute(select(Badge.points_threshold, Badge.id).order_by(Badge.points_threshold)).all()
+        _badge_catalogue = _BadgeCatalogue(
+            thresholds=[threshold for threshold, _ in rows],
+            badge_ids=[badge_id for _, badge_id in rows],
+            loaded_at=time.monotonic(),
+        )
+        return _badge_catalogue
+
+
+def _invalidate_badge_catalogue() -> None:
+    global _badge_catalogue
+    with _badge_catalogue_lock:
+        _badge_catalogue = None
+
+
+def _award_badges(session: Session, point_changes: Dict[UUID, Tuple[int, int]]) -> None:
+    """Award every badge crossed by each ``user_id: (old_points, new_points)`` in one INSERT.
+
+    Badges already owned are skipped by the ``uq_user_badge`` constraint.
+    """
+
+    catalogue = _get_badge_catalogue(session)
+    awards = [
+        {"user_id": user_id, "badge_id": badge_id}
+        for user_id, (old_points, new_points) in point_changes.items()
+        for badge_id in catalogue.crossed(old_points, new_points)
+    ]
+    if awards:
+        session.execute(insert(UserBadge).values(awards).on_conflict_do_nothing(constraint="uq_user_badge"))
 
 
 @router.post("/reports", response_model=ReportRead, status_code=status.HTTP_201_CREATED)
@@ -91,32 +159,163 @@ def validate_report(
     report.points_awarded = payload.points
     report.validated_at = datetime.utcnow()
 
-    user.points += payload.points
-    _award_badges(session, user)
+    old_points = user.points or 0
+    user.points = old_points + payload.points
+    _award_badges(session, {user.id: (old_points, user.points)})
 
     session.commit()
     session.refresh(report)
     return report
 
 
-@router.get("/reports", response_model=List[ReportRead])
-def list_reports(session: Session = Depends(get_db)) -> List[Report]:
-    reports = session.query(Report).order_by(Report.created_at.desc()).all()
+def _naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    # ``created_at`` is stored as naive UTC.
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+@router.post("/reports/validate-batch", response_model=ReportValidateBatchResponse)
+def validate_reports(
+    payload: ReportValidateBatchRequest,
+    session: Session = Depends(get_db),
+) -> ReportValidateBatchResponse:
+    """Validate many reports in one transaction.
+
+    Reports that cannot be validated are skipped and listed in ``rejected``.
+    Points are summed per author and applied with a single UPDATE, and
+    badges are evaluated once per author.
+    """
+
+    validator = session.query(User).filter(User.id == payload.validator_id).one_or_none()
+    if not validator:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Validador não encontrado")
+
+    report_ids = [item.report_id for item in payload.items]
+    # Row locks keep a concurrent moderator from validating (and paying for) the same report twice.
+    reports = {
+        report.id: report
+        for report in session.execute(select(Report).where(Report.id.in_(report_ids)).with_for_update()).scalars()
+    }
+
+    validated_at = datetime.utcnow()
+    validated: List[Report] = []
+    rejected: List[ReportValidationError] = []
+    increments: Dict[UUID, int] = {}
+    seen = set()
+    for item in payload.items:
+        report = reports.get(item.report_id)
+        if item.report_id in seen:
+            error = "Relato repetido no lote"
+        elif report is None:
+            error = "Relato não encontrado"
+        elif report.is_valid:
+            error = "Relato já validado"
+        elif report.user_id == validator.id:
+            error = "Usuário não pode validar o próprio relato"
+        else:
+            error = None
+        seen.add(item.report_id)
+        if error:
+            rejected.append(ReportValidationError(report_id=item.report_id, error=error))
+            continue
+
+        report.is_valid = True
+        report.points_awarded = item.points
+        report.validated_at = validated_at
+        increments[report.user_id] = increments.get(report.user_id, 0) + item.points
+        validated.append(report)
+
+    if increments:
+        deltas = values(column("user_id", PG_UUID(as_uuid=True)), column("increment", Integer), name="deltas").data(
+            list(increments.items())
+        )
+        new_points = session.execute(
+            update(User)
+            .where(User.id == deltas.c.user_id)
+            .values(points=func.coalesce(User.points, 0) + deltas.c.increment)
+            .returning(User.id, User.points)
+            .execution_options(synchronize_session=False)
+        ).all()
+        _award_badges(
+            session, {user_id: (points - increments[user_id], points) for user_id, points in new_points}
+        )
+
+    # Serialise before committing so the expired reports are not reloaded one by one.
+    response = ReportValidateBatchResponse(
+        validated=[ReportRead.from_orm(report) for report in validated],
+        rejected=rejected,
+    )
+    session.commit()
+    return response
+
+
+@router.get(
+    "/reports",
+    response_model=List[ReportRead],
+    description="Newest first, one page at a time; follow the X-Next-Cursor header.",
+)
+def list_reports(
+    response: Response,
+    since: Optional[datetime] = Query(None, description="Only reports created at or after this instant."),
+    until: Optional[datetime] = Query(None, description="Only reports created before this instant."),
+    bbox: Optional[str] = Query(None, description=BBOX_FORMAT),
+    is_valid: Optional[bool] = Query(None, description="false gives the moderation queue."),
+    user_id: Optional[UUID] = None,
+    page: Page = Depends(page_params),
+    session: Session = Depends(get_db),
+) -> List[Report]:
+    since, until = _naive_utc(since), _naive_utc(until)
+    if since is not None and until is not None and since >= until:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="since deve ser anterior a until")
+
+    conditions = []
+    if since is not None:
+        conditions.append(Report.created_at >= since)
+    if until is not None:
+        conditions.append(Report.created_at < until)
+    if bbox is not None:
+        conditions.append(intersects_bbox(Report.location, parse_bbox(bbox)))
+    if is_valid is not None:
+        conditions.append(Report.is_valid == is_valid)
+    if user_id is not None:
+        conditions.append(Report.user_id == user_id)
+
+    statement = paginate(select(Report).where(*conditions), Report, page)
+    reports, next_cursor = trim_page(session.execute(statement).scalars().all(), page)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
     return reports
 
 
 @router.get("/leaderboard", response_model=List[LeaderboardEntry])
 def leaderboard(session: Session = Depends(get_db), limit: int = 10) -> List[LeaderboardEntry]:
+    """Top users by points with their badge names, in a single query.
+
+    The ranking is read from the ``(points, id)`` index, which every points
+    update keeps current, so only ``limit`` users are visited.
+    """
+
     limit = min(max(limit, 1), 50)
-    users = session.query(User).order_by(User.points.desc()).limit(limit).all()
+    top = (
+        select(User.id, User.name, User.points)
+        .order_by(User.points.desc(), User.id.desc())
+        .limit(limit)
+        .subquery()
+    )
+    badge_names = func.array_remove(func.array_agg(aggregate_order_by(Badge.name, Badge.points_threshold)), None)
+    rows = session.execute(
+        select(top.c.id, top.c.name, top.c.points, badge_names)
+        .outerjoin(UserBadge, UserBadge.user_id == top.c.id)
+        .outerjoin(Badge, Badge.id == UserBadge.badge_id)
+        .group_by(top.c.id, top.c.name, top.c.points)
+        .order_by(top.c.points.desc(), top.c.id.desc())
+    ).all()
 
-    leaderboard_entries: List[LeaderboardEntry] = []
-    for user in users:
-        badges = [entry.badge.name for entry in user.badges]
-        leaderboard_entries.append(
-            LeaderboardEntry(user_id=user.id, name=user.name, points=user.points, badges=badges)
-        )
-    return leaderboard_entries
+    return [
+        LeaderboardEntry(user_id=user_id, name=name, points=points, badges=badges or [])
+        for user_id, name, points, badges in rows
+    ]
 
 
 @router.post("/badges", response_model=BadgeRead, status_code=status.HTTP_201_CREATED)
@@ -133,6 +332,7 @@ def create_badge(payload: BadgeCreate, session: Session = Depends(get_db)) -> Ba
     session.add(badge)
     session.commit()
     session.refresh(badge)
+    _invalidate_badge_catalogue()
     return badge
 
 
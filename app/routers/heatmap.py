@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from enum import Enum
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from .. import mapa_calor
+from ..database import get_db
+from ..schemas import HeatmapCell, HeatmapResponse
+
+router = APIRouter(prefix="/heatmap", tags=["Heat Map"])
+
+
+class HeatmapSource(str, Enum):
+    eventos = "eventos"
+    chamados = "chamados"
+
+
+def _naive(value: Optional[datetime]) -> Optional[datetime]:
+    """Stored timestamps are naive UTC; drop tzinfo after converting to UTC."""
+
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+@router.get("/hexagons", response_model=HeatmapResponse)
+def hexagon_heatmap(
+    source: HeatmapSource = Query(HeatmapSource.eventos),
+    resolution_meters: float = Query(500, ge=100, le=5000, description="Raio circunscrito de cada hexágono."),
+    start: Optional[datetime] = Query(None),
+    end: Optional[datetime] = Query(None),
+    natureza_crime: Optional[str] = Query(None, max_length=255),
+    session: Session = Depends(get_db),
+) -> HeatmapResponse:
+    start, end = _naive(start), _naive(end)
+    if start and end and start > end:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Data inicial posterior à data final")
+
+    natureza = natureza_crime.strip().upper() if natureza_crime and natureza_crime.strip() else None
+    parameters = (resolution_meters, start, end, natureza)
+
+    try:
+        if source is HeatmapSource.eventos:
+            key = (source.value, mapa_calor.versao_eventos(session), parameters)
+            grid = mapa_calor.obter_grade_em_cache(
+                key, lambda: mapa_calor.agregar_eventos(session, resolution_meters, start, end, natureza)
+            )
+        else:
+            key = (source.value, mapa_calor.versao_chamados(), parameters)
+            grid = mapa_calor.obter_grade_em_cache(
+                key, lambda: mapa_calor.agregar_chamados(resolution_meters, start, end, natureza)
+            )
+    except (OSError, SQLAlchemyError) as exc:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"Fonte de dados indisponível: {exc}",
+        )
+
+    cells = [
+        HeatmapCell(latitude=round(float(lat), 6), longitude=round(float(lng), 6), count=int(count))
+        for lat, lng, count in zip(grid.latitudes, grid.longitudes, grid.contagens)
+    ]
+    return HeatmapResponse(
+        source=source.value,
+        resolution_meters=resolution_meters,
+        total=grid.total,
+        cells=cells,
+    )
@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+from typing import List, Optional
+
+import numpy as np
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from .. import superficie_risco
+from ..config import get_settings
+from ..database import get_db
+from ..etag import etag_confere
+from ..schemas import RiskSample, RiskSampleRequest
+
+router = APIRouter(prefix="/risk", tags=["Risk Surface"])
+settings = get_settings()
+
+
+def _resolve_period(period: str) -> str:
+    if period not in superficie_risco.PERIODOS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Período inválido. Use um de: {', '.join(superficie_risco.PERIODOS)}",
+        )
+    return period
+
+
+def _current_surface(session: Session) -> superficie_risco.SuperficieRisco:
+    try:
+        return superficie_risco.obter_superficie(session, settings.risk_surface_dir)
+    except SQLAlchemyError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"Fonte de dados indisponível: {exc}",
+        )
+
+
+def _surface_response(
+    request: Request,
+    surface: superficie_risco.SuperficieRisco,
+    media_type: str,
+    render,
+    extra_headers: Optional[dict] = None,
+) -> Response:
+    """Render ``surface`` with its version as a strong ETag, answering 304 when the client already has it."""
+
+    headers = {"ETag": f'"risco-{surface.versao}"', "Cache-Control": "no-cache", **(extra_headers or {})}
+    if etag_confere(request.headers.get("if-none-match"), headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    return Response(content=render(), media_type=media_type, headers=headers)
+
+
+@router.get("/sample", response_model=RiskSample)
+def sample_risk(
+    latitude: float = Query(..., alias="lat", ge=-90, le=90),
+    longitude: float = Query(..., alias="lng", ge=-180, le=180),
+    period: str = Query(superficie_risco.PERIODO_TODOS),
+    session: Session = Depends(get_db),
+) -> RiskSample:
+    period = _resolve_period(period)
+    density, risk = _current_surface(session).amostrar([latitude], [longitude], period)
+    return RiskSample(latitude=latitude, longitude=longitude, density=float(density[0]), risk=float(risk[0]))
+
+
+@router.post("/sample", response_model=List[RiskSample])
+def sample_risk_batch(payload: RiskSampleRequest, session: Session = Depends(get_db)) -> List[RiskSample]:
+    period = _resolve_period(payload.period)
+    latitudes = np.array([point.latitude for point in payload.points])
+    longitudes = np.array([point.longitude for point in payload.points])
+    densities, risks = _current_surface(session).amostrar(latitudes, longitudes, period)
+    return [
+        RiskSample(latitude=lat, longitude=lng, density=float(density), risk=float(risk))
+        for lat, lng, density, risk in zip(latitudes, longitudes, densities, risks)
+    ]
+
+
+@router.get("/raster.npy")
+def risk_raster(
+    request: Request,
+    period: str = Query(superficie_risco.PERIODO_TODOS),
+    session: Session = Depends(get_db),
+) -> Response:
+    """Full-resolution grid as a NumPy ``.npy`` file; row 0 is the southern edge."""
+
+    period = _resolve_period(period)
+    surface = _current_surface(session)
+    west, south, east, north = surface.limites
+    return _surface_response(
+        request,
+        surface,
+        "application/octet-stream",
+        lambda: superficie_risco.raster_npy(surface, period),
+        {"X-Raster-Bounds": f"{west},{south},{east},{north}"},
+    )
+
+
+@router.get("/tiles/{z}/{x}/{y}.png")
+def risk_tile(
+    z: int,
+    x: int,
+    y: int,
+    request: Request,
+    period: str = Query(superficie_risco.PERIODO_TODOS),
+    session: Session = Depends(get_db),
+) -> Response:
+    period = _resolve_period(period)
+    if not (0 <= z <= 22 and 0 <= x < 2 ** z and 0 <= y < 2 ** z):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Coordenadas de tile inválidas")
+
+    surface = _current_surface(session)
+    return _surface_response(request, surface, "image/png", lambda: superficie_risco.tile_png(surface, period, z, x, y))
@@ -1,24 +1,44 @@
 from __future__ import annotations
 
+import io
+import tempfile
 from dataclasses import dataclass
-from math import cos, radians, sqrt
-from typing import List
+from typing import List, Optional, Tuple
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+import numpy as np
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from geoalchemy2 import Geography
 from geoalchemy2.elements import WKTElement
+from sqlalchemy import cast, func, select
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 
+from .. import cache_rotas, grade_cobertura, importacao_pontos, pontos_seguranca, roteamento_seguro, superficie_risco
+from ..bbox import BBOX_FORMAT, check_bounds, intersects_bbox, parse_bbox
+from ..config import get_settings
 from ..database import get_db
+from ..pagination import NEXT_CURSOR_HEADER, Page, page_params, paginate, trim_page
 from ..models import Camera, LightingSpot
 from ..schemas import (
     CameraCreate,
     FeatureResponse,
+    ImportResult,
     LightingCreate,
+    RouteScore,
+    RouteScoreBatchRequest,
+    RouteScoreBatchResponse,
+    RouteSegment,
     RouteSuggestionResponse,
+    SafeRouteResponse,
+    SafeRouteSegment,
 )
 
 router = APIRouter(prefix="/safety", tags=["Safety Planning"])
+settings = get_settings()
 
 
 @dataclass
@@ -43,17 +63,6 @@ def _point_from_latlon(latitude: float, longitude: float) -> WKTElement:
     return WKTElement(f"POINT({longitude} {latitude})", srid=4326)
 
 
-def _distance(a_lat: float, a_lon: float, b_lat: float, b_lon: float) -> float:
-    """Approximate distance between two lat/lon points in meters (Haversine simplified)."""
-
-    # Using a simplified equirectangular approximation for short distances
-    lat_rad = radians((a_lat + b_lat) / 2.0)
-    x = (radians(b_lon - a_lon)) * cos(lat_rad)
-    y = radians(b_lat - a_lat)
-    earth_radius = 6371000
-    return sqrt(x * x + y * y) * earth_radius
-
-
 def _feature_from_model(model) -> GeoFeature:
     return GeoFeature(
         id=model.id,
@@ -64,10 +73,176 @@ def _feature_from_model(model) -> GeoFeature:
     )
 
 
-def _coverage_score(cameras: List[GeoFeature], lighting_spots: List[GeoFeature]) -> float:
-    if not cameras and not lighting_spots:
-        return 0.0
-    return min(1.0, (len(cameras) * 0.6 + len(lighting_spots) * 0.4) / 10)
+def _coverage_score(camera_count, lighting_count):
+    """Coverage heuristic; accepts scalars or per-segment arrays of counts."""
+
+    return np.minimum(1.0, (np.asarray(camera_count) * 0.6 + np.asarray(lighting_count) * 0.4) / 10)
+
+
+def _length_weighted_mean(values, lengths, groups, group_count: int) -> np.ndarray:
+    """Per-group mean of ``values`` weighted by ``lengths`` (plain mean for zero-length groups)."""
+
+    totals = np.bincount(groups, weights=lengths, minlength=group_count)
+    weights = np.where(totals[groups] > 0, lengths, 1.0)
+    return np.bincount(groups, weights=values * weights, minlength=group_count) / np.bincount(
+        groups, weights=weights, minlength=group_count
+    )
+
+
+_COVERAGE_DESCRIPTION = (
+    "coverage_score depends on SAFETY_ENGINE. With 'memoria' each segment is scored from the coverage grid "
+    "sampled along it (cameras and lighting within radius_meters of each point), so long segments are not "
+    "credited for points clustered at one end. With 'postgis' each segment is scored from the total counts "
+    "in its corridor. Scores are comparable within one deployment, not across engines."
+)
+
+
+def _segment_coverage(session: Session, segments, camera_counts, lighting_counts, radius_meters: float):
+    """Coverage score of each segment.
+
+    With the in-memory engine it is the length-weighted mean of the coverage
+    grid sampled every cell along the segment; the postgis engine scores the
+    corridor counts directly. The grid is built from the in-memory layers,
+    which the postgis engine exists to avoid loading, so the two engines give
+    different scores for the same route (see ``_COVERAGE_DESCRIPTION``).
+    """
+
+    if settings.safety_engine == pontos_seguranca.MOTOR_POSTGIS:
+        return _coverage_score(camera_counts, lighting_counts)
+    grid = grade_cobertura.obter_grade(session, radius_meters)
+    sample_segments, sample_lengths, cameras, lighting = grid.contagens_nos_segmentos(segments)
+    return _length_weighted_mean(
+        _coverage_score(cameras, lighting), sample_lengths, sample_segments, len(segments)
+    )
+
+
+def _responses_from_layer(layer: pontos_seguranca.CamadaDePontos, positions) -> List[FeatureResponse]:
+    return [
+        FeatureResponse(
+            id=layer.ids[position],
+            name=layer.nomes[position],
+            description=layer.descricoes[position],
+            latitude=layer.latitudes[position],
+            longitude=layer.longitudes[position],
+        )
+        for position in positions
+    ]
+
+
+@dataclass
+class AreaFilter:
+    """Optional radius and/or bounding-box restriction for the listing endpoints."""
+
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+    radius_meters: Optional[float] = None
+    min_latitude: Optional[float] = None
+    min_longitude: Optional[float] = None
+    max_latitude: Optional[float] = None
+    max_longitude: Optional[float] = None
+
+    @property
+    def has_radius(self) -> bool:
+        return self.radius_meters is not None
+
+    @property
+    def has_bbox(self) -> bool:
+        return self.min_latitude is not None
+
+
+def _area_filter(
+    latitude: Optional[float] = Query(None, alias="lat", ge=-90, le=90),
+    longitude: Optional[float] = Query(None, alias="lng", ge=-180, le=180),
+    radius_meters: Optional[float] = Query(None, gt=0, le=50000),
+    min_latitude: Optional[float] = Query(None, alias="min_lat", ge=-90, le=90),
+    min_longitude: Optional[float] = Query(None, alias="min_lng", ge=-180, le=180),
+    max_latitude: Optional[float] = Query(None, alias="max_lat", ge=-90, le=90),
+    max_longitude: Optional[float] = Query(None, alias="max_lng", ge=-180, le=180),
+    bbox: Optional[str] = Query(
+        None, description=f"{BBOX_FORMAT} (same as the four separate bounds)."
+    ),
+) -> AreaFilter:
+    radius = (latitude, longitude, radius_meters)
+    if any(value is not None for value in radius) and any(value is None for value in radius):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Informe lat, lng e radius_meters juntos",
+        )
+    bounds = (min_latitude, min_longitude, max_latitude, max_longitude)
+    if bbox is not None:
+        if any(value is not None for value in bounds):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Use bbox ou min_lat/min_lng/max_lat/max_lng, não os dois",
+            )
+        min_longitude, min_latitude, max_longitude, max_latitude = parse_bbox(bbox)
+        bounds = (min_latitude, min_longitude, max_latitude, max_longitude)
+    if any(value is not None for value in bounds):
+        if any(value is None for value in bounds):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Informe min_lat, min_lng, max_lat e max_lng juntos",
+            )
+        check_bounds(min_longitude, min_latitude, max_longitude, max_latitude)
+    return AreaFilter(latitude, longitude, radius_meters, min_latitude, min_longitude, max_latitude, max_longitude)
+
+
+def _geography_point(latitude: float, longitude: float):
+    return cast(func.ST_SetSRID(func.ST_MakePoint(longitude, latitude), 4326), Geography(srid=4326))
+
+
+def _within_radius(model, latitude: float, longitude: float, radius_meters: float):
+    """``ST_DWithin`` over the GiST-indexed geography column."""
+
+    return func.ST_DWithin(model.location, _geography_point(latitude, longitude), radius_meters)
+
+
+def _area_conditions(model, area: AreaFilter) -> list:
+    conditions = []
+    if area.has_radius:
+        conditions.append(_within_radius(model, area.latitude, area.longitude, area.radius_meters))
+    if area.has_bbox:
+        bounds = (area.min_longitude, area.min_latitude, area.max_longitude, area.max_latitude)
+        conditions.append(intersects_bbox(model.location, bounds))
+    return conditions
+
+
+FEATURE_FIELDS = ("id", "name", "description", "latitude", "longitude")
+
+
+def _field_projection(
+    fields: Optional[str] = Query(None, description=f"Comma-separated subset of: {', '.join(FEATURE_FIELDS)}."),
+) -> Tuple[str, ...]:
+    if fields is None:
+        return FEATURE_FIELDS
+    selected = tuple(dict.fromkeys(field.strip() for field in fields.split(",") if field.strip()))
+    unknown = [field for field in selected if field not in FEATURE_FIELDS]
+    if unknown or not selected:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Campos inválidos: {', '.join(unknown) or fields}. Use: {', '.join(FEATURE_FIELDS)}",
+        )
+    return selected
+
+
+def _list_features(session: Session, model, area: AreaFilter, page: Page, fields: Tuple[str, ...], response: Response):
+    """One keyset page of ``model`` rows inside ``area``, selecting only the requested columns."""
+
+    columns = {field: getattr(model, field) for field in fields}
+    columns.setdefault("id", model.id)
+    columns["created_at"] = model.created_at
+    statement = select(*(column.label(name) for name, column in columns.items())).where(*_area_conditions(model, area))
+    rows, next_cursor = trim_page(session.execute(paginate(statement, model, page)).all(), page)
+
+    if fields == FEATURE_FIELDS:
+        if next_cursor:
+            response.headers[NEXT_CURSOR_HEADER] = next_cursor
+        return [FeatureResponse(**{field: row._mapping[field] for field in fields}) for row in rows]
+    # Partial rows skip the response model; serialise them directly.
+    return JSONResponse(
+        jsonable_encoder([{field: row._mapping[field] for field in fields} for row in rows]),
+        headers={NEXT_CURSOR_HEADER: next_cursor} if next_cursor else None,
+    )
 
 
 @router.post("/cameras", response_model=FeatureResponse, status_code=status.HTTP_201_CREATED)
@@ -82,6 +257,8 @@ def register_camera(payload: CameraCreate, session: Session = Depends(get_db)) -
     session.add(camera)
     session.commit()
     session.refresh(camera)
+    pontos_seguranca.registrar_ponto(camera)
+    cache_rotas.cache_de_rotas.invalidar_ponto(camera.latitude, camera.longitude)
     return _feature_from_model(camera).to_response()
 
 
@@ -97,55 +274,393 @@ def register_lighting(payload: LightingCreate, session: Session = Depends(get_db
     session.add(lighting)
     session.commit()
     session.refresh(lighting)
+    pontos_seguranca.registrar_ponto(lighting)
+    cache_rotas.cache_de_rotas.invalidar_ponto(lighting.latitude, lighting.longitude)
     return _feature_from_model(lighting).to_response()
 
 
-@router.get("/cameras", response_model=List[FeatureResponse])
-def list_cameras(session: Session = Depends(get_db)) -> List[FeatureResponse]:
-    cameras = session.query(Camera).order_by(Camera.created_at.desc()).all()
-    return [_feature_from_model(camera).to_response() for camera in cameras]
+@router.get(
+    "/cameras",
+    response_model=List[FeatureResponse],
+    description="Newest first, one page at a time; follow the X-Next-Cursor header. "
+    "With `fields`, only those keys are returned.",
+)
+def list_cameras(
+    response: Response,
+    area: AreaFilter = Depends(_area_filter),
+    page: Page = Depends(page_params),
+    fields: Tuple[str, ...] = Depends(_field_projection),
+    session: Session = Depends(get_db),
+):
+    return _list_features(session, Camera, area, page, fields, response)
+
+
+@router.get(
+    "/lighting",
+    response_model=List[FeatureResponse],
+    description="Newest first, one page at a time; follow the X-Next-Cursor header. "
+    "With `fields`, only those keys are returned.",
+)
+def list_lighting(
+    response: Response,
+    area: AreaFilter = Depends(_area_filter),
+    page: Page = Depends(page_params),
+    fields: Tuple[str, ...] = Depends(_field_projection),
+    session: Session = Depends(get_db),
+):
+    return _list_features(session, LightingSpot, area, page, fields, response)
+
+
+IMPORT_SPOOL_BYTES = 16 * 1024 * 1024
+
+
+async def _import_features(request: Request, model, file_format: Optional[str], session: Session) -> ImportResult:
+    """Spool the raw body (CSV or GeoJSON) and bulk-insert it in batches off the event loop."""
+
+    if file_format is None:
+        is_json = "json" in request.headers.get("content-type", "")
+        file_format = importacao_pontos.FORMATO_GEOJSON if is_json else importacao_pontos.FORMATO_CSV
+
+    with tempfile.SpooledTemporaryFile(max_size=IMPORT_SPOOL_BYTES) as buffer:
+        async for chunk in request.stream():
+            buffer.write(chunk)
+        buffer.seek(0)
+        text = io.TextIOWrapper(buffer, encoding="utf-8-sig")
+        try:
+            result = await run_in_threadpool(importacao_pontos.importar_pontos, session, model, text, file_format)
+        except ValueError as exc:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Arquivo inválido: {exc}")
+        except SQLAlchemyError as exc:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail=f"Fonte de dados indisponível: {exc}",
+            )
+
+    pontos_seguranca.descartar_camada(model)
+    cache_rotas.cache_de_rotas.limpar()
+    return ImportResult(
+        inserted=result.inseridos,
+        rejected=result.rejeitados,
+        errors=result.erros,
+        errors_truncated=result.erros_truncados,
+    )
+
+
+_IMPORT_DESCRIPTION = (
+    "Send the file as the raw request body: CSV with name, description, latitude, longitude columns, "
+    "or a GeoJSON FeatureCollection of points. Invalid rows are skipped and reported."
+)
+
+
+@router.post("/cameras/import", response_model=ImportResult, description=_IMPORT_DESCRIPTION)
+async def import_cameras(
+    request: Request,
+    file_format: Optional[str] = Query(None, alias="format", regex="^(csv|geojson)$"),
+    session: Session = Depends(get_db),
+) -> ImportResult:
+    return await _import_features(request, Camera, file_format, session)
+
 
+@router.post("/lighting/import", response_model=ImportResult, description=_IMPORT_DESCRIPTION)
+async def import_lighting(
+    request: Request,
+    file_format: Optional[str] = Query(None, alias="format", regex="^(csv|geojson)$"),
+    session: Session = Depends(get_db),
+) -> ImportResult:
+    return await _import_features(request, LightingSpot, file_format, session)
+
+
+def _path_from_query(
+    origin_latitude: Optional[float],
+    origin_longitude: Optional[float],
+    destination_latitude: Optional[float],
+    destination_longitude: Optional[float],
+    polyline: Optional[str],
+):
+    if polyline:
+        try:
+            latitudes, longitudes = pontos_seguranca.decodificar_polyline(polyline)
+        except ValueError as exc:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
+        if len(latitudes) < 2:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="A polyline precisa de ao menos 2 pontos",
+            )
+        return latitudes, longitudes
+
+    endpoints = (origin_latitude, origin_longitude, destination_latitude, destination_longitude)
+    if any(value is None for value in endpoints):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Informe origem e destino ou uma polyline",
+        )
+    return np.array([origin_latitude, destination_latitude]), np.array([origin_longitude, destination_longitude])
 
-@router.get("/lighting", response_model=List[FeatureResponse])
-def list_lighting(session: Session = Depends(get_db)) -> List[FeatureResponse]:
-    spots = session.query(LightingSpot).order_by(LightingSpot.created_at.desc()).all()
-    return [_feature_from_model(spot).to_response() for spot in spots]
 
+def _corridor_layer_from_db(session: Session, model, paths, radius_meters: float):
+    """Rows within ``radius_meters`` of any of the paths (one ST_DWithin), as a throwaway layer."""
 
-@router.get("/route", response_model=RouteSuggestionResponse)
+    lines = ", ".join(
+        "(" + ", ".join(f"{longitude} {latitude}" for latitude, longitude in zip(latitudes, longitudes)) + ")"
+        for latitudes, longitudes in paths
+    )
+    geometry = cast(WKTElement(f"MULTILINESTRING({lines})", srid=4326), Geography(srid=4326))
+    rows = session.execute(
+        select(model.id, model.name, model.description, model.latitude, model.longitude).where(
+            func.ST_DWithin(model.location, geometry, radius_meters)
+        )
+    ).all()
+    return pontos_seguranca.CamadaDePontos([tuple(row) for row in rows])
+
+
+def _corridor_layers(session: Session, paths, radius_meters: float):
+    """Camera and lighting layers to match against the corridors of ``paths``."""
+
+    if settings.safety_engine == pontos_seguranca.MOTOR_POSTGIS:
+        return (
+            _corridor_layer_from_db(session, Camera, paths, radius_meters),
+            _corridor_layer_from_db(session, LightingSpot, paths, radius_meters),
+        )
+    return pontos_seguranca.obter_camada(session, Camera), pontos_seguranca.obter_camada(session, LightingSpot)
+
+
+def _inventory_version(session: Session) -> Optional[Tuple[int, int]]:
+    """Load generation of the in-memory layers; ``None`` for the postgis engine."""
+
+    if settings.safety_engine == pontos_seguranca.MOTOR_POSTGIS:
+        return None
+    return (
+        pontos_seguranca.obter_camada(session, Camera).geracao,
+        pontos_seguranca.obter_camada(session, LightingSpot).geracao,
+    )
+
+
+@router.get("/route", response_model=RouteSuggestionResponse, description=_COVERAGE_DESCRIPTION)
 def suggest_route(
-    origin_latitude: float = Query(..., alias="origin_lat"),
-    origin_longitude: float = Query(..., alias="origin_lng"),
-    destination_latitude: float = Query(..., alias="destination_lat"),
-    destination_longitude: float = Query(..., alias="destination_lng"),
+    origin_latitude: Optional[float] = Query(None, alias="origin_lat", ge=-90, le=90),
+    origin_longitude: Optional[float] = Query(None, alias="origin_lng", ge=-180, le=180),
+    destination_latitude: Optional[float] = Query(None, alias="destination_lat", ge=-90, le=90),
+    destination_longitude: Optional[float] = Query(None, alias="destination_lng", ge=-180, le=180),
     radius_meters: float = Query(250, ge=50, le=1000),
+    polyline: Optional[str] = Query(
+        None,
+        max_length=50000,
+        description="Encoded polyline (precision 5) of the path; replaces the straight origin-destination line.",
+    ),
+    segment_meters: float = Query(pontos_seguranca.TAMANHO_SEGMENTO_M, ge=50, le=2000),
     session: Session = Depends(get_db),
 ) -> RouteSuggestionResponse:
-    origin = (origin_latitude, origin_longitude)
-    destination = (destination_latitude, destination_longitude)
+    """Coverage along a corridor of ``radius_meters`` around the path, scored per segment.
 
-    cameras = session.query(Camera).all()
-    lighting_spots = session.query(LightingSpot).all()
+    For origin-destination requests the candidate cameras and lighting spots
+    are cached per pair of snapped grid cells (see ``cache_rotas``); the
+    segments and the exact corridor match always use the caller's coordinates.
+    """
 
-    def within_radius(feature: GeoFeature) -> bool:
-        return (
-            _distance(feature.latitude, feature.longitude, *origin) <= radius_meters
-            or _distance(feature.latitude, feature.longitude, *destination) <= radius_meters
-        )
+    latitudes, longitudes = _path_from_query(
+        origin_latitude, origin_longitude, destination_latitude, destination_longitude, polyline
+    )
+    layers = None if polyline else _cached_candidates(session, latitudes, longitudes, radius_meters)
+    return _route_suggestion(session, latitudes, longitudes, radius_meters, segment_meters, layers)
+
+
+def _corridor_candidates(session: Session, latitudes, longitudes, radius_meters: float):
+    """Camera and lighting points within ``radius_meters`` of the path, as small layers."""
+
+    camera_layer, lighting_layer = _corridor_layers(session, [(latitudes, longitudes)], radius_meters)
+    if settings.safety_engine == pontos_seguranca.MOTOR_POSTGIS:
+        return camera_layer, lighting_layer
+    segments = pontos_seguranca.segmentar_caminho(latitudes, longitudes)
+    return tuple(
+        layer.subconjunto(np.unique(pontos_seguranca.pontos_no_corredor(layer, segments, radius_meters)[1]))
+        for layer in (camera_layer, lighting_layer)
+    )
 
-    camera_features = [_feature_from_model(camera) for camera in cameras]
-    lighting_features = [_feature_from_model(spot) for spot in lighting_spots]
 
-    filtered_cameras = [feature.to_response() for feature in camera_features if within_radius(feature)]
-    filtered_lighting = [feature.to_response() for feature in lighting_features if within_radius(feature)]
+def _cached_candidates(session: Session, latitudes, longitudes, radius_meters: float):
+    """Candidate layers for an origin-destination pair, shared by every request between the same cells."""
 
-    score = _coverage_score(
-        [feature for feature in camera_features if within_radius(feature)],
-        [feature for feature in lighting_features if within_radius(feature)],
+    origin_cell = cache_rotas.celula(latitudes[0], longitudes[0])
+    destination_cell = cache_rotas.celula(latitudes[-1], longitudes[-1])
+    cache_key = (origin_cell, destination_cell, radius_meters, _inventory_version(session))
+    layers = cache_rotas.cache_de_rotas.obter(cache_key)
+    if layers is None:
+        mark = cache_rotas.cache_de_rotas.marca()
+        centre_latitudes, centre_longitudes = (
+            np.array(values)
+            for values in zip(cache_rotas.centro_da_celula(origin_cell), cache_rotas.centro_da_celula(destination_cell))
+        )
+        reach = cache_rotas.alcance_dos_candidatos(radius_meters)
+        layers = _corridor_candidates(session, centre_latitudes, centre_longitudes, reach)
+        cells = cache_rotas.celulas_do_corredor(centre_latitudes, centre_longitudes, reach)
+        cache_rotas.cache_de_rotas.guardar(cache_key, layers, cells, mark)
+    return layers
+
+
+def _route_suggestion(
+    session: Session, latitudes, longitudes, radius_meters: float, segment_meters: float, layers=None
+) -> RouteSuggestionResponse:
+    camera_layer, lighting_layer = layers or _corridor_layers(session, [(latitudes, longitudes)], radius_meters)
+    segments = pontos_seguranca.segmentar_caminho(latitudes, longitudes, segment_meters)
+    camera_segments, camera_positions = pontos_seguranca.pontos_no_corredor(camera_layer, segments, radius_meters)
+    lighting_segments, lighting_positions = pontos_seguranca.pontos_no_corredor(
+        lighting_layer, segments, radius_meters
     )
 
+    camera_counts = np.bincount(camera_segments, minlength=len(segments))
+    lighting_counts = np.bincount(lighting_segments, minlength=len(segments))
+    segment_scores = _segment_coverage(session, segments, camera_counts, lighting_counts, radius_meters)
+    lengths = segments.comprimentos_m
+    total_length = float(lengths.sum())
+    score = float(np.average(segment_scores, weights=lengths)) if total_length > 0 else float(segment_scores.max())
+
     return RouteSuggestionResponse(
-        cameras=filtered_cameras,
-        lighting_spots=filtered_lighting,
+        cameras=_responses_from_layer(camera_layer, np.unique(camera_positions)),
+        lighting_spots=_responses_from_layer(lighting_layer, np.unique(lighting_positions)),
         coverage_score=round(score, 2),
+        length_meters=round(total_length, 1),
+        segments=[
+            RouteSegment(
+                start_latitude=float(segments.latitudes_inicio[i]),
+                start_longitude=float(segments.longitudes_inicio[i]),
+                end_latitude=float(segments.latitudes_fim[i]),
+                end_longitude=float(segments.longitudes_fim[i]),
+                length_meters=round(float(lengths[i]), 1),
+                cameras=int(camera_counts[i]),
+                lighting_spots=int(lighting_counts[i]),
+                coverage_score=round(float(segment_scores[i]), 2),
+            )
+            for i in range(len(segments))
+        ],
+    )
+
+
+@router.post("/route/score-batch", response_model=RouteScoreBatchResponse, description=_COVERAGE_DESCRIPTION)
+def score_routes(payload: RouteScoreBatchRequest, session: Session = Depends(get_db)) -> RouteScoreBatchResponse:
+    """Score many candidate routes in one pass and rank them, safest first.
+
+    All routes are segmented together and matched against the camera and
+    lighting layers and the risk surface with a single vectorized lookup each.
+    """
+
+    if payload.period not in superficie_risco.PERIODOS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Período inválido. Use um de: {', '.join(superficie_risco.PERIODOS)}",
+        )
+
+    paths = []
+    for index, polyline in enumerate(payload.polylines):
+        try:
+            latitudes, longitudes = pontos_seguranca.decodificar_polyline(polyline, payload.precision)
+        except ValueError as exc:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Polyline {index} inválida: {exc}")
+        if len(latitudes) < 2:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"A polyline {index} precisa de ao menos 2 pontos",
+            )
+        paths.append((latitudes, longitudes))
+
+    camera_layer, lighting_layer = _corridor_layers(session, paths, payload.radius_meters)
+    try:
+        surface = superficie_risco.obter_superficie(session, settings.risk_surface_dir)
+    except SQLAlchemyError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"Fonte de dados indisponível: {exc}",
+        )
+
+    route_count = len(paths)
+    segments, route_of_segment = pontos_seguranca.segmentar_caminhos(paths, payload.segment_meters)
+    lengths = segments.comprimentos_m
+    route_lengths = np.bincount(route_of_segment, weights=lengths, minlength=route_count)
+
+    def corridor_counts(layer):
+        hits, positions = pontos_seguranca.pontos_no_corredor(layer, segments, payload.radius_meters)
+        per_segment = np.bincount(hits, minlength=len(segments))
+        base = int(positions.max(initial=0)) + 1
+        routes = np.unique(route_of_segment[hits] * base + positions) // base
+        return per_segment, np.bincount(routes, minlength=route_count)
+
+    camera_counts, route_cameras = corridor_counts(camera_layer)
+    lighting_counts, route_lighting = corridor_counts(lighting_layer)
+    segment_scores = _segment_coverage(session, segments, camera_counts, lighting_counts, payload.radius_meters)
+    coverage = _length_weighted_mean(segment_scores, lengths, route_of_segment, route_count)
+
+    _, risks = surface.amostrar(
+        (segments.latitudes_inicio + segments.latitudes_fim) / 2,
+        (segments.longitudes_inicio + segments.longitudes_fim) / 2,
+        payload.period,
+    )
+    mean_risk = _length_weighted_mean(risks, lengths, route_of_segment, route_count)
+    max_risk = np.zeros(route_count)
+    np.maximum.at(max_risk, route_of_segment, risks)
+
+    safety_scores = 0.5 * coverage + 0.5 * (1.0 - mean_risk)
+    ranking = np.lexsort((route_lengths, -safety_scores))
+    return RouteScoreBatchResponse(
+        results=[
+            RouteScore(
+                index=int(index),
+                rank=rank,
+                length_meters=round(float(route_lengths[index]), 1),
+                cameras=int(route_cameras[index]),
+                lighting_spots=int(route_lighting[index]),
+                coverage_score=round(float(coverage[index]), 2),
+                mean_risk=round(float(mean_risk[index]), 3),
+                max_risk=round(float(max_risk[index]), 3),
+                safety_score=round(float(safety_scores[index]), 3),
+            )
+            for rank, index in enumerate(ranking, start=1)
+        ]
+    )
+
+
+@router.get("/safe-route", response_model=SafeRouteResponse)
+def safe_route(
+    origin_latitude: float = Query(..., alias="origin_lat", ge=-90, le=90),
+    origin_longitude: float = Query(..., alias="origin_lng", ge=-180, le=180),
+    destination_latitude: float = Query(..., alias="destination_lat", ge=-90, le=90),
+    destination_longitude: float = Query(..., alias="destination_lng", ge=-180, le=180),
+    period: str = Query(roteamento_seguro.PERIODO_NOITE, regex="^(dia|noite)$"),
+    session: Session = Depends(get_db),
+) -> SafeRouteResponse:
+    """Lowest risk-weighted walking path over the street segments (A* with landmarks)."""
+
+    try:
+        graph = roteamento_seguro.obter_grafo(session)
+    except SQLAlchemyError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"Fonte de dados indisponível: {exc}",
+        )
+    try:
+        route = graph.rota(origin_latitude, origin_longitude, destination_latitude, destination_longitude, period)
+    except roteamento_seguro.RotaIndisponivel as exc:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(exc))
+
+    lengths = np.array([part.comprimento_m for part in route.trechos])
+    risks = np.array([part.risco for part in route.trechos])
+    mean_risk = float(np.average(risks, weights=lengths)) if lengths.sum() > 0 else 0.0
+    return SafeRouteResponse(
+        period=period,
+        coordinates=[[latitude, longitude] for latitude, longitude in route.coordenadas],
+        segments=[
+            SafeRouteSegment(
+                segment_id=part.segmento_id,
+                street_name=part.nome_rua,
+                length_meters=round(part.comprimento_m, 1),
+                risk=round(part.risco, 3),
+                lighting=part.iluminacao,
+            )
+            for part in route.trechos
+        ],
+        length_meters=round(route.comprimento_m, 1),
+        cost=round(route.custo, 1),
+        mean_risk=round(mean_risk, 3),
+        max_risk=round(float(risks.max(initial=0.0)), 3),
+        origin_snap_meters=round(route.encaixe_origem_m, 1),
+        destination_snap_meters=round(route.encaixe_destino_m, 1),
     )
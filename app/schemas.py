@@ -89,10 +89,89 @@ class FeatureResponse(BaseModel):
         orm_mode = True
 
 
+class RouteSegment(BaseModel):
+    start_latitude: float
+    start_longitude: float
+    end_latitude: float
+    end_longitude: float
+    length_meters: float
+    cameras: int
+    lighting_spots: int
+    coverage_score: float
+
+
 class RouteSuggestionResponse(BaseModel):
     cameras: List[FeatureResponse]
     lighting_spots: List[FeatureResponse]
-    coverage_score: float = Field(..., description="Simple heuristic representing how well the path is covered.")
+    coverage_score: float = Field(
+        ...,
+        description="Simple heuristic representing how well the path is covered "
+        "(length-weighted mean of the segment scores). Segment scores come from the coverage grid with "
+        "SAFETY_ENGINE=memoria and from corridor counts with SAFETY_ENGINE=postgis, so they differ between engines.",
+    )
+    length_meters: float = 0.0
+    segments: List[RouteSegment] = Field(default_factory=list)
+
+
+ROUTE_SCORE_BATCH_MAX_ROUTES = 200
+
+
+class RouteScoreBatchRequest(BaseModel):
+    polylines: conlist(str, min_items=1, max_items=ROUTE_SCORE_BATCH_MAX_ROUTES) = Field(
+        ..., description="Encoded polylines of the candidate routes."
+    )
+    precision: int = Field(5, ge=5, le=6, description="Polyline precision (5 for Google/OSRM, 6 for polyline6).")
+    radius_meters: float = Field(250, ge=50, le=1000)
+    segment_meters: float = Field(200, ge=50, le=2000)
+    period: str = "todos"
+
+
+class RouteScore(BaseModel):
+    index: int = Field(..., description="Position of the route in the request.")
+    rank: int
+    length_meters: float
+    cameras: int
+    lighting_spots: int
+    coverage_score: float
+    mean_risk: float = Field(..., description="Length-weighted mean of the risk surface along the route.")
+    max_risk: float
+    safety_score: float = Field(..., description="Mean of coverage_score and 1 - mean_risk; routes are ranked by it.")
+
+
+class RouteScoreBatchResponse(BaseModel):
+    results: List[RouteScore]
+
+
+class SafeRouteSegment(BaseModel):
+    segment_id: int
+    street_name: Optional[str]
+    length_meters: float
+    risk: float
+    lighting: str
+
+
+class SafeRouteResponse(BaseModel):
+    period: str
+    coordinates: List[List[float]] = Field(..., description="Path as [latitude, longitude] pairs.")
+    segments: List[SafeRouteSegment]
+    length_meters: float
+    cost: float = Field(..., description="Risk-weighted length minimised by the router.")
+    mean_risk: float = Field(..., description="Length-weighted mean pedestrian risk along the path.")
+    max_risk: float
+    origin_snap_meters: float
+    destination_snap_meters: float
+
+
+class ImportRowError(BaseModel):
+    row: int = Field(..., description="1-based record number in the file (header not counted).")
+    error: str
+
+
+class ImportResult(BaseModel):
+    inserted: int
+    rejected: int
+    errors: List[ImportRowError]
+    errors_truncated: bool = False
 
 
 class ReportCreate(BaseModel):
@@ -122,6 +201,31 @@ class ReportRead(BaseModel):
         orm_mode = True
 
 
+REPORT_VALIDATE_BATCH_MAX_ITEMS = 500
+
+
+class ReportValidationItem(BaseModel):
+    report_id: UUID
+    points: int = Field(..., ge=0, le=100)
+
+
+class ReportValidateBatchRequest(BaseModel):
+    validator_id: UUID
+    items: conlist(ReportValidationItem, min_items=1, max_items=REPORT_VALIDATE_BATCH_MAX_ITEMS)
+
+
+class ReportValidationError(BaseModel):
+    report_id: UUID
+    error: str
+
+
+class ReportValidateBatchResponse(BaseModel):
+    validated: List[ReportRead]
+    rejected: List[ReportValidationError] = Field(
+        ..., description="Reports left untouched (missing, already validated, own report or repeated in the batch)."
+    )
+
+
 class LeaderboardEntry(BaseModel):
     user_id: UUID
     name: str
@@ -143,3 +247,53 @@ class BadgeRead(BaseModel):
 
     class Config:
         orm_mode = True
+
+
+class HeatmapCell(BaseModel):
+    latitude: float
+    longitude: float
+    count: int
+
+
+class HeatmapResponse(BaseModel):
+    source: str
+    resolution_meters: float
+    total: int
+    cells: List[HeatmapCell]
+
+
+class Coordinate(BaseModel):
+    latitude: float = Field(..., ge=-90, le=90)
+    longitude: float = Field(..., ge=-180, le=180)
+
+
+class RiskSampleRequest(BaseModel):
+    points: conlist(Coordinate, min_items=1, max_items=10000)
+    period: str = "todos"
+
+
+class RiskSample(BaseModel):
+    latitude: float
+    longitude: float
+    density: float = Field(..., description="Densidade suavizada de ocorrências por km².")
+    risk: float = Field(..., description="Densidade normalizada entre 0 e 1.")
+
+
+BAIRRO_LOOKUP_MAX_POINTS = 50000
+
+
+class BairroLookupRequest(BaseModel):
+    """Parallel arrays: point ``i`` is ``(latitudes[i], longitudes[i])`` in WGS 84."""
+
+    latitudes: conlist(float, min_items=1, max_items=BAIRRO_LOOKUP_MAX_POINTS)
+    longitudes: conlist(float, min_items=1, max_items=BAIRRO_LOOKUP_MAX_POINTS)
+
+
+class BairroLookupResponse(BaseModel):
+    """Column-oriented: position ``i`` of every list answers point ``i``; null outside Fortaleza."""
+
+    count: int
+    matched: int
+    ids: List[Optional[int]]
+    names: List[Optional[str]]
+    ais: List[Optional[int]]
@@ -0,0 +1,312 @@
+"""Superfície de risco por estimativa de densidade de kernel (KDE) sobre Fortaleza.
+
+Os eventos são contados numa grade fixa (histograma 2D via ``bincount``) e
+suavizados com um kernel gaussiano por convolução FFT, tudo vetorizado. Há
+uma grade por período do dia, com os mesmos rótulos de
+``DataProcessor.classify_time_period``, mais a grade ``todos``. Consultar o
+risco de um ponto vira só aritmética de índice.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import io
+import math
+import os
+import re
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from .banco_de_dados.data_processor import PERIODO_NAO_INFORMADO, PERIODOS_DIA
+from .banco_de_dados.db_saida import Evento
+from .indice_bairros import obter_indice_bairros
+from .mapa_calor import versao_eventos
+from .projecao import LATITUDE_REFERENCIA, RAIO_TERRA_M
+
+
+TAMANHO_CELULA_M = 100.0
+LARGURA_BANDA_M = 300.0
+MARGEM_M = 1000.0
+
+PERIODO_TODOS = "todos"
+# Nome curto usado na API -> rótulo do DataProcessor.
+PERIODOS = {
+    "madrugada": PERIODOS_DIA[0],
+    "manha": PERIODOS_DIA[1],
+    "tarde": PERIODOS_DIA[2],
+    "noite": PERIODOS_DIA[3],
+    PERIODO_TODOS: PERIODO_TODOS,
+}
+
+
+def _indices_na_grade(latitudes, longitudes, sul, oeste, passo_lat, passo_lon, linhas, colunas):
+    i = np.floor((np.asarray(latitudes, dtype="float64") - sul) / passo_lat).astype("int64")
+    j = np.floor((np.asarray(longitudes, dtype="float64") - oeste) / passo_lon).astype("int64")
+    dentro = (i >= 0) & (i < linhas) & (j >= 0) & (j < colunas)
+    return np.where(dentro, i, 0), np.where(dentro, j, 0), dentro
+
+
+@dataclass
+class SuperficieRisco:
+    """Grades de densidade suavizada (ocorrências/km²), uma por período.
+
+    O risco de 0 a 1 é a densidade dividida pelo máximo da grade do próprio
+    período, então cada período usa a escala inteira.
+    """
+
+    versao: str
+    oeste: float
+    sul: float
+    passo_lon: float
+    passo_lat: float
+    grades: Dict[str, np.ndarray] = field(repr=False)
+    maximos: Dict[str, float] = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        self.maximos = {rotulo: float(grade.max()) if grade.size else 0.0 for rotulo, grade in self.grades.items()}
+
+    @property
+    def forma(self) -> Tuple[int, int]:
+        return next(iter(self.grades.values())).shape
+
+    @property
+    def limites(self) -> Tuple[float, float, float, float]:
+        linhas, colunas = self.forma
+        return self.oeste, self.sul, self.oeste + colunas * self.passo_lon, self.sul + linhas * self.passo_lat
+
+    def amostrar(self, latitudes, longitudes, periodo: str = PERIODO_TODOS) -> Tuple[np.ndarray, np.ndarray]:
+        """Retorna (densidade, risco 0-1) de cada ponto; fora da grade ambos são 0."""
+
+        rotulo = PERIODOS[periodo]
+        grade = self.grades[rotulo]
+        i, j, dentro = _indices_na_grade(
+            latitudes, longitudes, self.sul, self.oeste, self.passo_lat, self.passo_lon, *grade.shape
+        )
+        densidade = np.where(dentro, grade[i, j], 0.0)
+        maximo = self.maximos[rotulo]
+        risco = densidade / maximo if maximo > 0 else np.zeros_like(densidade)
+        return densidade, np.clip(risco, 0.0, 1.0)
+
+    def salvar(self, caminho: str) -> None:
+        os.makedirs(os.path.dirname(caminho), exist_ok=True)
+        temporario = f"{caminho}.{os.getpid()}.tmp.npz"
+        np.savez_compressed(
+            temporario,
+            versao=np.array(self.versao),
+            geometria=np.array([self.oeste, self.sul, self.passo_lon, self.passo_lat]),
+            rotulos=np.array(list(self.grades)),
+            grades=np.stack(list(self.grades.values())),
+        )
+        os.replace(temporario, caminho)
+
+    @classmethod
+    def carregar(cls, caminho: str) -> "SuperficieRisco":
+        with np.load(caminho) as dados:
+            oeste, sul, passo_lon, passo_lat = dados["geometria"].tolist()
+            grades = {str(rotulo): grade for rotulo, grade in zip(dados["rotulos"], dados["grades"])}
+            return cls(
+                versao=str(dados["versao"]),
+                oeste=oeste,
+                sul=sul,
+                passo_lon=passo_lon,
+                passo_lat=passo_lat,
+                grades=grades,
+            )
+
+
+def periodos_vetorizados(horas: np.ndarray) -> np.ndarray:
+    """Versão vetorizada de ``DataProcessor.classify_time_period`` para horas inteiras (NaN = não informado)."""
+
+    horas = np.asarray(horas, dtype="float64")
+    rotulos = np.array(PERIODOS_DIA + (PERIODO_NAO_INFORMADO,), dtype=object)
+    indices = np.where(np.isnan(horas), 4, np.clip(np.nan_to_num(horas) // 6, 0, 3)).astype("int64")
+    return rotulos[indices]
+
+
+def _kernel_gaussiano(sigma_celulas: float) -> np.ndarray:
+    raio = max(1, int(math.ceil(3 * sigma_celulas)))
+    eixo = np.arange(-raio, raio + 1, dtype="float64")
+    kernel_1d = np.exp(-0.5 * (eixo / sigma_celulas) ** 2)
+    kernel = np.outer(kernel_1d, kernel_1d)
+    return kernel / kernel.sum()
+
+
+def convolver(grade: np.ndarray, kernel: np.ndarray) -> np.ndarray:
+    """Convolução 2D 'same' via FFT, com preenchimento de zeros (sem borda circular)."""
+
+    linhas, colunas = grade.shape
+    k_linhas, k_colunas = kernel.shape
+    forma = (linhas + k_linhas - 1, colunas + k_colunas - 1)
+    resultado = np.fft.irfft2(np.fft.rfft2(grade, forma) * np.fft.rfft2(kernel, forma), forma)
+    inicio_l, inicio_c = k_linhas // 2, k_colunas // 2
+    return np.clip(resultado[inicio_l:inicio_l + linhas, inicio_c:inicio_c + colunas], 0.0, None)
+
+
+def construir_superficie(
+    latitudes,
+    longitudes,
+    periodos,
+    limites: Tuple[float, float, float, float],
+    versao: str,
+    tamanho_celula_m: float = TAMANHO_CELULA_M,
+    largura_banda_m: float = LARGURA_BANDA_M,
+) -> SuperficieRisco:
+    """Monta as grades por período a partir dos pontos e seus rótulos de período."""
+
+    oeste, sul, leste, norte = limites
+    passo_lat = math.degrees(tamanho_celula_m / RAIO_TERRA_M)
+    passo_lon = passo_lat / math.cos(math.radians(LATITUDE_REFERENCIA))
+    linhas = int(math.ceil((norte - sul) / passo_lat))
+    colunas = int(math.ceil((leste - oeste) / passo_lon))
+
+    i, j, dentro = _indices_na_grade(latitudes, longitudes, sul, oeste, passo_lat, passo_lon, linhas, colunas)
+    celulas = (i * colunas + j)[dentro]
+    periodos = np.asarray(periodos, dtype=object)[dentro]
+
+    kernel = _kernel_gaussiano(largura_banda_m / tamanho_celula_m)
+    area_celula_km2 = (tamanho_celula_m / 1000.0) ** 2
+
+    def suavizar(selecao: np.ndarray) -> np.ndarray:
+        contagens = np.bincount(celulas[selecao], minlength=linhas * colunas).reshape(linhas, colunas)
+        return (convolver(contagens.astype("float64"), kernel) / area_celula_km2).astype("float32")
+
+    grades = {rotulo: suavizar(periodos == rotulo) for rotulo in PERIODOS_DIA}
+    grades[PERIODO_TODOS] = suavizar(np.ones(len(celulas), dtype=bool))
+    return SuperficieRisco(
+        versao=versao,
+        oeste=oeste,
+        sul=sul,
+        passo_lon=passo_lon,
+        passo_lat=passo_lat,
+        grades=grades,
+    )
+
+
+def limites_de_fortaleza(margem_m: float = MARGEM_M) -> Tuple[float, float, float, float]:
+    oeste, sul, leste, norte = obter_indice_bairros().limites
+    margem_lat = math.degrees(margem_m / RAIO_TERRA_M)
+    margem_lon = margem_lat / math.cos(math.radians(LATITUDE_REFERENCIA))
+    return oeste - margem_lon, sul - margem_lat, leste + margem_lon, norte + margem_lat
+
+
+def construir_superficie_de_eventos(session: Session, versao: str) -> SuperficieRisco:
+    """Lê os eventos georreferenciados e monta a superfície por período do dia."""
+
+    consulta = select(
+        func.ST_Y(Evento.ponto_geografico),
+        func.ST_X(Evento.ponto_geografico),
+        func.extract("hour", Evento.hora_ocorrencia),
+    ).where(Evento.ponto_geografico.isnot(None))
+
+    blocos = [
+        np.asarray(particao, dtype="float64").reshape(-1, 3)
+        for particao in session.execute(consulta.execution_options(yield_per=200_000)).partitions()
+    ]
+    dados = np.concatenate(blocos) if blocos else np.empty((0, 3))
+    return construir_superficie(
+        dados[:, 0], dados[:, 1], periodos_vetorizados(dados[:, 2]), limites_de_fortaleza(), versao
+    )
+
+
+# --- Superfície corrente, reconstruída só quando chegam eventos novos ---
+
+_superficie_atual: Optional[SuperficieRisco] = None
+_trava = threading.Lock()
+
+
+_ARQUIVO_DE_VERSAO = re.compile(r"superficie_[0-9a-f]{32}\.npz")
+
+
+def _identificar_versao(assinatura) -> str:
+    return hashlib.sha256(repr(assinatura).encode("utf-8")).hexdigest()[:32]
+
+
+def _descartar_versoes_antigas(diretorio: str, versao: str) -> None:
+    """Apaga os ``superficie_<versao>.npz`` de outras versões em ``diretorio``.
+
+    Só arquivos com o nome exato gerado por :func:`obter_superficie` saem;
+    temporários de gravações em andamento e arquivos alheios ficam.
+    """
+
+    atual = f"superficie_{versao}.npz"
+    try:
+        entradas = list(os.scandir(diretorio))
+    except FileNotFoundError:
+        return
+    for entrada in entradas:
+        if entrada.name != atual and _ARQUIVO_DE_VERSAO.fullmatch(entrada.name) and entrada.is_file():
+            try:
+                os.remove(entrada.path)
+            except FileNotFoundError:
+                pass
+
+
+def obter_superficie(session: Session, diretorio: str) -> SuperficieRisco:
+    """
+    Retorna a superfície da versão atual dos eventos.
+
+    A versão é a assinatura barata de ``eventos_seguranca`` (contagem, maior id,
+    última atualização). Se ela não mudou, usa a superfície em memória; senão
+    tenta o arquivo ``.npz`` da versão em ``diretorio`` e, por último, recalcula.
+    Os ``.npz`` das outras versões são apagados a cada troca de versão.
+    """
+
+    global _superficie_atual
+
+    versao = _identificar_versao(versao_eventos(session))
+    superficie = _superficie_atual
+    if superficie is not None and superficie.versao == versao:
+        return superficie
+
+    with _trava:
+        if _superficie_atual is not None and _superficie_atual.versao == versao:
+            return _superficie_atual
+
+        caminho = os.path.join(diretorio, f"superficie_{versao}.npz")
+        if os.path.exists(caminho):
+            superficie = SuperficieRisco.carregar(caminho)
+        else:
+            superficie = construir_superficie_de_eventos(session, versao)
+            superficie.salvar(caminho)
+        _descartar_versoes_antigas(diretorio, versao)
+        _superficie_atual = superficie
+        return superficie
+
+
+# --- Exportação ---
+
+def raster_npy(superficie: SuperficieRisco, periodo: str) -> bytes:
+    buffer = io.BytesIO()
+    np.save(buffer, superficie.grades[PERIODOS[periodo]])
+    return buffer.getvalue()
+
+
+def _rampa_de_cores(risco: np.ndarray) -> np.ndarray:
+    """Amarelo -> vermelho, com transparência proporcional ao risco."""
+
+    rgba = np.zeros(risco.shape + (4,), dtype="uint8")
+    rgba[..., 0] = 255
+    rgba[..., 1] = (220 * (1 - risco)).astype("uint8")
+    rgba[..., 3] = np.where(risco > 0.01, 60 + 180 * risco, 0).astype("uint8")
+    return rgba
+
+
+def tile_png(superficie: SuperficieRisco, periodo: str, z: int, x: int, y: int, tamanho: int = 256) -> bytes:
+    """Renderiza o tile XYZ ``z/x/y`` amostrando a grade no centro de cada pixel."""
+
+    n = 2 ** z
+    pixels = (np.arange(tamanho) + 0.5) / tamanho
+    longitudes = (x + pixels) / n * 360.0 - 180.0
+    latitudes = np.degrees(np.arctan(np.sinh(np.pi * (1 - 2 * (y + pixels) / n))))
+    grade_lat, grade_lon = np.meshgrid(latitudes, longitudes, indexing="ij")
+
+    _, risco = superficie.amostrar(grade_lat, grade_lon, periodo)
+    buffer = io.BytesIO()
+    Image.fromarray(_rampa_de_cores(risco)).save(buffer, format="PNG", optimize=True)
+    return buffer.getvalue()
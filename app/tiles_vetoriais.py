@@ -0,0 +1,293 @@
+"""Geração de tiles vetoriais (Mapbox Vector Tile 2.1) dos bairros.
+
+O codificador protobuf é escrito à mão: o formato MVT usa só varints,
+inteiros zigzag e mensagens aninhadas, o que dispensa uma dependência extra.
+Referência: https://github.com/mapbox/vector-tile-spec/tree/master/2.1
+"""
+
+from __future__ import annotations
+
+import math
+import os
+import re
+import shutil
+import struct
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import shapely
+from shapely.geometry.polygon import orient
+
+from .indice_bairros import IndiceBairros, nivel_para_zoom
+
+
+EXTENSAO_TILE = 4096
+BUFFER_TILE = 64
+NOME_CAMADA = "bairros"
+ZOOM_MAXIMO = 22
+
+_GEOMETRIA_POLIGONO = 3
+_COMANDO_MOVE_TO = 1
+_COMANDO_LINE_TO = 2
+_COMANDO_CLOSE_PATH = 7
+
+
+# --- Codificação protobuf mínima ---
+
+def _varint(valor: int) -> bytes:
+    saida = bytearray()
+    while True:
+        byte = valor & 0x7F
+        valor >>= 7
+        if valor:
+            saida.append(byte | 0x80)
+        else:
+            saida.append(byte)
+            return bytes(saida)
+
+
+def _zigzag(valor: int) -> int:
+    return (valor << 1) ^ (valor >> 63)
+
+
+def _campo_bytes(numero: int, conteudo: bytes) -> bytes:
+    return _varint((numero << 3) | 2) + _varint(len(conteudo)) + conteudo
+
+
+def _campo_varint(numero: int, valor: int) -> bytes:
+    return _varint(numero << 3) + _varint(valor)
+
+
+def _campo_empacotado(numero: int, valores: Iterable[int]) -> bytes:
+    return _campo_bytes(numero, b"".join(_varint(v) for v in valores))
+
+
+def _codificar_valor(valor) -> bytes:
+    if isinstance(valor, (bool, np.bool_)):
+        return _campo_varint(7, int(valor))
+    if isinstance(valor, (int, np.integer)):
+        valor = int(valor)
+        return _campo_varint(4, valor) if valor >= 0 else _campo_varint(6, _zigzag(valor))
+    if isinstance(valor, (float, np.floating)):
+        return _varint((3 << 3) | 1) + struct.pack("<d", float(valor))
+    return _campo_bytes(1, str(valor).encode("utf-8"))
+
+
+def _comando(identificador: int, quantidade: int) -> int:
+    return (identificador & 0x7) | (quantidade << 3)
+
+
+def _codificar_aneis(aneis: List[np.ndarray]) -> List[int]:
+    """Codifica anéis já em coordenadas inteiras do tile como comandos MVT."""
+
+    comandos: List[int] = []
+    cursor_x = cursor_y = 0
+    for anel in aneis:
+        # O último ponto repete o primeiro; ClosePath cuida do fechamento.
+        pontos = anel[:-1]
+        if len(pontos) < 3:
+            continue
+        deltas = np.diff(pontos, axis=0, prepend=[[cursor_x, cursor_y]])
+        zigzags = (deltas << 1) ^ (deltas >> 63)
+        comandos.append(_comando(_COMANDO_MOVE_TO, 1))
+        comandos.extend(int(v) for v in zigzags[0])
+        comandos.append(_comando(_COMANDO_LINE_TO, len(pontos) - 1))
+        comandos.extend(int(v) for v in zigzags[1:].ravel())
+        comandos.append(_comando(_COMANDO_CLOSE_PATH, 1))
+        cursor_x, cursor_y = (int(v) for v in pontos[-1])
+    return comandos
+
+
+def _poligonos(geometria) -> List:
+    if geometria.geom_type == "Polygon":
+        return [geometria]
+    if geometria.geom_type in ("MultiPolygon", "GeometryCollection"):
+        return [parte for g in geometria.geoms for parte in _poligonos(g)]
+    return []
+
+
+def _aneis_do_poligono(geometria) -> List[np.ndarray]:
+    aneis: List[np.ndarray] = []
+    for poligono in _poligonos(geometria):
+        # Com o eixo Y do tile apontando para baixo, o anel externo precisa ter
+        # área positiva pela fórmula do agrimensor, ou seja, sentido anti-horário
+        # nas coordenadas numéricas (sign=1.0).
+        poligono = orient(poligono, sign=1.0)
+        aneis.append(np.asarray(poligono.exterior.coords, dtype="int64")[:, :2])
+        aneis.extend(np.asarray(interno.coords, dtype="int64")[:, :2] for interno in poligono.interiors)
+    return aneis
+
+
+def codificar_camada(nome: str, feicoes: List[Tuple[Optional[int], object, Dict[str, object]]]) -> bytes:
+    """Codifica uma camada MVT a partir de (id, geometria no tile, propriedades)."""
+
+    chaves: Dict[str, int] = {}
+    valores: Dict[Tuple[type, object], int] = {}
+    corpo = bytearray()
+
+    for identificador, geometria, propriedades in feicoes:
+        comandos = _codificar_aneis(_aneis_do_poligono(geometria))
+        if not comandos:
+            continue
+
+        tags: List[int] = []
+        for chave, valor in propriedades.items():
+            if valor is None or (isinstance(valor, float) and math.isnan(valor)):
+                continue
+            chave_idx = chaves.setdefault(chave, len(chaves))
+            valor_idx = valores.setdefault((type(valor), valor), len(valores))
+            tags.extend((chave_idx, valor_idx))
+
+        feicao = bytearray()
+        if identificador is not None and identificador >= 0:
+            feicao += _campo_varint(1, identificador)
+        feicao += _campo_empacotado(2, tags)
+        feicao += _campo_varint(3, _GEOMETRIA_POLIGONO)
+        feicao += _campo_empacotado(4, comandos)
+        corpo += _campo_bytes(2, bytes(feicao))
+
+    camada = bytearray(_campo_varint(15, 2))
+    camada += _campo_bytes(1, nome.encode("utf-8"))
+    camada += corpo
+    for chave in chaves:
+        camada += _campo_bytes(3, chave.encode("utf-8"))
+    for (_, valor) in valores:
+        camada += _campo_bytes(4, _codificar_valor(valor))
+    camada += _campo_varint(5, EXTENSAO_TILE)
+    return _campo_bytes(3, bytes(camada))
+
+
+# --- Geometria dos tiles (Web Mercator, esquema XYZ) ---
+
+def limites_do_tile(z: int, x: int, y: int) -> Tuple[float, float, float, float]:
+    """Retorna (oeste, sul, leste, norte) do tile em graus."""
+
+    n = 2 ** z
+
+    def latitude(linha: float) -> float:
+        return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * linha / n))))
+
+    return x / n * 360.0 - 180.0, latitude(y + 1), (x + 1) / n * 360.0 - 180.0, latitude(y)
+
+
+def tile_valido(z: int, x: int, y: int) -> bool:
+    return 0 <= z <= ZOOM_MAXIMO and 0 <= x < 2 ** z and 0 <= y < 2 ** z
+
+
+def _para_coordenadas_do_tile(z: int, x: int, y: int):
+    escala = (2 ** z) * EXTENSAO_TILE
+
+    def transformar(coords: np.ndarray) -> np.ndarray:
+        lon = coords[:, 0]
+        lat = np.clip(coords[:, 1], -85.05112878, 85.05112878)
+        px = (lon + 180.0) / 360.0 * escala - x * EXTENSAO_TILE
+        seno = np.sin(np.radians(lat))
+        py = (0.5 - np.log((1 + seno) / (1 - seno)) / (4 * math.pi)) * escala - y * EXTENSAO_TILE
+        return np.column_stack([px, py])
+
+    return transformar
+
+
+def gerar_tile_bairros(
+    indice: IndiceBairros,
+    propriedades: List[Dict[str, object]],
+    z: int,
+    x: int,
+    y: int,
+) -> bytes:
+    """
+    Monta o tile ``z/x/y`` com os bairros que o tocam.
+
+    ``propriedades`` traz, na ordem de ``indice.bairros``, os atributos de cada
+    bairro. A geometria usa o nível simplificado do zoom, é recortada ao tile
+    (com margem) e ajustada à grade inteira da extensão do tile.
+    """
+
+    oeste, sul, leste, norte = limites_do_tile(z, x, y)
+    margem_x = (leste - oeste) * BUFFER_TILE / EXTENSAO_TILE
+    margem_y = (norte - sul) * BUFFER_TILE / EXTENSAO_TILE
+    area = shapely.box(oeste - margem_x, sul - margem_y, leste + margem_x, norte + margem_y)
+
+    candidatos = np.sort(indice.arvore.query(area, predicate="intersects"))
+    if len(candidatos) == 0:
+        return b""
+
+    geometrias = indice.geometrias_no_nivel(nivel_para_zoom(z))[candidatos]
+    geometrias = shapely.transform(geometrias, _para_coordenadas_do_tile(z, x, y))
+    geometrias = shapely.clip_by_rect(
+        geometrias, -BUFFER_TILE, -BUFFER_TILE, EXTENSAO_TILE + BUFFER_TILE, EXTENSAO_TILE + BUFFER_TILE
+    )
+    geometrias = shapely.set_precision(geometrias, 1.0)
+
+    feicoes = []
+    for posicao, geometria in zip(candidatos, geometrias):
+        if geometria is None or geometria.is_empty:
+            continue
+        atributos = propriedades[posicao]
+        identificador = atributos.get("id")
+        feicoes.append((int(identificador) if identificador is not None else None, geometria, atributos))
+
+    if not feicoes:
+        return b""
+    return codificar_camada(NOME_CAMADA, feicoes)
+
+
+# --- Cache em disco ---
+
+def caminho_tile_em_cache(diretorio: str, versao: str, z: int, x: int, y: int) -> str:
+    return os.path.join(diretorio, versao, str(z), str(x), f"{y}.mvt")
+
+
+def ler_tile_em_cache(caminho: str) -> Optional[bytes]:
+    try:
+        with open(caminho, "rb") as arquivo:
+            return arquivo.read()
+    except FileNotFoundError:
+        return None
+
+
+def gravar_tile_em_cache(caminho: str, conteudo: bytes) -> None:
+    """Grava o tile de forma atômica, para leitores concorrentes nunca verem meio arquivo.
+
+    O cache é só um atalho: se a pasta da versão for apagada no meio da
+    gravação (ver :func:`descartar_versoes_antigas`), o tile simplesmente não
+    fica gravado.
+    """
+
+    temporario = f"{caminho}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(caminho), exist_ok=True)
+        with open(temporario, "wb") as arquivo:
+            arquivo.write(conteudo)
+        os.replace(temporario, caminho)
+    except FileNotFoundError:
+        pass
+
+
+_versao_em_uso: Dict[str, str] = {}
+_trava_versao = threading.Lock()
+# Nome das pastas de versão: o SHA-256 de ``analise.versao_dos_dados`` ou
+# ``analise_banco.versao_dos_dados_do_banco``, este com o prefixo do motor.
+_PASTA_DE_VERSAO = re.compile(r"(?:[a-z]+-)?[0-9a-f]{64}")
+
+
+def descartar_versoes_antigas(diretorio: str, versao: str) -> None:
+    """Apaga as pastas de versões anteriores a ``versao`` no cache de tiles.
+
+    Cada versão dos dados grava numa pasta própria; sem limpeza, o cache só
+    cresceria. A varredura roda uma vez por processo a cada troca de versão e
+    só apaga pastas com nome de versão; qualquer outra coisa no diretório fica.
+    """
+
+    with _trava_versao:
+        if _versao_em_uso.get(diretorio) == versao:
+            return
+        _versao_em_uso[diretorio] = versao
+    try:
+        entradas = list(os.scandir(diretorio))
+    except FileNotFoundError:
+        return
+    for entrada in entradas:
+        if entrada.name != versao and _PASTA_DE_VERSAO.fullmatch(entrada.name) and entrada.is_dir():
+            shutil.rmtree(entrada.path, ignore_errors=True)
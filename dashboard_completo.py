@@ -6,6 +6,8 @@ Com botões para executar scripts de processamento
 
 import streamlit as st
 import pandas as pd
+import pydeck as pdk
+import requests
 import json
 import glob
 import os
@@ -21,6 +23,9 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# Endereço da API FastAPI (app.main) usada pelo mapa de calor
+API_URL = os.getenv("FORTALEZA_SEGURA_API_URL", "http://localhost:8000")
+
 # --- FUNÇÕES AUXILIARES ---
 
 @st.cache_data
@@ -111,6 +116,20 @@ def executar_script(script_path, nome_script):
         progress_container.error(f"❌ Erro: {str(e)}")
         return False
 
+@st.cache_data(ttl=300)
+def carregar_mapa_calor(fonte, resolucao, natureza):
+    """Busca na API as células hexagonais já agregadas (nunca os pontos brutos)"""
+    params = {"source": fonte, "resolution_meters": resolucao}
+    if natureza:
+        params["natureza_crime"] = natureza
+
+    try:
+        resposta = requests.get(f"{API_URL}/heatmap/hexagons", params=params, timeout=30)
+        resposta.raise_for_status()
+        return resposta.json()
+    except requests.exceptions.RequestException as e:
+        return {"erro": str(e)}
+
 def criar_df_horarios(dados_horarios):
     """Converte dados de horários em DataFrame para gráficos"""
     if not dados_horarios:
@@ -367,9 +386,54 @@ with tab2:
 
     st.markdown("---")
 
-    # Mapa placeholder
-    st.subheader("🗺️ Mapa de Calor (Em breve)")
-    st.info("Funcionalidade de mapa geográfico será implementada em breve")
+    # Mapa de calor hexagonal (agregado no servidor)
+    st.subheader("🗺️ Mapa de Calor")
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        fonte_mapa = st.selectbox(
+            "Fonte",
+            options=["eventos", "chamados"],
+            format_func=lambda f: "Eventos de segurança" if f == "eventos" else "Chamados (policecalls.csv)",
+        )
+    with col2:
+        resolucao_mapa = st.slider("Tamanho do hexágono (m)", min_value=100, max_value=2000, value=500, step=100)
+    with col3:
+        natureza_mapa = st.text_input("Natureza do crime (opcional)")
+
+    dados_mapa = carregar_mapa_calor(fonte_mapa, resolucao_mapa, natureza_mapa.strip())
+
+    if "erro" in dados_mapa:
+        st.warning(f"Não foi possível carregar o mapa de calor da API ({API_URL}): {dados_mapa['erro']}")
+    elif not dados_mapa.get("cells"):
+        st.info("Nenhuma ocorrência encontrada para os filtros selecionados")
+    else:
+        df_celulas = pd.DataFrame(dados_mapa["cells"])
+        intensidade = df_celulas["count"] / df_celulas["count"].max()
+        df_celulas["cor"] = [
+            [255, int(200 * (1 - valor)), 0, 60 + int(180 * valor)] for valor in intensidade
+        ]
+
+        camada = pdk.Layer(
+            "ColumnLayer",
+            data=df_celulas,
+            get_position=["longitude", "latitude"],
+            get_elevation="count",
+            elevation_scale=resolucao_mapa / max(df_celulas["count"].max(), 1) * 4,
+            radius=resolucao_mapa,
+            disk_resolution=6,
+            extruded=True,
+            get_fill_color="cor",
+            pickable=True,
+        )
+        visao = pdk.ViewState(latitude=-3.78, longitude=-38.54, zoom=10.5, pitch=40)
+
+        st.pydeck_chart(pdk.Deck(
+            layers=[camada],
+            initial_view_state=visao,
+            tooltip={"text": "{count} ocorrências"},
+        ))
+        st.caption(f"{dados_mapa['total']} ocorrências agregadas em {len(df_celulas)} hexágonos")
 
 # TAB 3: TENDÊNCIAS
 with tab3:
@@ -25,6 +25,9 @@ CREATE TABLE IF NOT EXISTS users (
     CONSTRAINT ck_users_points_non_negative CHECK (points >= 0)
 );
 
+-- Ranking: o topo do leaderboard é uma varredura reversa deste índice
+CREATE INDEX IF NOT EXISTS ix_users_points_id ON users (points, id);
+
 -- Configuração do modo guardião por usuário
 CREATE TABLE IF NOT EXISTS guardian_modes (
     id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
@@ -69,6 +72,10 @@ CREATE TABLE IF NOT EXISTS cameras (
     CONSTRAINT ck_cameras_longitude_range CHECK (longitude BETWEEN -180 AND 180)
 );
 
+-- Paginação por cursor (created_at, id) e filtros espaciais
+CREATE INDEX IF NOT EXISTS ix_cameras_created_at_id ON cameras (created_at, id);
+CREATE INDEX IF NOT EXISTS idx_cameras_location ON cameras USING GIST (location);
+
 -- Pontos de iluminação cadastrados
 CREATE TABLE IF NOT EXISTS lighting_spots (
     id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
@@ -82,6 +89,9 @@ CREATE TABLE IF NOT EXISTS lighting_spots (
     CONSTRAINT ck_lighting_longitude_range CHECK (longitude BETWEEN -180 AND 180)
 );
 
+CREATE INDEX IF NOT EXISTS ix_lighting_spots_created_at_id ON lighting_spots (created_at, id);
+CREATE INDEX IF NOT EXISTS idx_lighting_spots_location ON lighting_spots USING GIST (location);
+
 -- Relatos enviados pela comunidade
 CREATE TABLE IF NOT EXISTS reports (
     id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
@@ -99,6 +109,12 @@ CREATE TABLE IF NOT EXISTS reports (
     CONSTRAINT ck_reports_points_awarded_non_negative CHECK (points_awarded >= 0)
 );
 
+-- Feed por cursor (created_at, id), fila de moderação (is_valid), relatos por autor e filtro espacial
+CREATE INDEX IF NOT EXISTS ix_reports_created_at_id ON reports (created_at, id);
+CREATE INDEX IF NOT EXISTS ix_reports_is_valid_created_at_id ON reports (is_valid, created_at, id);
+CREATE INDEX IF NOT EXISTS ix_reports_user_id_created_at_id ON reports (user_id, created_at, id);
+CREATE INDEX IF NOT EXISTS idx_reports_location ON reports USING GIST (location);
+
 -- Medalhas para gamificação
 CREATE TABLE IF NOT EXISTS badges (
     id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
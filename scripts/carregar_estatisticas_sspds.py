@@ -28,6 +28,7 @@ except Exception:
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from app.banco_de_dados.db_config import SessionLocal
 from app.banco_de_dados.db_saida import Evento
+from app.banco_de_dados.bairro_backfill import CHAVE_BAIRRO_TEXTO, carregar_indice_nomes
 
 # --- Configurações do Robô ---
 URL_ALVOS = [
@@ -241,6 +242,11 @@ def processar_planilha(caminho_arquivo, db):
             print("  -> Aviso: Coluna 'Município' não encontrada. Pulando arquivo.")
             return
 
+        # Resolve o texto da coluna "Bairro" para o id da tabela 'bairros'
+        # (acentos, caixa, abreviações e apelidos); o texto bruto fica guardado
+        # para o backfill em massa (scripts/preencher_bairro_id.py)
+        indice_nomes = carregar_indice_nomes(db)
+
         for _, row in df_fortaleza.iterrows():
             string_unica = str(row.to_dict()) + os.path.basename(caminho_arquivo)
             hash_do_evento = hashlib.md5(string_unica.encode('utf-8')).hexdigest()
@@ -263,6 +269,9 @@ def processar_planilha(caminho_arquivo, db):
                     except (ValueError, TypeError):
                         data_evento_final = None
 
+                bairro_texto = row.get(mapa_colunas['bairro'])
+                bairro_texto = str(bairro_texto).strip() if pd.notna(bairro_texto) else None
+
                 novo_evento = Evento(
                     hash_origem=hash_do_evento,
                     tipo_fonte="SSPDS",
@@ -271,7 +280,8 @@ def processar_planilha(caminho_arquivo, db):
                     data_evento=data_evento_final,
                     hora_ocorrencia=data_evento_final.time() if data_evento_final else None,
                     dia_semana=row.get(mapa_colunas['dia_semana']),
-                    bairro=row.get(mapa_colunas['bairro']),
+                    bairro_id=indice_nomes.resolver(bairro_texto),
+                    detalhes_adicionais={CHAVE_BAIRRO_TEXTO: bairro_texto} if bairro_texto else None,
                     ais=str(row.get(mapa_colunas['ais'])),
                     local_especifico=row.get(mapa_colunas['local']),
                     natureza_crime=row.get(mapa_colunas['natureza']),
@@ -290,6 +300,8 @@ def processar_planilha(caminho_arquivo, db):
 
         db.commit()
         print(f"  -> Planilha OK. {eventos_novos} novos, {eventos_ignorados} duplicados.")
+        if indice_nomes.nao_reconhecidos():
+            print(f"  -> Bairros não reconhecidos: {', '.join(indice_nomes.nao_reconhecidos()[:20])}")
     except Exception as e:
         db.rollback()
         print(f"Erro ao ler/processar a planilha: {e}")
@@ -0,0 +1,35 @@
+# scripts/gerar_cache_bairros.py
+
+import sys
+import os
+import time
+
+# Adiciona o diretório raiz do projeto ao sys.path para que possamos importar do pacote 'app'
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.indice_bairros import (
+    CAMINHO_BAIRROS,
+    DIRETORIO_CACHE_BAIRROS,
+    caminho_cache_bairros,
+    construir_indice_bairros,
+    hash_arquivo,
+    salvar_indice_bairros,
+)
+
+
+def gerar_cache_bairros():
+    """
+    Converte o GeoJSON dos bairros no artefato binário lido pela API e pelos scripts.
+    Não é obrigatório: o artefato também é gerado no primeiro uso após o GeoJSON mudar.
+    """
+    print(f">>> Lendo {CAMINHO_BAIRROS}...")
+    inicio = time.perf_counter()
+    hash_origem = hash_arquivo(CAMINHO_BAIRROS)
+    indice = construir_indice_bairros(CAMINHO_BAIRROS, hash_origem=hash_origem)
+    caminho = caminho_cache_bairros(hash_origem, DIRETORIO_CACHE_BAIRROS)
+    salvar_indice_bairros(indice, caminho)
+    print(f"✅ {len(indice.bairros)} bairros gravados em {caminho} ({time.perf_counter() - inicio:.1f}s)")
+
+
+if __name__ == "__main__":
+    gerar_cache_bairros()
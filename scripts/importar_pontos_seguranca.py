@@ -0,0 +1,49 @@
+# scripts/importar_pontos_seguranca.py
+
+import sys
+import os
+import argparse
+
+# Adiciona o diretório raiz do projeto ao sys.path para que possamos importar do pacote 'app'
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.database import SessionLocal
+from app.importacao_pontos import FORMATO_CSV, FORMATO_GEOJSON, FORMATOS, TAMANHO_LOTE, importar_pontos
+from app.models import Camera, LightingSpot
+
+MODELOS = {"cameras": Camera, "iluminacao": LightingSpot}
+
+
+def importar(tipo: str, caminho: str, formato: str = None, tamanho_lote: int = TAMANHO_LOTE):
+    """
+    Importa um inventário de câmeras ou de pontos de iluminação (CSV ou
+    GeoJSON) em lotes, listando os registros rejeitados.
+    """
+    if formato is None:
+        formato = FORMATO_GEOJSON if caminho.lower().endswith((".geojson", ".json")) else FORMATO_CSV
+    print(f"Importando {caminho} ({formato}) para '{tipo}'...")
+
+    db = SessionLocal()
+    try:
+        with open(caminho, encoding="utf-8-sig") as arquivo:
+            resultado = importar_pontos(db, MODELOS[tipo], arquivo, formato, tamanho_lote)
+        print(f"✅ {resultado.inseridos} registros inseridos, {resultado.rejeitados} rejeitados.")
+        for erro in resultado.erros:
+            print(f"  registro {erro['row']}: {erro['error']}")
+        if resultado.erros_truncados:
+            print("  (lista de erros truncada)")
+
+    except Exception as e:
+        print(f"❌ Ocorreu um erro durante a importação: {e}")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Importa câmeras ou pontos de iluminação de CSV/GeoJSON.")
+    parser.add_argument("tipo", choices=sorted(MODELOS))
+    parser.add_argument("arquivo")
+    parser.add_argument("--formato", choices=FORMATOS, help="Padrão: deduzido da extensão do arquivo.")
+    parser.add_argument("--lote", type=int, default=TAMANHO_LOTE, help="Registros por INSERT.")
+    args = parser.parse_args()
+    importar(args.tipo, args.arquivo, args.formato, args.lote)
@@ -1,10 +1,14 @@
 # load_data.py
 
 import pandas as pd
-import geopandas as gpd
 from sqlalchemy.orm import Session
 from geoalchemy2.elements import WKTElement
 import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.indice_bairros import obter_indice_bairros
 
 # Importa nossos modelos e a sessão do banco de dados do arquivo database.py
 from database import SessionLocal, Bairro, Ocorrencia
@@ -14,8 +18,9 @@ def load_bairros(db: Session):
     print(">>> Iniciando carregamento de bairros...")
     
     try:
-        path_bairros = os.path.join("data", "Bairros final.geojson")
-        bairros_gdf = gpd.read_file(path_bairros)
+        # Polígonos já em 2D e corrigidos, lidos do cache binário do índice de
+        # bairros (refeito automaticamente se o GeoJSON mudar)
+        bairros_gdf = obter_indice_bairros().bairros
         
         if 'nome' not in bairros_gdf.columns or 'geometry' not in bairros_gdf.columns:
             print("ERRO: O arquivo de bairros precisa ter as colunas 'nome' e 'geometry'.")
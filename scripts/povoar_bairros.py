@@ -9,20 +9,9 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 # Importa as ferramentas necessárias do nosso módulo de banco de dados
 from app.banco_de_dados.db_config import SessionLocal
 from app.banco_de_dados.db_saida import Bairro
-
-# Nosso "dicionário de tradução" oficial de Bairros para AIS, extraído do site da SSPDS
-BAIRROS_POR_AIS = {
-    1: ["Aldeota", "Cais do Porto", "Meireles", "Mucuripe", "Praia de Iracema", "Varjota", "Vicente Pinzon"],
-    2: ["Bom Jardim", "Conjunto Ceará I", "Conjunto Ceará II", "Genibaú", "Granja Lisboa", "Granja Portugal", "Siqueira"],
-    3: ["Ancuri", "Barroso", "Coaçu", "Conjunto Palmeiras", "Curió", "Guajeru", "Jangurussu", "Lagoa Redonda", "Messejana", "Parque Santa Maria", "Paupina", "Pedras", "São Bento"],
-    4: ["Álvaro Weyne", "Carlito Pamplona", "Centro", "Farias Brito", "Jacarecanga", "Monte Castelo", "Moura Brasil", "São Gerardo", "Vila Ellery"],
-    5: ["Aeroporto", "Benfica", "Bom Futuro", "Couto Fernandes", "Damas", "Demócrito Rocha", "Dendê", "Fátima", "Itaoca", "Itaperi", "Jardim América", "José Bonifácio", "Montese", "Panamericano", "Parangaba", "Parreão", "Serrinha", "Vila Peri", "Vila União"],
-    6: ["Amadeu Furtado", "Antônio Bezerra", "Autran Nunes", "Bela Vista", "Bonsucesso", "Dom Lustosa", "Henrique Jorge", "João XXIII", "Jóquei Clube", "Olavo Oliveira", "Padre Andrade", "Parque Araxá", "Parquelândia", "Pici", "Presidente Kennedy", "Quintino Cunha", "Rodolfo Teófilo"],
-    7: ["Aerolândia", "Alto da Balança", "Boa Vista", "Cajazeiras", "Cambeba", "Cidade dos Funcionários", "Dias Macedo", "Edson Queiroz", "Jardim das Oliveiras", "José de Alencar", "Parque Dois Irmãos", "Parque Iracema", "Parque Manibura", "Passaré", "Sabiaguaba", "Sapiranga"],
-    8: ["Barra do Ceará", "Cristo Redentor", "Floresta", "Jardim Guanabara", "Jardim Iracema", "Pirambu", "Vila Velha"],
-    9: ["Aracapé", "Canindezinho", "Conjunto Esperança", "Jardim Cearense", "Maraponga", "Mondubim", "Novo Mondubim", "Parque Presidente Vargas", "Parque Santa Rosa", "Parque São José", "Planalto Ayrton Senna", "Prefeito José Walter", "Vila Manoel Sátiro"],
-    10: ["Cidade 2000", "Cocó", "Dionísio Torres", "Engenheiro Luciano Cavalcante", "Guararapes", "Joaquim Távora", "Lourdes", "Manuel Dias Branco", "Papicu", "Praia do Futuro I", "Praia do Futuro II", "Salinas", "São João do Tauape"]
-}
+from app.banco_de_dados.referencia_bairros import BAIRROS_POR_AIS, normalizar_nome_bairro
+from app.indice_bairros import obter_indice_bairros
+from geoalchemy2.elements import WKTElement
 
 def povoar_bairros():
     """
@@ -60,6 +49,43 @@ def povoar_bairros():
     finally:
         db.close() # Garante que a conexão com o banco seja sempre encerrada
 
+def povoar_geometrias_bairros():
+    """
+    Preenche 'geometria_area' de cada bairro com o polígono do mapa oficial,
+    casando os nomes sem acentos/caixa. É o que o motor PostGIS da análise
+    (app/analise_banco.py) usa no ST_Contains.
+    """
+    print("Iniciando o preenchimento das geometrias dos bairros...")
+    indice = obter_indice_bairros()
+    geometria_por_nome = {
+        normalizar_nome_bairro(nome): geometria
+        for nome, geometria in zip(indice.nomes, indice.geometrias)
+    }
+
+    db = SessionLocal()
+    atualizados = 0
+    sem_geometria = []
+    try:
+        for bairro in db.query(Bairro).all():
+            geometria = geometria_por_nome.get(normalizar_nome_bairro(bairro.nome))
+            if geometria is None:
+                sem_geometria.append(bairro.nome)
+                continue
+            bairro.geometria_area = WKTElement(geometria.wkt, srid=4326)
+            atualizados += 1
+
+        db.commit()
+        print(f"✅ Geometrias preenchidas para {atualizados} bairros.")
+        if sem_geometria:
+            print(f"(Sem polígono no mapa oficial: {', '.join(sorted(sem_geometria))})")
+
+    except Exception as e:
+        print(f"❌ Ocorreu um erro ao preencher as geometrias: {e}")
+        db.rollback()
+    finally:
+        db.close()
+
 # Este bloco permite que o script seja executado diretamente pelo terminal
 if __name__ == "__main__":
-    povoar_bairros()
\ No newline at end of file
+    povoar_bairros()
+    povoar_geometrias_bairros()
\ No newline at end of file
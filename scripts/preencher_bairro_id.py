@@ -0,0 +1,51 @@
+# scripts/preencher_bairro_id.py
+
+import sys
+import os
+import argparse
+
+# Adiciona o diretório raiz do projeto ao sys.path para que possamos importar do pacote 'app'
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.banco_de_dados.db_config import SessionLocal
+from app.banco_de_dados.bairro_backfill import (
+    TAMANHO_LOTE,
+    carregar_indice_nomes,
+    preencher_por_nome,
+    preencher_por_ponto,
+)
+
+
+def preencher_bairro_id(tamanho_lote: int = TAMANHO_LOTE):
+    """
+    Preenche Evento.bairro_id dos eventos que ainda não têm bairro: primeiro
+    pelo nome do bairro vindo da planilha, depois pelo ponto geográfico.
+    """
+    print("Iniciando o preenchimento de bairro_id dos eventos...")
+    db = SessionLocal()
+    try:
+        indice = carregar_indice_nomes(db)
+        if not indice.id_por_nome:
+            print("❌ A tabela 'bairros' está vazia. Rode scripts/povoar_bairros.py antes.")
+            return
+
+        por_nome = preencher_por_nome(db, indice, tamanho_lote)
+        print(f"✅ {por_nome} eventos associados pelo nome do bairro.")
+        if indice.nao_reconhecidos():
+            print(f"(Nomes não reconhecidos: {', '.join(indice.nao_reconhecidos())})")
+
+        por_ponto = preencher_por_ponto(db, tamanho_lote)
+        print(f"✅ {por_ponto} eventos associados pelo ponto geográfico.")
+
+    except Exception as e:
+        print(f"❌ Ocorreu um erro durante o preenchimento: {e}")
+        db.rollback()
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Preenche Evento.bairro_id em lotes.")
+    parser.add_argument("--lote", type=int, default=TAMANHO_LOTE, help="Eventos por UPDATE (faixa de ids).")
+    args = parser.parse_args()
+    preencher_bairro_id(args.lote)
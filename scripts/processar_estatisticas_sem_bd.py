@@ -14,6 +14,7 @@ import glob
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from app.banco_de_dados.data_processor import DataProcessor
+from app.banco_de_dados.count_cube import CountCube
 
 
 def encontrar_nome_coluna(df, possiveis_nomes):
@@ -99,6 +100,7 @@ def main():
 
     # Processador global
     processador_global = DataProcessor()
+    cubo = CountCube()
     arquivos_processados = 0
     total_registros = 0
 
@@ -110,6 +112,7 @@ def main():
             # Processa estatísticas
             processador_arquivo = DataProcessor()
             processador_arquivo.process_dataframe(df_filtrado, mapa_colunas)
+            cubo.add_dataframe(df_filtrado, mapa_colunas)
 
             # Mescla com processador global
             for key in processador_arquivo.statistics:
@@ -173,6 +176,9 @@ def main():
     arquivo_insights = os.path.join(PASTA_RELATORIOS, f'insights_{timestamp}.json')
     analisador.export_insights(arquivo_insights)
 
+    arquivo_cubo = os.path.join(PASTA_RELATORIOS, f'cubo_{timestamp}.npz')
+    cubo.save(arquivo_cubo)
+
     # Resumo Final
     print("\n\n" + "="*60)
     print("RESUMO FINAL")
@@ -19,6 +19,7 @@ import pandas as pd
 import glob
 from datetime import datetime
 from app.banco_de_dados.data_processor import DataProcessor
+from app.banco_de_dados.count_cube import CountCube
 from app.banco_de_dados.data_analyzer import DataAnalyzer
 
 
@@ -91,6 +92,7 @@ def main():
     print(f"Encontrados {len(arquivos)} arquivos\n")
 
     processador_global = DataProcessor()
+    cubo = CountCube()
     total_registros = 0
 
     # Processa primeiros 3 arquivos como teste
@@ -100,6 +102,7 @@ def main():
         if df_filtrado is not None:
             processador = DataProcessor()
             processador.process_dataframe(df_filtrado, mapa_colunas)
+            cubo.add_dataframe(df_filtrado, mapa_colunas)
             total_registros += len(df_filtrado)
 
             # Mescla estatísticas
@@ -142,6 +145,9 @@ def main():
     arquivo_insights = os.path.join(PASTA_RELATORIOS, f'insights_{timestamp}.json')
     analisador.export_insights(arquivo_insights)
 
+    arquivo_cubo = os.path.join(PASTA_RELATORIOS, f'cubo_{timestamp}.npz')
+    cubo.save(arquivo_cubo)
+
     print("\n" + "="*60)
     print("RESUMO FINAL")
     print("="*60)
@@ -0,0 +1,25 @@
+import pytest
+from fastapi import HTTPException
+
+from app.bbox import parse_bbox
+
+
+def test_parse_bbox_devolve_os_limites_na_ordem_da_query():
+    assert parse_bbox("-38.6,-3.8,-38.4,-3.7") == (-38.6, -3.8, -38.4, -3.7)
+
+
+@pytest.mark.parametrize(
+    "bbox",
+    [
+        "-38.4,-3.8,-38.6,-3.7",  # longitudes invertidas
+        "-38.6,-3.7,-38.4,-3.8",  # latitudes invertidas
+        "-38.6,-95,-38.4,-3.7",
+        "-38.6,-3.8,-38.4",
+        "a,b,c,d",
+        "nan,-3.8,-38.4,-3.7",
+    ],
+)
+def test_parse_bbox_rejeita_caixas_invalidas(bbox):
+    with pytest.raises(HTTPException) as erro:
+        parse_bbox(bbox)
+    assert erro.value.status_code == 400
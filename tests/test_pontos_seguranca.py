@@ -0,0 +1,64 @@
+import uuid
+from datetime import datetime
+
+import numpy as np
+
+from app import pontos_seguranca
+from app.models import Camera
+
+ORIGEM = (-3.7319, -38.5267)
+DESTINO = (-3.7339, -38.5247)
+# ~15 m ao norte da origem.
+CAMERA = (ORIGEM[0] + 15 / 111_195, ORIGEM[1])
+
+
+def _codificar(pontos, precisao=5):
+    """Polyline codificada (algoritmo do Google) de uma lista de ``(lat, lon)``."""
+
+    texto, anterior = [], (0, 0)
+    for ponto in pontos:
+        atual = tuple(round(valor * 10**precisao) for valor in ponto)
+        for delta in (atual[0] - anterior[0], atual[1] - anterior[1]):
+            valor = ~(delta << 1) if delta < 0 else delta << 1
+            while valor >= 0x20:
+                texto.append(chr((0x20 | (valor & 0x1F)) + 63))
+                valor >>= 5
+            texto.append(chr(valor + 63))
+        anterior = atual
+    return "".join(texto)
+
+
+def _segmentos_com_camera(latitudes, longitudes, raio_m=50.0):
+    camada = pontos_seguranca.CamadaDePontos([(uuid.uuid4(), "camera", None, *CAMERA)])
+    segmentos = pontos_seguranca.segmentar_caminho(latitudes, longitudes)
+    indices_segmento, _ = pontos_seguranca.pontos_no_corredor(camada, segmentos, raio_m)
+    return sorted(set(indices_segmento.tolist()))
+
+
+def test_origem_igual_ao_destino_encontra_camera_proxima():
+    assert _segmentos_com_camera([ORIGEM[0], ORIGEM[0]], [ORIGEM[1], ORIGEM[1]]) == [0]
+
+
+def test_vertice_repetido_na_polyline_encontra_camera_proxima():
+    latitudes, longitudes = pontos_seguranca.decodificar_polyline(_codificar([ORIGEM, ORIGEM, DESTINO]))
+
+    assert np.isfinite(latitudes).all() and len(latitudes) == 3
+    # O segmento de comprimento zero (o primeiro) também enxerga a câmera, além do seguinte.
+    assert _segmentos_com_camera(latitudes, longitudes) == [0, 1]
+
+
+
+def test_registrar_ponto_ja_presente_apos_recarga_nao_duplica(monkeypatch):
+    camera = Camera(
+        id=uuid.uuid4(), name="camera", latitude=CAMERA[0], longitude=CAMERA[1], created_at=datetime(2024, 3, 10)
+    )
+    # Recarga do banco entre o commit e o registro: a camada já conta a câmera nova.
+    camada = pontos_seguranca.CamadaDePontos(
+        [(camera.id, camera.name, None, *CAMERA)], assinatura=(1, camera.created_at)
+    )
+    monkeypatch.setitem(pontos_seguranca._camadas, Camera, camada)
+
+    pontos_seguranca.registrar_ponto(camera)
+
+    assert len(camada) == 1
+    assert camada.assinatura == (1, camera.created_at)
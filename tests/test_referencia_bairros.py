@@ -0,0 +1,33 @@
+import json
+import os
+
+from app.banco_de_dados.referencia_bairros import ais_do_bairro
+from app.indice_bairros import CAMINHO_BAIRROS
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Bairros do arquivo de polígonos que não aparecem na tabela da SSPDS; a
+# consulta por ponto devolve ``ais: null`` dentro deles.
+BAIRROS_SEM_AIS_CONHECIDOS = {"RACHEL DE QUEIROZ"}
+
+
+def _nomes_dos_poligonos():
+    with open(os.path.join(RAIZ, CAMINHO_BAIRROS), encoding="utf-8") as arquivo:
+        feicoes = json.load(arquivo)["features"]
+    # Mesmo filtro de ``construir_indice_bairros``: polígonos com ``nome``.
+    return [
+        feicao["properties"]["nome"]
+        for feicao in feicoes
+        if feicao["geometry"]["type"] in ("Polygon", "MultiPolygon") and feicao["properties"].get("nome")
+    ]
+
+
+def test_so_os_bairros_conhecidos_ficam_sem_ais():
+    nomes = _nomes_dos_poligonos()
+
+    assert nomes
+    assert {nome for nome in nomes if ais_do_bairro(nome) is None} <= BAIRROS_SEM_AIS_CONHECIDOS
+
+
+def test_parque_genibau_usa_a_ais_do_genibau():
+    assert ais_do_bairro("PARQUE GENIBAÚ") == ais_do_bairro("Genibaú") == 2